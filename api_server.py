@@ -2,25 +2,118 @@
 
 import os
 import asyncio
+from contextlib import aclosing, asynccontextmanager
 from typing import Optional
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-import json
+from starlette.background import BackgroundTask
 
 # Load environment variables
 load_dotenv()
 
-from google.adk.sessions import InMemorySessionService, Session
-from google.adk.runners import Runner
 from google.adk.plugins.logging_plugin import LoggingPlugin
 from google.genai.types import Content, Part
 from content_creation_studio.agent import root_agent
+from content_creation_studio.templates import content_request_query
+from content_creation_studio.cassettes import (
+    CassettePlayer, CassetteRecorder, cassette_for_request, current_cassette, save_recording
+)
+from content_creation_studio.deadlines import Deadline, current_deadline
+from content_creation_studio.branches import branch_stats
+from content_creation_studio.connections import pool_snapshot
+from content_creation_studio.breaker import breaker_status
+from content_creation_studio.hedging import hedging_controller
+from content_creation_studio.instrumentation import tool_stats
+from content_creation_studio.offload import offload_stats
+from serving import metrics
+from serving.accounting import REJECT, TokenAccounting, current_ledger
+from serving.cancellation import CancelScope, CancellationStats, stream_until_disconnect
+from serving.diagnostics import debug_router, loop_monitor
+from serving.plugins.accounting import AccountingPlugin
+from serving.plugins.cancellation import CancellationPlugin
+from serving.plugins.cassettes import CassettePlugin
+from serving.plugins.compaction import SessionCompactionPlugin
+from serving.plugins.metrics import MetricsPlugin
+from serving.plugins.tracing import TracingPlugin
+from serving.runners import RunnerRegistry
+from serving.sessions import create_session_service
+from serving.sse import sse_response
+from serving.tracing import exporter_from_env
+
+# Global session service: bounded in-memory store, or SQLite for multi-worker deployments
+session_service = create_session_service()
+
+# Requests that don't identify their user share this default shard
+DEFAULT_USER_ID = "web_user_001"
+
+# Compacts each finished workflow stage's events into a summary event
+compaction = SessionCompactionPlugin()
+
+# Time and tokens saved by stopping runs whose client disconnected
+cancellation_stats = CancellationStats()
+
+# Token usage and cost per request, user, stage and agent, and per-user budgets
+token_accounting = TokenAccounting.from_env()
+
+# Span exporter when TRACE_FILE is set; analyze with `python -m benchmarks.traces`
+span_exporter = exporter_from_env()
+
+
+def build_plugins():
+    plugins = [LoggingPlugin(), MetricsPlugin(), CancellationPlugin(), AccountingPlugin(token_accounting)]
+    if os.environ.get("SESSION_COMPACTION", "1") != "0":
+        plugins.append(compaction)
+    if span_exporter:
+        plugins.append(TracingPlugin(span_exporter))
+    plugins.append(CassettePlugin())
+    return plugins
+
+
+# Runners are built once at startup (see lifespan) and shared by every request
+runners: Optional[RunnerRegistry] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the runners and warm up model clients in the background; /ready reports when done."""
+    global runners
+    # Every endpoint runs through the orchestrator, so it is the only entry agent with a runner
+    runners = RunnerRegistry(session_service, plugins_factory=build_plugins)
+    runners.register("orchestrator", root_agent)
+    loop_monitor.start()
+    preconnect = os.environ.get("WARMUP_PRECONNECT", "1") != "0"
+    connections = int(os.environ.get("HTTP_POOL_PRECONNECT", "2"))
+    warmup_task = asyncio.create_task(runners.warm_up(preconnect=preconnect, connections=connections))
+    compaction_task = asyncio.create_task(compact_sessions_periodically())
+    yield
+    warmup_task.cancel()
+    compaction_task.cancel()
+    await runners.close()
+    loop_monitor.stop()
+
+
+async def compact_sessions_periodically():
+    """Trims old events and expires idle sessions in the durable session store,
+    then deletes disk blobs no session references any more."""
+    interval = float(os.environ.get("SESSION_COMPACT_INTERVAL_SECONDS", 600))
+    idle_seconds = float(os.environ.get("SESSION_TTL_SECONDS", 3600))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if hasattr(session_service, "compact"):
+                await session_service.expire_sessions(idle_seconds)
+                await session_service.compact()
+            # Blobs younger than one interval may belong to writes still in flight
+            await session_service.collect_blobs(min_age_seconds=interval)
+        except Exception as e:
+            print(f"⚠️  Session compaction failed: {e}")
+
 
 # Initialize FastAPI app
-app = FastAPI(title="Content Creation Studio API")
+app = FastAPI(title="Content Creation Studio API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -31,9 +124,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global session service
-session_service = InMemorySessionService()
-
+# /debug/loop-lag, /debug/profile and /debug/memory, only with DEBUG_ENDPOINTS=1
+app.include_router(debug_router)
 
 class ContentRequest(BaseModel):
     """Request model for content creation."""
@@ -42,11 +134,15 @@ class ContentRequest(BaseModel):
     tone: str
     keywords: str
     session_id: Optional[str] = None
+    user_id: Optional[str] = None
+    # Overall time budget; stages degrade instead of overrunning it
+    deadline_seconds: Optional[float] = None
 
 
 class AnalyzeRequest(BaseModel):
     """Request model for text analysis."""
     text: str
+    user_id: Optional[str] = None
 
 
 @app.get("/")
@@ -59,143 +155,227 @@ async def root():
     }
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness endpoint, green only once runner warm-up has finished."""
+    status = runners.status()
+    return JSONResponse(status_code=200 if runners.ready else 503, content=status)
+
+
 @app.post("/api/create-content")
-async def create_content(request: ContentRequest):
+async def create_content(request: ContentRequest, http_request: Request):
     """
     Create a complete content package.
     Returns streaming response with real-time updates.
     """
+    user_id = request.user_id or DEFAULT_USER_ID
+    ledger = None
     try:
-        # Create or retrieve session
-        user_id = "web_user_001"
-
+        # Retrieve the session before admitting, so a 404 never reserves budget
         if request.session_id:
-            try:
-                session = await session_service.get_session(
-                    app_name=root_agent.name,
-                    user_id=user_id,
-                    session_id=request.session_id
-                )
-            except:
-                session = await session_service.create_session(
-                    app_name=root_agent.name,
-                    user_id=user_id
-                )
-        else:
+            session = await session_service.get_session(
+                app_name=root_agent.name,
+                user_id=user_id,
+                session_id=request.session_id
+            )
+            if session is None:
+                raise HTTPException(status_code=404, detail=f"Session {request.session_id} not found")
+
+        ledger = token_accounting.admit(user_id, "create_content")
+        if ledger.decision == REJECT:
+            raise HTTPException(status_code=429, detail=f"Token budget exhausted for user {user_id}")
+
+        if not request.session_id:
             session = await session_service.create_session(
                 app_name=root_agent.name,
                 user_id=user_id
             )
 
         # Build the query
-        query = f"""Create a complete content package for:
-- Topic: {request.topic}
-- Target Audience: {request.target_audience}
-- Tone: {request.tone}
-- Keywords: {request.keywords}
-"""
-
-        # Create runner with LoggingPlugin
-        runner = Runner(
-            agent=root_agent,
-            session_service=session_service,
-            app_name=root_agent.name,
-            plugins=[LoggingPlugin()]
+        query = content_request_query(request.topic, request.target_audience, request.tone, request.keywords)
+
+        runner = runners.get("orchestrator")
+        budget = request.deadline_seconds or float(os.environ.get("REQUEST_DEADLINE_SECONDS", 0))
+        deadline = Deadline(budget) if budget > 0 else None
+        # Replays the cassette named in X-Cassette, or records the run, when CASSETTE_DIR is set
+        cassette = cassette_for_request(
+            http_request.headers.get("X-Cassette"),
+            float(http_request.headers.get("X-Cassette-Time-Scale", 1)),
+            meta={"entry": root_agent.name, "query": query, "content_request": request.model_dump(exclude={"session_id", "user_id"})},
         )
 
         async def generate():
-            """Stream events as they occur."""
+            """Stream events as they occur; stop the run if the client disconnects."""
             try:
                 final_response = None
                 event_count = 0
 
                 # Send initial status
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Starting content creation workflow...', 'session_id': session.id})}\n\n"
-
-                async for event in runner.run_async(
-                    user_id=user_id,
-                    session_id=session.id,
-                    new_message=Content(parts=[Part(text=query)], role="user")
-                ):
-                    event_count += 1
-
-                    # Send progress update
-                    event_data = {
-                        'type': 'event',
-                        'event_id': event_count,
-                        'author': event.author if hasattr(event, 'author') else 'system',
-                    }
-
-                    if hasattr(event, 'content') and event.content:
-                        if event.content.parts and len(event.content.parts) > 0:
-                            text = event.content.parts[0].text
-                            if text:
-                                event_data['content_preview'] = text[:200]
-
-                    yield f"data: {json.dumps(event_data)}\n\n"
-
-                    # Check if final response
-                    if event.is_final_response():
-                        final_response = event.content.parts[0].text
-                        yield f"data: {json.dumps({'type': 'complete', 'content': final_response, 'session_id': session.id})}\n\n"
-                        break
+                yield {'type': 'status', 'message': 'Starting content creation workflow...', 'session_id': session.id}
+
+                # The run task inherits the deadline, cassette and ledger from this context
+                current_deadline.set(deadline)
+                current_cassette.set(cassette)
+                current_ledger.set(ledger)
+                events = stream_until_disconnect(
+                    http_request,
+                    lambda: runner.run_async(
+                        user_id=user_id,
+                        session_id=session.id,
+                        new_message=Content(parts=[Part(text=query)], role="user")
+                    ),
+                    CancelScope(),
+                    cancellation_stats,
+                    abandon=runners.abandon,
+                )
+                async with aclosing(events):
+                    async for event in events:
+                        event_count += 1
+
+                        # Send progress update
+                        event_data = {
+                            'type': 'event',
+                            'event_id': event_count,
+                            'author': event.author if hasattr(event, 'author') else 'system',
+                        }
+
+                        if hasattr(event, 'content') and event.content:
+                            if event.content.parts and len(event.content.parts) > 0:
+                                text = event.content.parts[0].text
+                                if text:
+                                    event_data['content_preview'] = text[:200]
+
+                        yield event_data
+
+                        # Check if final response
+                        if event.is_final_response():
+                            final_response = event.content.parts[0].text
+                            skipped = deadline.skipped if deadline else []
+                            yield {'type': 'complete', 'content': final_response, 'session_id': session.id, 'partial': bool(skipped), 'skipped': skipped, 'usage': ledger.summary()}
 
                 if not final_response:
-                    yield f"data: {json.dumps({'type': 'error', 'message': 'No final response received'})}\n\n"
+                    yield {'type': 'error', 'message': 'No final response received'}
 
             except Exception as e:
                 error_message = str(e)
-                yield f"data: {json.dumps({'type': 'error', 'message': error_message})}\n\n"
-
-        return StreamingResponse(
-            generate(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "X-Accel-Buffering": "no"
-            }
+                yield {'type': 'error', 'message': error_message}
+
+            finally:
+                token_accounting.finish(ledger, completed=final_response is not None)
+                if isinstance(cassette, CassetteRecorder):
+                    # Gzipping and writing a whole run would stall every other stream on the loop
+                    path = await asyncio.to_thread(save_recording, cassette, session.id)
+                    print(f"📼 Recorded run to {path}")
+                elif isinstance(cassette, CassettePlayer):
+                    print(f"📼 Replayed run: {cassette.mismatches} request mismatch(es), {cassette.unused_calls()} unused call(s)")
+
+        # Finishes the ledger if the client leaves before the stream starts; a no-op otherwise
+        return sse_response(
+            generate(), http_request, background=BackgroundTask(token_accounting.finish, ledger, completed=False)
         )
 
     except Exception as e:
+        if ledger is not None:
+            token_accounting.finish(ledger, completed=False)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/analyze-text")
 async def analyze_text(request: AnalyzeRequest):
     """Analyze text snippet."""
-    try:
-        user_id = "web_user_001"
-        session = await session_service.create_session(
-            app_name=root_agent.name,
-            user_id=user_id
-        )
+    user_id = request.user_id or DEFAULT_USER_ID
+    ledger = token_accounting.admit(user_id, "analyze_text")
+    if ledger.decision == REJECT:
+        raise HTTPException(status_code=429, detail=f"Token budget exhausted for user {user_id}")
+    current_ledger.set(ledger)
+    final_response = ""
 
+    try:
         query = f"Can you analyze this text snippet:\n\n{request.text}"
+        runner = runners.get("orchestrator")
 
-        runner = Runner(
-            agent=root_agent,
-            session_service=session_service,
-            app_name=root_agent.name
-        )
-
-        final_response = ""
-        async for event in runner.run_async(
-            user_id=user_id,
-            session_id=session.id,
-            new_message=Content(parts=[Part(text=query)], role="user")
-        ):
-            if event.is_final_response():
-                final_response = event.content.parts[0].text
-                break
+        # Stateless endpoint: the session is freed as soon as the analysis returns
+        async with session_service.ephemeral_session(
+            app_name=root_agent.name,
+            user_id=user_id
+        ) as session:
+            async for event in runner.run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=Content(parts=[Part(text=query)], role="user")
+            ):
+                if event.is_final_response():
+                    final_response = event.content.parts[0].text
+                    break
 
         return {
             "status": "success",
-            "analysis": final_response
+            "analysis": final_response,
+            "usage": ledger.summary()
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        token_accounting.finish(ledger, completed=bool(final_response))
+
+
+@app.get("/api/usage")
+async def usage_report():
+    """Token usage and estimated cost by user, stage, agent and model, plus recent requests."""
+    return token_accounting.report()
+
+
+@app.get("/api/cancellation-stats")
+async def cancellation_stats_endpoint():
+    """Runs cancelled after client disconnects and the estimated savings."""
+    return cancellation_stats.snapshot()
+
+
+@app.get("/api/breakers")
+async def breakers():
+    """Circuit breaker state per (model, agent)."""
+    return breaker_status()
+
+
+@app.get("/api/branch-stats")
+async def branch_stats_endpoint():
+    """Per-branch success rates and retry counts of the parallel channel stage."""
+    return branch_stats.snapshot()
+
+
+@app.get("/api/hedging-stats")
+async def hedging_stats():
+    """Per-agent model call counts, hedges fired and current hedge thresholds."""
+    return hedging_controller.snapshot()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Per-agent and per-tool call counts, latencies, tokens and errors (Prometheus format)."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/tool-stats")
+async def tool_stats_endpoint():
+    """Per-tool call counts, latency and input/result sizes, recent samples and worker pool offloading."""
+    return {**tool_stats.snapshot(), "offload": offload_stats.snapshot()}
+
+
+@app.get("/api/connections")
+async def connection_stats():
+    """Shared model connection pool: active and idle connections, wait times and handshakes per minute."""
+    return pool_snapshot()
+
+
+@app.get("/api/session-stats")
+async def session_stats():
+    """Session store footprint, entry counts, and compaction savings in the runs (mostly nested AgentTool sessions)."""
+    return {**await session_service.stats(), "compaction": compaction.totals()}
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,14 +2,15 @@
 
 import os
 import asyncio
+from contextlib import aclosing, asynccontextmanager
 from typing import Optional
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-import json
+from starlette.background import BackgroundTask
 from pathlib import Path
 
 # Load environment variables
@@ -17,6 +18,17 @@ load_dotenv()
 
 from vertexai import agent_engines
 
+# Shared serving helpers live at the project root (copied next to this file in the container);
+# run from backend/ locally with PYTHONPATH=..
+from serving import metrics
+from serving.accounting import REJECT, TokenAccounting
+from serving.agent_engine_channel import SharedChannelEngine
+from serving.cancellation import CANCEL_IMMEDIATE, CancelScope, CancellationStats, stream_until_disconnect
+from serving.diagnostics import debug_router, loop_monitor
+from serving.remote_events import ResponseText, decode_stream
+from serving.session_pool import RemoteSessionPool
+from serving.sse import sse_response
+
 # Get Agent Engine resource name from environment
 # Allow it to be missing at startup for health checks, but required for actual API calls
 AGENT_RESOURCE_NAME = os.environ.get("AGENT_RESOURCE_NAME") or os.environ.get("AGENT_ENGINE_RESOURCE_NAME")
@@ -26,15 +38,49 @@ AGENT_NAME = "content_creation_studio"
 
 # Get remote agent instance if configured
 remote_agent = None
-if AGENT_RESOURCE_NAME:
+if os.environ.get("AGENT_ENGINE_BACKEND") == "fake":
+    # Local in-process stand-in for load tests and offline development
+    from serving.fake_agent_engine import FakeAgentEngine
+    remote_agent = FakeAgentEngine()
+    print("🧪 Using the local fake Agent Engine")
+elif AGENT_RESOURCE_NAME:
     try:
         remote_agent = agent_engines.get(AGENT_RESOURCE_NAME)
+        if os.environ.get("AGENT_ENGINE_SHARED_CHANNEL", "1") != "0":
+            # Streams and session calls share one long-lived channel instead of a new one per call
+            remote_agent = SharedChannelEngine.from_env(remote_agent)
     except Exception as e:
         print(f"Warning: Failed to connect to Agent Engine: {e}")
         print(f"The server will start but API calls will fail.")
 
+# Requests don't identify their user, so they all share this one
+DEFAULT_USER_ID = "web_user_001"
+
+# Pre-created remote sessions, so new conversations skip the create round-trip
+session_pool = RemoteSessionPool.from_env(remote_agent) if remote_agent else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Watch the event loop for stalls, open the Agent Engine connection and keep the session pool filled."""
+    loop_monitor.start()
+    if isinstance(remote_agent, SharedChannelEngine):
+        try:
+            await remote_agent.preconnect()
+        except Exception as e:
+            print(f"⚠️  Preconnecting to Agent Engine failed: {e}")
+    if session_pool:
+        session_pool.warm([DEFAULT_USER_ID])
+    yield
+    if session_pool:
+        await session_pool.close()
+    if isinstance(remote_agent, SharedChannelEngine):
+        await remote_agent.close()
+    loop_monitor.stop()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="Content Creation Studio API")
+app = FastAPI(title="Content Creation Studio API", lifespan=lifespan)
 
 # Configure CORS - allow frontend URL from environment or defaults
 allowed_origins = ["http://localhost:3000", "http://localhost:5173"]
@@ -49,6 +95,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# /debug/loop-lag, /debug/profile and /debug/memory, only with DEBUG_ENDPOINTS=1
+app.include_router(debug_router)
+
 # Check if static files directory exists (for production deployment)
 STATIC_DIR = Path(__file__).parent / "static"
 if STATIC_DIR.exists():
@@ -58,6 +107,15 @@ if STATIC_DIR.exists():
 # Note: We don't need a session service for remote agents
 # The remote agent manages sessions internally
 
+# Time and tokens saved by abandoning remote streams whose client disconnected
+cancellation_stats = CancellationStats()
+
+# Token usage and cost per request, user and agent, and per-user budgets
+token_accounting = TokenAccounting.from_env()
+
+# Each quality_improvement_loop iteration starts with the quality checker
+LOOP_STARTS = {"quality_checker_agent": "quality_improvement_loop"}
+
 
 class ContentRequest(BaseModel):
     """Request model for content creation."""
@@ -104,7 +162,7 @@ async def serve_frontend():
 
 
 @app.post("/api/create-content")
-async def create_content(request: ContentRequest):
+async def create_content(request: ContentRequest, http_request: Request):
     """
     Create a complete content package.
     Returns streaming response with real-time updates.
@@ -116,18 +174,33 @@ async def create_content(request: ContentRequest):
             detail="Agent Engine not configured. Set AGENT_RESOURCE_NAME environment variable."
         )
 
-    try:
-        # Create session with remote agent
-        user_id = "web_user_001"
+    # Cassette replay (X-Cassette) swaps the fake engine's models for a recording; a deployed engine can't
+    replay = {}
+    if http_request.headers.get("X-Cassette"):
+        if os.environ.get("AGENT_ENGINE_BACKEND") != "fake":
+            raise HTTPException(status_code=400, detail="Cassette replay needs AGENT_ENGINE_BACKEND=fake")
+        replay = {
+            "cassette": http_request.headers["X-Cassette"],
+            "cassette_time_scale": float(http_request.headers.get("X-Cassette-Time-Scale", 1)),
+        }
 
-        # Create or get session
+    user_id = DEFAULT_USER_ID
+    ledger = None
+    # Pool session taken for this request; given back if the stream never starts
+    acquired = None
+    try:
+        # Create or get session, before admitting, so a failed acquire never reserves budget
         if request.session_id:
             # Try to use existing session
             session_id = request.session_id
         else:
-            # Create new session
-            session = await remote_agent.async_create_session(user_id=user_id)
-            session_id = session['id']
+            # New session from the pool; the client keeps it for follow-ups
+            session_id = acquired = await session_pool.acquire(user_id)
+
+        # The remote agent's model can't be switched per request, so downgrades are rejected too
+        ledger = token_accounting.admit(user_id, "create_content", allow_downgrade=False)
+        if ledger.decision == REJECT:
+            raise HTTPException(status_code=429, detail=f"Token budget exhausted for user {user_id}")
 
         # Build the query
         query = f"""Create a complete content package for:
@@ -139,65 +212,80 @@ async def create_content(request: ContentRequest):
 
         async def generate():
             """Stream events as they occur."""
+            response = ResponseText()
             try:
                 # Send initial status
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Starting content creation workflow...', 'session_id': session_id})}\n\n"
-
-                # Stream query to remote agent
-                response_text = ""
-                event_count = 0
-
-                async for event in remote_agent.async_stream_query(
-                    user_id=user_id,
-                    session_id=session_id,
-                    message=query
-                ):
-                    event_count += 1
-
-                    # Extract text from event
-                    if isinstance(event, dict):
-                        content = event.get("content", event.get("parts", {}))
-
-                        if isinstance(content, dict):
-                            parts = content.get("parts", [])
-
-                            for part in parts:
-                                if isinstance(part, dict) and part.get("text"):
-                                    text = part["text"]
-                                    response_text += text
-
-                                    # Send progress update
-                                    yield f"data: {json.dumps({'type': 'chunk', 'content': text, 'session_id': session_id})}\n\n"
-
-                        # Also check for direct text field
-                        if "text" in event:
-                            text = event["text"]
-                            response_text += text
-                            yield f"data: {json.dumps({'type': 'chunk', 'content': text, 'session_id': session_id})}\n\n"
+                yield {'type': 'status', 'message': 'Starting content creation workflow...', 'session_id': session_id}
+
+                # Stream query to remote agent; closing the stream is the only way
+                # to stop a remote run, so disconnects always cancel immediately
+                scope = CancelScope(mode=CANCEL_IMMEDIATE)
+                event_metrics = metrics.EventStreamMetrics(LOOP_STARTS)
+
+                events = stream_until_disconnect(
+                    http_request,
+                    lambda: decode_stream(remote_agent.async_stream_query(
+                        user_id=user_id,
+                        session_id=session_id,
+                        message=query,
+                        **replay
+                    )),
+                    scope,
+                    cancellation_stats,
+                )
+                async with aclosing(events):
+                    async for event in events:
+                        event_metrics.observe(event.raw)
+                        token_accounting.charge_event(ledger, event.raw)
+                        scope.tokens_used += event.usage.get("total_token_count") or 0
+
+                        text = response.add(event)
+                        if text:
+                            # Send progress update
+                            yield {'type': 'chunk', 'content': text, 'session_id': session_id}
+                event_metrics.finish()
 
                 # Send complete response
-                if response_text:
-                    yield f"data: {json.dumps({'type': 'complete', 'content': response_text, 'session_id': session_id})}\n\n"
+                if response:
+                    yield {'type': 'complete', 'content': response.text, 'session_id': session_id, 'usage': ledger.summary()}
                 else:
-                    yield f"data: {json.dumps({'type': 'error', 'message': 'No response received from agent'})}\n\n"
+                    yield {'type': 'error', 'message': 'No response received from agent'}
 
             except Exception as e:
                 error_message = str(e)
-                yield f"data: {json.dumps({'type': 'error', 'message': error_message})}\n\n"
-
-        return StreamingResponse(
-            generate(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "X-Accel-Buffering": "no"
-            }
+                yield {'type': 'error', 'message': error_message}
+
+            finally:
+                token_accounting.finish(ledger, completed=bool(response))
+
+        # Finishes the ledger if the client leaves before the stream starts; a no-op otherwise
+        return sse_response(
+            generate(), http_request, background=BackgroundTask(token_accounting.finish, ledger, completed=False)
         )
 
     except Exception as e:
+        if ledger is not None:
+            token_accounting.finish(ledger, completed=False)
+        if acquired is not None:
+            # The client never learned this session's id
+            session_pool.release(user_id, acquired)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/cancellation-stats")
+async def cancellation_stats_endpoint():
+    """Streams abandoned after client disconnects and the estimated savings."""
+    return cancellation_stats.snapshot()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Per-agent and per-tool call counts, latencies, tokens and errors (Prometheus format)."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.post("/api/analyze-text")
 async def analyze_text(request: AnalyzeRequest):
     """Analyze text snippet."""
@@ -208,45 +296,73 @@ async def analyze_text(request: AnalyzeRequest):
             detail="Agent Engine not configured. Set AGENT_RESOURCE_NAME environment variable."
         )
 
+    user_id = DEFAULT_USER_ID
+    response = ResponseText()
+    ledger = None
+    session_id = None
+
     try:
-        user_id = "web_user_001"
+        # One-shot session from the pool, deleted once the analysis is done
+        session_id = await session_pool.acquire(user_id)
 
-        # Create session
-        session = await remote_agent.async_create_session(user_id=user_id)
-        session_id = session['id']
+        ledger = token_accounting.admit(user_id, "analyze_text", allow_downgrade=False)
+        if ledger.decision == REJECT:
+            raise HTTPException(status_code=429, detail=f"Token budget exhausted for user {user_id}")
 
         query = f"Can you analyze this text snippet:\n\n{request.text}"
 
         # Stream query to remote agent and collect response
-        response_text = ""
+        event_metrics = metrics.EventStreamMetrics(LOOP_STARTS)
 
-        async for event in remote_agent.async_stream_query(
+        async for event in decode_stream(remote_agent.async_stream_query(
             user_id=user_id,
             session_id=session_id,
             message=query
-        ):
-            # Extract text from event
-            if isinstance(event, dict):
-                content = event.get("content", event.get("parts", {}))
-
-                if isinstance(content, dict):
-                    parts = content.get("parts", [])
-                    for part in parts:
-                        if isinstance(part, dict) and part.get("text"):
-                            response_text += part["text"]
-
-                # Also check for direct text field
-                if "text" in event:
-                    response_text += event["text"]
+        )):
+            event_metrics.observe(event.raw)
+            token_accounting.charge_event(ledger, event.raw)
+            response.add(event)
+        event_metrics.finish()
 
         return {
             "status": "success",
-            "analysis": response_text if response_text else "No analysis received"
+            "analysis": response.text if response else "No analysis received",
+            "usage": ledger.summary()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        if ledger is not None:
+            token_accounting.finish(ledger, completed=bool(response))
+        if session_id:
+            session_pool.release(user_id, session_id)
+
+
+@app.get("/api/usage")
+async def usage_report():
+    """Token usage and estimated cost by user, agent and model, plus recent requests."""
+    return token_accounting.report()
+
+
+@app.get("/api/session-pool")
+async def session_pool_stats():
+    """Pre-created sessions ready per user, hit rate and session churn."""
+    if not session_pool:
+        raise HTTPException(status_code=503, detail="Agent Engine not configured")
+    return session_pool.snapshot()
+
+
+@app.get("/api/connections")
+async def connection_stats():
+    """Shared Agent Engine channel: state, active calls, slot wait times and handshakes per minute."""
+    if not isinstance(remote_agent, SharedChannelEngine):
+        return {"enabled": False}
+    return {"enabled": True, **remote_agent.snapshot()}
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,101 @@
+"""
+Bytes per session with and without the content-addressed blob store.
+
+Replays the event shape of one /api/create-content run into a session store:
+the orchestrator's tool call, the function response carrying the packaged
+text and every forwarded state delta (drafts, channel outputs, package), and
+the final model response repeating the package.
+
+Usage:
+    python -m benchmarks.blob_memory --sessions 200
+"""
+
+import argparse
+import asyncio
+import gc
+import tracemalloc
+
+from google.adk.events import Event, EventActions
+from google.genai.types import Content, FunctionCall, FunctionResponse, Part
+
+from content_creation_studio.blobs import BlobStore
+from serving.sessions import BoundedSessionService
+
+APP_NAME = "benchmark_app"
+
+
+def _copy(text: str) -> str:
+    """A distinct string object, as produced by separately decoded payloads."""
+    return (text + " ")[:-1]
+
+
+def _text(label: str, words: int, seed: int) -> str:
+    return f"{label} {seed}: " + " ".join(f"word{(seed * 31 + i) % 997}" for i in range(words))
+
+
+def pipeline_events(seed: int):
+    """Events of one content package run, as seen by the top-level session."""
+    drafts = [_text("draft", 600, seed), _text("improved", 750, seed), _text("final", 900, seed)]
+    outputs = {
+        "blog_topic": f"10 AI Tools That Save Remote Workers Time #{seed}",
+        "current_content": drafts[-1],
+        "quality_feedback": "QUALITY_THRESHOLD_MET",
+        "final_blog_post": _text("blog", 1100, seed),
+        "social_media_posts": _text("social", 450, seed),
+        "email_newsletter": _text("email", 400, seed),
+        "seo_metadata": _text("seo", 120, seed),
+    }
+    package = "\n\n".join(outputs[k] for k in ("final_blog_post", "social_media_posts", "email_newsletter", "seo_metadata"))
+    outputs["final_content_package"] = package
+
+    yield Event(
+        invocation_id="bench", author="master_orchestrator_agent",
+        content=Content(role="model", parts=[Part(function_call=FunctionCall(name="content_creation_coordinator", args={"request": "Create a package"}))]),
+    )
+    yield Event(
+        invocation_id="bench", author="master_orchestrator_agent",
+        content=Content(role="user", parts=[Part(function_response=FunctionResponse(name="content_creation_coordinator", response={"result": _copy(package)}))]),
+        actions=EventActions(state_delta={k: _copy(v) for k, v in outputs.items()}),
+    )
+    yield Event(
+        invocation_id="bench", author="master_orchestrator_agent",
+        content=Content(role="model", parts=[Part(text=_copy(package))]),
+    )
+
+
+async def fill(service: BoundedSessionService, sessions: int):
+    for seed in range(sessions):
+        session = await service.create_session(app_name=APP_NAME, user_id=f"user_{seed % 16}")
+        for event in pipeline_events(seed):
+            await service.append_event(session, event)
+
+
+def measure(label: str, blob_store, sessions: int):
+    gc.collect()
+    tracemalloc.start()
+    service = BoundedSessionService(blob_store=blob_store)
+    asyncio.run(fill(service, sessions))
+    gc.collect()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = asyncio.run(service.stats())
+    accounted = stats["bytes"] + (stats["blobs"]["memory_bytes"] if blob_store else 0)
+    print(f"   {label:<12} accounted {accounted / sessions:>10,.0f} B/session   traced {traced / sessions:>10,.0f} B/session")
+    return traced / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session memory with the blob store")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--min-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"📊 Session memory for {args.sessions} content-package sessions")
+    before = measure("inline", None, args.sessions)
+    after = measure("blob store", BlobStore(min_size=args.min_size), args.sessions)
+    print(f"   Reduction: {(1 - after / before) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Record pipeline runs to cassettes and replay them locally or against a server.
+
+Recording runs the agent the way run_agent.py does (real model unless
+MODEL_BACKEND=fake) and writes every model and tool call with its timing.
+Replaying answers the model calls from the cassette, so orchestration
+changes can be compared on realistic traffic with no model endpoint.
+
+Usage:
+    python -m benchmarks.cassettes record -o runs/ai-productivity.cassette.json.gz
+    python -m benchmarks.cassettes show runs/ai-productivity.cassette.json.gz
+    python -m benchmarks.cassettes replay runs/ai-productivity.cassette.json.gz --time-scale 0
+    # Against a running server started with CASSETTE_DIR=runs:
+    python -m benchmarks.cassettes replay runs/ai-productivity.cassette.json.gz --server http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# Agents are only built to answer from cassettes (CassetteLlm) when CASSETTE_DIR is set
+os.environ.setdefault("CASSETTE_DIR", "runs")
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, Part
+
+from content_creation_studio.agent import full_content_workflow, root_agent
+from content_creation_studio.cassettes import Cassette, CassettePlayer, CassetteRecorder, current_cassette
+from content_creation_studio.templates import content_request_query
+from serving.plugins.cassettes import CassettePlugin
+
+AGENTS = {"orchestrator": root_agent, "full_workflow": full_content_workflow}
+
+# Same brief as run_agent.py's first query
+DEFAULT_REQUEST = {
+    "topic": "Productivity hacks using AI for remote workers",
+    "target_audience": "Remote professionals and digital nomads",
+    "tone": "Conversational and helpful",
+    "keywords": "AI productivity, remote work, automation tools",
+}
+
+
+async def run_locally(agent, query: str, cassette) -> dict:
+    """Runs one query through a fresh runner with the given cassette active."""
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, session_service=session_service, app_name=agent.name, plugins=[CassettePlugin()])
+    session = await session_service.create_session(app_name=agent.name, user_id="cassette_user")
+    current_cassette.set(cassette)
+    start = time.perf_counter()
+    first_event = None
+    events = 0
+    final_response = ""
+    async for event in runner.run_async(
+        user_id="cassette_user",
+        session_id=session.id,
+        new_message=Content(parts=[Part(text=query)], role="user"),
+    ):
+        events += 1
+        if first_event is None:
+            first_event = time.perf_counter() - start
+        if event.is_final_response() and event.content and event.content.parts:
+            final_response = event.content.parts[0].text or ""
+    await runner.close()
+    return {
+        "seconds": round(time.perf_counter() - start, 3),
+        "time_to_first_event": round(first_event or 0.0, 3),
+        "events": events,
+        "final_response_chars": len(final_response),
+    }
+
+
+async def replay_against_server(url: str, path: Path, cassette: Cassette, time_scale: float) -> dict:
+    """POSTs the recorded request to a server that loads cassettes from CASSETTE_DIR."""
+    import httpx
+
+    headers = {"X-Cassette": path.name, "X-Cassette-Time-Scale": str(time_scale)}
+    body = cassette.meta.get("content_request") or DEFAULT_REQUEST
+    start = time.perf_counter()
+    first_event = None
+    events = 0
+    outcome = "no final response"
+    async with httpx.AsyncClient(timeout=None) as client:
+        async with client.stream("POST", f"{url.rstrip('/')}/api/create-content", json=body, headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                events += 1
+                if first_event is None:
+                    first_event = time.perf_counter() - start
+                message = json.loads(line[len("data: "):])
+                if message.get("type") in ("complete", "error"):
+                    outcome = message["type"]
+    return {
+        "seconds": round(time.perf_counter() - start, 3),
+        "time_to_first_event": round(first_event or 0.0, 3),
+        "sse_messages": events,
+        "outcome": outcome,
+    }
+
+
+async def record(args):
+    agent = AGENTS[args.agent]
+    request = {key: getattr(args, key) for key in DEFAULT_REQUEST}
+    query = content_request_query(**request)
+    recorder = CassetteRecorder({"entry": agent.name, "query": query, "content_request": request})
+    result = await run_locally(agent, query, recorder)
+    recorder.finish().save(args.output)
+    size = os.path.getsize(args.output)
+    print(f"📼 Recorded {len(recorder.cassette.calls)} model and {len(recorder.cassette.tools)} tool calls "
+          f"in {result['seconds']}s to {args.output} ({size / 1024:.1f} KiB)")
+
+
+async def replay(args):
+    path = Path(args.cassette)
+    cassette = Cassette.load(path)
+    if args.server:
+        result = await replay_against_server(args.server, path, cassette, args.time_scale)
+    else:
+        agent = next(agent for agent in AGENTS.values() if agent.name == cassette.meta.get("entry", root_agent.name))
+        player = CassettePlayer(cassette, args.time_scale)
+        result = await run_locally(agent, cassette.meta["query"], player)
+        result.update({"request_mismatches": player.mismatches, "unused_calls": player.unused_calls()})
+    result["recorded_seconds"] = cassette.meta.get("duration_seconds")
+    print(json.dumps(result, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay pipeline cassettes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Run the pipeline and record a cassette")
+    record_parser.add_argument("-o", "--output", required=True)
+    # Servers replay through the orchestrator, so record from it unless replaying locally only
+    record_parser.add_argument("--agent", choices=sorted(AGENTS), default="orchestrator")
+    for key, value in DEFAULT_REQUEST.items():
+        record_parser.add_argument(f"--{key.replace('_', '-')}", dest=key, default=value)
+
+    replay_parser = commands.add_parser("replay", help="Replay a cassette locally or against a server")
+    replay_parser.add_argument("cassette")
+    replay_parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier on recorded model latency (0 = instant)")
+    replay_parser.add_argument("--server", default=None, help="Base URL of an API server started with CASSETTE_DIR")
+
+    show_parser = commands.add_parser("show", help="Summarize a cassette")
+    show_parser.add_argument("cassette")
+
+    args = parser.parse_args()
+    if args.command == "show":
+        print(json.dumps(Cassette.load(args.cassette).summary(), indent=2))
+    elif args.command == "record":
+        asyncio.run(record(args))
+    else:
+        # Replayed model calls never reach the API, but model clients still want a key
+        os.environ.setdefault("GOOGLE_API_KEY", "cassette-replay-placeholder-key")
+        asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Connection churn and call latency with and without the shared connection pools.
+
+Runs against local stand-in servers, so no API key or project is needed:
+
+- gemini: an HTTP/1.1 server answering generateContent (GOOGLE_GEMINI_BASE_URL
+  points genai at it). Each new connection waits --handshake-ms before it is
+  served, standing in for the TCP and TLS round trips to the real endpoint.
+  --agents concurrent agents make --calls model calls each, with:
+  - per_call: a model resolved from its name on every call, as a name string
+    in an agent is (what the deployed app did)
+  - per_model: one model instance, and genai client, per model name
+  - pooled: PooledGemini, every call through the one shared pool
+- agent_engine: a gRPC server implementing the stream and query methods of
+  ReasoningEngineExecutionService. Concurrent streams go through:
+  - per_call: a new client and channel per call, as the vertexai SDK does
+  - shared: SharedChannelEngine's one channel
+
+Reports connections opened (counted by the stand-in server for gemini, by
+channel for agent_engine, including one untimed warm-up call) and call
+latency. The agent_engine stand-in is plain gRPC over loopback with no
+simulated handshake, so it understates what a new channel costs against
+the real, TLS-terminated endpoint.
+
+Usage:
+    python -m benchmarks.connections
+    python -m benchmarks.connections --agents 16 --calls 20 --handshake-ms 40 --json connections.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import types as namespace
+from typing import Awaitable, Callable, List
+
+MODEL = "gemini-2.5-flash"
+RESOURCE_NAME = "projects/bench/locations/us-central1/reasoningEngines/1"
+
+RESPONSE = json.dumps({
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "Stand-in answer."}]}, "finishReason": "STOP"}],
+    "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 3, "totalTokenCount": 15},
+}).encode()
+MODEL_INFO = json.dumps({"name": f"models/{MODEL}"}).encode()
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summary(latencies: List[float], connections: int) -> dict:
+    return {
+        "calls": len(latencies),
+        "connections": connections,
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+    }
+
+
+class StandInGemini:
+    """Minimal keep-alive HTTP/1.1 server with the Gemini API's response shapes."""
+
+    def __init__(self, latency: float, handshake: float):
+        self.latency = latency
+        self.handshake = handshake
+        self.connections = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                method, path = request_line.split()[:2]
+                if method == b"GET":
+                    body, content_type = MODEL_INFO, b"application/json"
+                else:
+                    await asyncio.sleep(self.latency)
+                    if b"alt=sse" in path:
+                        body, content_type = b"data: " + RESPONSE + b"\r\n\r\n", b"text/event-stream"
+                    else:
+                        body, content_type = RESPONSE, b"application/json"
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: %s\r\nContent-Length: %d\r\n\r\n%s"
+                    % (content_type, len(body), body)
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def run_agents(agents: int, calls: int, call: Callable[[int], Awaitable[None]]) -> List[float]:
+    # Untimed, so one-off import and setup costs don't land in the first calls
+    await call(0)
+    latencies = []
+
+    async def agent(index: int):
+        for _ in range(calls):
+            start = time.perf_counter()
+            await call(index)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(agent(i) for i in range(agents)))
+    return latencies
+
+
+async def gemini_scenario(mode: str, agents: int, calls: int, latency: float, handshake: float) -> dict:
+    from google.adk.models.llm_request import LlmRequest
+    from google.adk.models.registry import LLMRegistry
+    from google.genai import types
+
+    from content_creation_studio import connections
+    from content_creation_studio.connections import PooledGemini
+
+    server = StandInGemini(latency, handshake)
+    os.environ["GOOGLE_GEMINI_BASE_URL"] = await server.start()
+    request = LlmRequest(model=MODEL, contents=[types.Content(role="user", parts=[types.Part(text="Hello")])])
+    models = []
+    if mode == "per_model":
+        models.append(LLMRegistry.new_llm(MODEL))
+    elif mode == "pooled":
+        models.append(PooledGemini(model=MODEL))
+
+    async def call(index: int):
+        llm = models[0] if models else LLMRegistry.new_llm(MODEL)
+        async for _ in llm.generate_content_async(request):
+            pass
+        if not models:
+            # An agent never closes these clients; closed here only so the benchmark doesn't leak them
+            await llm.api_client.aio.aclose()
+
+    latencies = await run_agents(agents, calls, call)
+    result = summary(latencies, server.connections)
+    if mode == "pooled":
+        result["pool"] = connections.pool_snapshot()
+    for llm in models:
+        if mode != "pooled":
+            await llm.api_client.aio.aclose()
+    await server.stop()
+    return result
+
+
+async def agent_engine_scenario(mode: str, streams: int, calls: int, chunks: int, interval: float) -> dict:
+    import grpc
+    from google.api import httpbody_pb2
+    from google.cloud.aiplatform_v1.services.reasoning_engine_execution_service import (
+        ReasoningEngineExecutionServiceAsyncClient,
+    )
+    from google.cloud.aiplatform_v1.services.reasoning_engine_execution_service.transports import (
+        ReasoningEngineExecutionServiceGrpcAsyncIOTransport,
+    )
+    from google.cloud.aiplatform_v1.types import (
+        QueryReasoningEngineRequest, QueryReasoningEngineResponse, StreamQueryReasoningEngineRequest,
+    )
+
+    from serving.agent_engine_channel import SharedChannelEngine
+
+    async def stream_query(request, context):
+        for i in range(chunks):
+            await asyncio.sleep(interval)
+            event = {"author": "blog_writer_agent", "content": {"parts": [{"text": f"chunk {i} "}]}}
+            yield httpbody_pb2.HttpBody(content_type="application/json", data=json.dumps(event).encode())
+
+    async def query(request, context):
+        return QueryReasoningEngineResponse(output={"id": "session-1"})
+
+    service = "google.cloud.aiplatform.v1.ReasoningEngineExecutionService"
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers([grpc.method_handlers_generic_handler(service, {
+        "StreamQueryReasoningEngine": grpc.unary_stream_rpc_method_handler(
+            stream_query,
+            request_deserializer=StreamQueryReasoningEngineRequest.deserialize,
+            response_serializer=httpbody_pb2.HttpBody.SerializeToString,
+        ),
+        "QueryReasoningEngine": grpc.unary_unary_rpc_method_handler(
+            query,
+            request_deserializer=QueryReasoningEngineRequest.deserialize,
+            response_serializer=QueryReasoningEngineResponse.serialize,
+        ),
+    })])
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+
+    def new_client():
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        return ReasoningEngineExecutionServiceAsyncClient(
+            transport=ReasoningEngineExecutionServiceGrpcAsyncIOTransport(channel=channel)
+        )
+
+    channels = 0
+    shared = None
+    if mode == "shared":
+        app = namespace.SimpleNamespace(resource_name=RESOURCE_NAME, location="us-central1")
+        shared = SharedChannelEngine(app, client=new_client())
+        await shared.preconnect()
+
+    async def call(index: int):
+        nonlocal channels
+        request = QueryReasoningEngineRequest(name=RESOURCE_NAME, input={"user_id": "u"}, class_method="async_create_session")
+        if shared is not None:
+            await shared.engine.execution_async_client.query_reasoning_engine(request=request)
+            async for _ in shared.async_stream_query(message="hi", user_id="u", session_id="session-1"):
+                pass
+            return
+        # Like the SDK: a new client, and channel, for the session call and another for the stream
+        channels += 2
+        client = new_client()
+        await client.query_reasoning_engine(request=request)
+        await client.transport.close()
+        client = new_client()
+        response = await client.stream_query_reasoning_engine(
+            request=StreamQueryReasoningEngineRequest(name=RESOURCE_NAME, input={"message": "hi"}, class_method="async_stream_query")
+        )
+        async for _ in response:
+            pass
+        await client.transport.close()
+
+    latencies = await run_agents(streams, calls, call)
+    if shared is not None:
+        result = summary(latencies, shared.connections_opened)
+        result["channel"] = shared.snapshot()
+        await shared.close()
+    else:
+        result = summary(latencies, channels)
+    await server.stop(None)
+    return result
+
+
+async def run(args) -> dict:
+    os.environ.setdefault("GOOGLE_API_KEY", "stand-in")
+    os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "0"
+    latency, handshake = args.latency_ms / 1000, args.handshake_ms / 1000
+    results = {"handshake_ms": args.handshake_ms, "latency_ms": args.latency_ms}
+    if args.target in ("gemini", "all"):
+        results["gemini"] = {
+            mode: await gemini_scenario(mode, args.agents, args.calls, latency, handshake)
+            for mode in ("per_call", "per_model", "pooled")
+        }
+    if args.target in ("agent_engine", "all"):
+        results["agent_engine"] = {
+            mode: await agent_engine_scenario(mode, args.agents, args.calls, args.chunks, latency / args.chunks)
+            for mode in ("per_call", "shared")
+        }
+    return results
+
+
+def print_report(results: dict):
+    print(f"Stand-in latency {results['latency_ms']} ms, simulated handshake {results['handshake_ms']} ms\n")
+    print(f"{'target':<14}{'mode':<12}{'calls':>8}{'connections':>13}{'p50 ms':>10}{'p95 ms':>10}")
+    for target in ("gemini", "agent_engine"):
+        for mode, result in results.get(target, {}).items():
+            print(
+                f"{target:<14}{mode:<12}{result['calls']:>8}{result['connections']:>13}"
+                f"{result['p50_ms']:>10}{result['p95_ms']:>10}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared connection pool comparison against local stand-in servers")
+    parser.add_argument("--target", choices=("gemini", "agent_engine", "all"), default="all")
+    parser.add_argument("--agents", type=int, default=8, help="Concurrent agents (gemini) or streams (agent_engine)")
+    parser.add_argument("--calls", type=int, default=10, help="Sequential calls per agent or stream")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Stand-in response time")
+    parser.add_argument("--handshake-ms", type=float, default=20, help="Simulated cost of a new Gemini connection")
+    parser.add_argument("--chunks", type=int, default=5, help="Chunks per Agent Engine stream")
+    parser.add_argument("--json", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
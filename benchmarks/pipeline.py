@@ -0,0 +1,288 @@
+"""
+End-to-end throughput and latency of the content pipeline, with no network.
+
+Drives root_agent and full_content_workflow through the server's runner
+setup (RunnerRegistry, configured session store, compaction) using the fake
+model (MODEL_BACKEND=fake) or a replayed cassette, at increasing concurrency
+and for 1, 2 and 3 quality-loop iterations. For every combination it reports
+requests/sec, p50/p95/p99 end-to-end latency, time to first event, mean time
+per agent, peak RSS and event-loop lag, and writes everything as JSON.
+
+Usage:
+    python -m benchmarks.pipeline --levels 1,4,16,64,256 --output results.json
+    python -m benchmarks.pipeline --cassette runs/ai-productivity.cassette.json.gz --loops 1
+    python -m benchmarks.pipeline --levels 4 --trace spans.jsonl && python -m benchmarks.traces spans.jsonl
+    # Fail (exit 1) if any metric regressed more than 10% against a baseline:
+    python -m benchmarks.pipeline --output new.json --compare results.json --threshold 0.10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder-key")
+os.environ.setdefault("WARMUP_PRECONNECT", "0")
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai.types import Content, Part
+
+from content_creation_studio.agent import full_content_workflow, root_agent
+from content_creation_studio.cassettes import Cassette, CassettePlayer, current_cassette
+from content_creation_studio.fake_llm import FakeLlm, LatencyDistribution
+from content_creation_studio.templates import content_request_query
+from serving.plugins.cassettes import CassettePlugin
+from serving.plugins.compaction import SessionCompactionPlugin
+from serving.plugins.tracing import TracingPlugin
+from serving.runners import RunnerRegistry, iter_agents
+from serving.sessions import create_session_service
+from serving.tracing import FileSpanExporter
+
+ENTRIES = {"orchestrator": root_agent, "full_workflow": full_content_workflow}
+
+QUERY = content_request_query(
+    "Productivity hacks using AI for remote workers",
+    "Remote professionals and digital nomads",
+    "Conversational and helpful",
+    "AI productivity, remote work, automation tools",
+)
+
+# Metrics where a higher value is better; every other metric is a cost
+HIGHER_IS_BETTER = {"requests_per_second"}
+
+
+class StageTimer(BasePlugin):
+    """Accumulates wall time spent in each agent."""
+
+    def __init__(self):
+        super().__init__(name="stage_timer")
+        self.totals: Dict[str, float] = defaultdict(float)
+        self._starts: Dict[tuple, float] = {}
+
+    @staticmethod
+    def _key(callback_context: CallbackContext) -> tuple:
+        ctx = callback_context._invocation_context
+        return (ctx.invocation_id, ctx.branch or "", callback_context.agent_name)
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        self._starts[self._key(callback_context)] = time.perf_counter()
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        start = self._starts.pop(self._key(callback_context), None)
+        if start is not None:
+            self.totals[agent.name] += time.perf_counter() - start
+        return None
+
+    def reset(self):
+        self.totals.clear()
+        self._starts.clear()
+
+
+class LoopLagProbe:
+    """Measures how late a short periodic sleep wakes up while the benchmark runs."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _fake_models(agent: BaseAgent):
+    for current in iter_agents(agent):
+        model = current.model if isinstance(current, LlmAgent) else None
+        while model is not None and not isinstance(model, FakeLlm):
+            model = getattr(model, "inner", None)
+        if model is not None:
+            yield model
+
+
+def configure_fakes(agent: BaseAgent, loop_iterations: int, latency: str):
+    """Points every FakeLlm in the tree at the requested loop count and latency."""
+    for model in _fake_models(agent):
+        model.loop_iterations = loop_iterations
+        model.latency = latency
+        model._latency = LatencyDistribution(latency)
+
+
+async def run_one(runner, session_service, app_name: str, user_id: str, cassette) -> dict:
+    session = await session_service.create_session(app_name=app_name, user_id=user_id)
+    if cassette is not None:
+        current_cassette.set(CassettePlayer(cassette, time_scale=1.0))
+    start = time.perf_counter()
+    first_event = None
+    completed = False
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session.id,
+        new_message=Content(parts=[Part(text=QUERY)], role="user"),
+    ):
+        if first_event is None:
+            first_event = time.perf_counter() - start
+        if event.is_final_response():
+            completed = True
+    await session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session.id)
+    return {"seconds": time.perf_counter() - start, "first_event": first_event or 0.0, "completed": completed}
+
+
+async def run_level(registry, entry: str, concurrency: int, requests: int, timer: StageTimer, cassette) -> dict:
+    runner = registry.get(entry)
+    app_name = runner.app_name
+    semaphore = asyncio.Semaphore(concurrency)
+    probe = LoopLagProbe()
+    timer.reset()
+
+    async def bounded(i: int):
+        async with semaphore:
+            return await run_one(runner, registry.session_service, app_name, f"bench_user_{i % concurrency}", cassette)
+
+    probe.start()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bounded(i) for i in range(requests)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    await probe.stop()
+
+    ok = [result for result in results if isinstance(result, dict) and result["completed"]]
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        print(f"⚠️  {len(errors)} request(s) failed, first: {errors[0]!r}")
+    latencies = [result["seconds"] for result in ok]
+    return {
+        "requests": requests,
+        "completed": len(ok),
+        "requests_per_second": round(len(ok) / elapsed, 2),
+        "p50_seconds": round(_percentile(latencies, 0.50), 4),
+        "p95_seconds": round(_percentile(latencies, 0.95), 4),
+        "p99_seconds": round(_percentile(latencies, 0.99), 4),
+        "p50_time_to_first_event": round(_percentile([result["first_event"] for result in ok], 0.50), 4),
+        "stage_seconds": {name: round(total / max(1, len(ok)), 4) for name, total in sorted(timer.totals.items())},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "loop_lag_p99_ms": round(_percentile(probe.samples, 0.99) * 1000, 2),
+        "loop_lag_max_ms": round(max(probe.samples, default=0.0) * 1000, 2),
+    }
+
+
+async def run_suite(args) -> dict:
+    cassette = Cassette.load(args.cassette) if args.cassette else None
+    timer = StageTimer()
+    plugins = [SessionCompactionPlugin(), CassettePlugin(), timer]
+    if args.trace:
+        plugins.insert(1, TracingPlugin(FileSpanExporter(args.trace)))
+    registry = RunnerRegistry(create_session_service(), plugins_factory=lambda: plugins)
+    for name in args.entries:
+        registry.register(name, ENTRIES[name])
+
+    results = {}
+    for entry in args.entries:
+        # A cassette fixes the loop count it was recorded with
+        for loops in ([None] if cassette else args.loops):
+            if loops is not None:
+                configure_fakes(ENTRIES[entry], loops, args.latency)
+            for concurrency in args.levels:
+                requests = max(args.min_requests, concurrency * args.requests_per_worker)
+                key = f"{entry}/loops={loops or 'cassette'}/c={concurrency}"
+                result = await run_level(registry, entry, concurrency, requests, timer, cassette)
+                results[key] = result
+                print(f"{key:<40} {result['requests_per_second']:>8} req/s  p50 {result['p50_seconds']:.3f}s  "
+                      f"p99 {result['p99_seconds']:.3f}s  lag p99 {result['loop_lag_p99_ms']}ms")
+    await registry.close()
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "model": "cassette" if cassette else f"fake ({args.latency})",
+            "session_backend": os.environ.get("SESSION_BACKEND", "memory"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_seconds: float = 0.001) -> List[str]:
+    """Lists metrics that got worse by more than `threshold` (a fraction)."""
+    regressions = []
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        for metric, value in result.items():
+            old = before.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or metric in ("requests", "completed"):
+                continue
+            if old <= 0 or (metric.endswith("seconds") and max(old, value) < min_seconds):
+                continue
+            change = (old - value) / old if metric in HIGHER_IS_BETTER else (value - old) / old
+            if change > threshold:
+                regressions.append(f"{key} {metric}: {old} → {value} ({change:+.0%} worse)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--entries", default="orchestrator,full_workflow")
+    parser.add_argument("--levels", default="1,4,16,64,256", help="Concurrency levels")
+    parser.add_argument("--loops", default="1,2,3", help="Quality-loop iterations forced by the fake model")
+    parser.add_argument("--latency", default="lognormal:0.05:0.5", help="Fake model latency distribution")
+    parser.add_argument("--requests-per-worker", type=int, default=2)
+    parser.add_argument("--min-requests", type=int, default=8)
+    parser.add_argument("--cassette", default=None, help="Replay this cassette instead of the fake model")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    parser.add_argument("--trace", default=None, help="Write spans as JSONL (analyze with benchmarks.traces)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    args.entries = args.entries.split(",")
+    args.levels = [int(level) for level in args.levels.split(",")]
+    args.loops = [int(loops) for loops in args.loops.split(",")]
+
+    if os.environ["MODEL_BACKEND"] != "fake" and not args.cassette:
+        sys.exit("❌ Set MODEL_BACKEND=fake or pass --cassette; this benchmark never calls a real model")
+
+    results = asyncio.run(run_suite(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) regressed beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
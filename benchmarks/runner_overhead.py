@@ -0,0 +1,99 @@
+"""
+Per-request runner overhead: build-per-request vs. the startup RunnerRegistry.
+
+Measures the work api_server.py used to repeat on every request (a new Runner,
+a new LoggingPlugin, and a fresh model client per model call) against reusing
+the registry's runners and pinned model instances. No network calls are made.
+
+Usage:
+    python -m benchmarks.runner_overhead --iterations 200
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder-key")
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm
+from google.adk.models.registry import LLMRegistry
+from google.adk.plugins.logging_plugin import LoggingPlugin
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from content_creation_studio.agent import root_agent
+from serving.runners import RunnerRegistry, iter_agents
+
+# Model calls in one full content package (orchestrator, coordinator, 8 stage
+# agents, up to 2 quality-loop calls per iteration).
+MODEL_CALLS_PER_REQUEST = 14
+
+
+def _summarize(samples):
+    samples = sorted(samples)
+    return {
+        "mean_us": statistics.mean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p95_us": samples[int(len(samples) * 0.95) - 1] * 1e6,
+    }
+
+
+def per_request_setup(session_service, model_name):
+    """What each request paid before the registry existed.
+
+    Agents named their model then, and ADK resolved the name to a new model
+    and API client on every call; agents now hold model instances, so that
+    resolution is done here by name.
+    """
+    start = time.perf_counter()
+    Runner(
+        agent=root_agent,
+        session_service=session_service,
+        app_name=root_agent.name,
+        plugins=[LoggingPlugin()],
+    )
+    for _ in range(MODEL_CALLS_PER_REQUEST):
+        _ = LLMRegistry.new_llm(model_name).api_client
+    return time.perf_counter() - start
+
+
+def registry_setup(registry, model_name):
+    """What each request pays with runners and model clients built at startup."""
+    start = time.perf_counter()
+    registry.get("orchestrator")
+    for _ in range(MODEL_CALLS_PER_REQUEST):
+        _ = registry.models[model_name].api_client
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request runner setup overhead")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    # Agents hold shared (pooled) model instances by default, or a plain name with HTTP_POOL=0
+    model_name = next(
+        a.model.model if isinstance(a.model, BaseLlm) else a.model
+        for a in iter_agents(root_agent)
+        if isinstance(a, LlmAgent) and a.model
+    )
+    session_service = InMemorySessionService()
+
+    before = [per_request_setup(session_service, model_name) for _ in range(args.iterations)]
+
+    registry = RunnerRegistry(session_service, plugins_factory=lambda: [LoggingPlugin()])
+    registry.register("orchestrator", root_agent)
+    after = [registry_setup(registry, model_name) for _ in range(args.iterations)]
+
+    print(f"📊 Per-request setup overhead ({args.iterations} iterations, {MODEL_CALLS_PER_REQUEST} model calls/request)")
+    for label, samples in (("per-request Runner", before), ("RunnerRegistry", after)):
+        stats = _summarize(samples)
+        print(f"   {label:<20} mean {stats['mean_us']:>10.1f}µs  p50 {stats['p50_us']:>10.1f}µs  p95 {stats['p95_us']:>10.1f}µs")
+    speedup = statistics.mean(before) / max(statistics.mean(after), 1e-9)
+    print(f"   Speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Session acquisition latency with and without the remote session pool.
+
+Runs serving.session_pool.RemoteSessionPool against the in-process
+FakeAgentEngine with a simulated session round-trip, and reports how long
+requests wait for a session (the part of time-to-first-byte the pool
+removes):
+
+- steady: requests arrive one every --interval seconds
+- burst: --burst requests arrive at once, more than the pool holds, so
+  the later ones fall back to creating sessions on demand
+
+Each scenario runs with the pool disabled (size 0, every session created
+on demand) and with --size pre-created sessions per user.
+
+Usage:
+    python -m benchmarks.session_pool
+    python -m benchmarks.session_pool --latency 0.4 --size 8 --burst 20 --json pool.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+from serving.fake_agent_engine import FakeAgentEngine
+from serving.session_pool import RemoteSessionPool
+
+USER_ID = "bench_user"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def timed_acquire(pool: RemoteSessionPool) -> float:
+    start = time.perf_counter()
+    session_id = await pool.acquire(USER_ID)
+    elapsed = time.perf_counter() - start
+    pool.release(USER_ID, session_id)
+    return elapsed
+
+
+async def scenario(engine: FakeAgentEngine, size: int, requests: int, interval: float, burst: int) -> dict:
+    pool = RemoteSessionPool(engine, size=size)
+    pool.warm([USER_ID])
+    # Startup: give the pool one round-trip (plus margin) to fill
+    await asyncio.sleep(engine.session_latency * 2 + 0.05)
+
+    def summary(waits: List[float], hits: int) -> dict:
+        return {
+            "p50_ms": round(statistics.median(waits) * 1000, 1),
+            "p95_ms": round(percentile(waits, 0.95) * 1000, 1),
+            "max_ms": round(max(waits) * 1000, 1),
+            "hit_rate": round(hits / len(waits), 3),
+        }
+
+    steady = []
+    for _ in range(requests):
+        steady.append(await timed_acquire(pool))
+        await asyncio.sleep(interval)
+    steady_hits = pool.hits
+    burst_waits = await asyncio.gather(*(timed_acquire(pool) for _ in range(burst)))
+    results = {"steady": summary(steady, steady_hits), "burst": summary(list(burst_waits), pool.hits - steady_hits)}
+    await pool.close()
+    results["pool"] = pool.snapshot()
+    return results
+
+
+async def run(latency: float, size: int, requests: int, interval: float, burst: int) -> dict:
+    engine = FakeAgentEngine(session_latency=latency)
+    return {
+        "session_latency_ms": latency * 1000,
+        "on_demand": await scenario(engine, 0, requests, interval, burst),
+        "pooled": await scenario(engine, size, requests, interval, burst),
+    }
+
+
+def print_report(results: dict):
+    print(f"Simulated session round-trip: {results['session_latency_ms']:.0f} ms\n")
+    print(f"{'mode':<12}{'scenario':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'hit rate':>10}")
+    for mode in ("on_demand", "pooled"):
+        for name in ("steady", "burst"):
+            waits = results[mode][name]
+            print(
+                f"{mode:<12}{name:<10}{waits['p50_ms']:>10}{waits['p95_ms']:>10}{waits['max_ms']:>10}"
+                f"{waits['hit_rate']:>10}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remote session pool latency comparison")
+    parser.add_argument("--latency", type=float, default=0.25, help="Simulated session round-trip, seconds")
+    parser.add_argument("--size", type=int, default=4, help="Pooled sessions per user")
+    parser.add_argument("--requests", type=int, default=20, help="Requests in the steady scenario")
+    parser.add_argument("--interval", type=float, default=0.3, help="Seconds between steady requests")
+    parser.add_argument("--burst", type=int, default=12, help="Concurrent requests in the burst scenario")
+    parser.add_argument("--json", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.latency, args.size, args.requests, args.interval, args.burst))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
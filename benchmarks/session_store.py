@@ -0,0 +1,106 @@
+"""
+Session store throughput: concurrent event appends and session reads.
+
+Usage:
+    python -m benchmarks.session_store --backend sqlite --concurrency 64
+    python -m benchmarks.session_store --backend sqlite --processes 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from google.adk.events import Event, EventActions
+from google.genai.types import Content, Part
+
+from serving.sessions import BoundedSessionService
+from serving.sqlite_sessions import SqliteSessionService
+
+APP_NAME = "benchmark_app"
+PAYLOAD = "Remote work has transformed how we think about productivity. " * 40
+
+
+def make_service(backend: str, db_path: str):
+    if backend == "sqlite":
+        return SqliteSessionService(db_path=db_path)
+    return BoundedSessionService()
+
+
+async def session_worker(service, worker_id: int, events_per_session: int, reads: int):
+    user_id = f"user_{os.getpid()}_{worker_id}"
+    session = await service.create_session(app_name=APP_NAME, user_id=user_id)
+    append_start = time.perf_counter()
+    for i in range(events_per_session):
+        event = Event(
+            invocation_id="bench",
+            author="content_drafter_agent",
+            content=Content(role="model", parts=[Part(text=PAYLOAD)]),
+            actions=EventActions(state_delta={"current_content": PAYLOAD, "iteration": i}),
+        )
+        await service.append_event(session, event)
+    append_seconds = time.perf_counter() - append_start
+
+    read_start = time.perf_counter()
+    for _ in range(reads):
+        await service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+    read_seconds = time.perf_counter() - read_start
+    return append_seconds, read_seconds
+
+
+async def run(backend: str, db_path: str, concurrency: int, events_per_session: int, reads: int):
+    service = make_service(backend, db_path)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        session_worker(service, i, events_per_session, reads) for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    return {
+        "appends": concurrency * events_per_session,
+        "reads": concurrency * reads,
+        "seconds": elapsed,
+        "stats": await service.stats(),
+    }
+
+
+def _process_main(args):
+    return asyncio.run(run(*args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session store appends and reads")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--events", type=int, default=20, help="Events appended per session")
+    parser.add_argument("--reads", type=int, default=10, help="Session reads per worker")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes sharing the store (sqlite only)")
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_sessions.db")
+    run_args = (args.backend, db_path, args.concurrency, args.events, args.reads)
+
+    start = time.perf_counter()
+    if args.processes > 1:
+        if args.backend != "sqlite":
+            parser.error("--processes > 1 requires --backend sqlite")
+        # Create the schema once before the workers race for it
+        SqliteSessionService(db_path=db_path).close()
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(_process_main, [run_args] * args.processes)
+    else:
+        results = [asyncio.run(run(*run_args))]
+    wall = time.perf_counter() - start
+
+    appends = sum(r["appends"] for r in results)
+    reads = sum(r["reads"] for r in results)
+    print(f"📊 Session store: {args.backend}, {args.processes} process(es) x {args.concurrency} concurrent sessions")
+    print(f"   Appends: {appends} in {wall:.2f}s → {appends / wall:,.0f} appends/s")
+    print(f"   Reads:   {reads} → {reads / wall:,.0f} reads/s (mixed with appends)")
+    print(f"   Store:   {results[-1]['stats']}")
+
+
+if __name__ == "__main__":
+    main()
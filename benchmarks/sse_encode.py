@@ -0,0 +1,181 @@
+"""
+SSE streaming throughput in events per second per core.
+
+Streams a synthetic event sequence shaped like the servers' output (status,
+progress events with 200-char previews, streamed text chunks, a large
+`complete` payload with usage) through Starlette's StreamingResponse. The
+ASGI `send` writes each body chunk HTTP/1.1-chunked to a loopback socket,
+as uvicorn does, and a thread drains the other end. Reports the server
+thread's CPU time per event, so the results are per core regardless of how
+busy the machine is:
+
+- baseline: `f"data: {json.dumps(...)}\\n\\n"` per event, one write each, as the servers used to
+- sse_no_coalescing: serving.sse with a zero flush window
+- sse: serving.sse with the flush window (SSE_FLUSH_MS by default)
+- sse_gzip: the same, gzip-compressed
+
+The producer yields to the event loop between events but never sleeps, so
+every event that isn't urgent lands in the flush window; real streams,
+with seconds between stages, coalesce less.
+
+Usage:
+    python -m benchmarks.sse_encode
+    python -m benchmarks.sse_encode --streams 200 --chunks 40 --json sse.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from typing import Callable, List
+
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
+
+from serving import sse
+from serving.sse import GZIP, sse_response
+
+_WORDS = "remote work teams productivity automation tools focus meetings workflow the a of and to in".split()
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0", "spec_version": "2.4"},
+    "http_version": "1.1",
+    "method": "POST",
+    "path": "/api/create-content",
+    "headers": [(b"accept-encoding", b"gzip, deflate")],
+}
+
+
+def make_events(chunks: int, seed: int = 0) -> List[dict]:
+    """One stream's payloads."""
+    rng = random.Random(seed)
+
+    def text(words: int) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+    session_id = "session-%08d" % seed
+    events = [{"type": "status", "message": "Starting content creation workflow...", "session_id": session_id}]
+    for i in range(chunks):
+        events.append({"type": "event", "event_id": i + 1, "author": "blog_writer_agent", "content_preview": text(40)[:200]})
+        events.append({"type": "chunk", "content": text(60), "session_id": session_id})
+    usage = {
+        "request_id": "abc123", "user_id": "web_user_001", "downgraded_to": None, "calls": 12,
+        "prompt_tokens": 48000, "output_tokens": 6000, "cached_tokens": 0, "cost_usd": 0.0294,
+        "by_stage": {f"stage_{i}": {"calls": 2, "prompt_tokens": 8000, "output_tokens": 1000} for i in range(6)},
+    }
+    events.append({"type": "complete", "content": text(1500), "session_id": session_id, "usage": usage})
+    return events
+
+
+async def payloads(events: List[dict]):
+    for event in events:
+        # Fresh dicts, as the servers build them, one per loop iteration
+        await asyncio.sleep(0)
+        yield dict(event)
+
+
+def baseline(events: List[dict]) -> StreamingResponse:
+    async def generate():
+        async for event in payloads(events):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def streamed(flush_seconds: float, compression: str = "off") -> Callable[[List[dict]], StreamingResponse]:
+    return lambda events: sse_response(payloads(events), Request(SCOPE), compression, flush_seconds)
+
+
+def measure(respond: Callable[[List[dict]], StreamingResponse], streams: List[List[dict]]) -> dict:
+    writes = size = 0
+    server, client = socket.socketpair()
+
+    def drain():
+        while client.recv(1 << 16):
+            pass
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def serve_all():
+        nonlocal writes, size
+        _, writer = await asyncio.open_connection(sock=server)
+
+        async def send(message):
+            nonlocal writes, size
+            body = message.get("body")
+            if body:
+                writes += 1
+                size += len(body)
+                writer.write(b"%x\r\n%s\r\n" % (len(body), body))
+                await writer.drain()
+
+        start = time.thread_time()
+        for events in streams:
+            await respond(events)(SCOPE, receive, send)
+        cpu = time.thread_time() - start
+        writer.close()
+        return cpu
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    cpu = asyncio.run(serve_all())
+    reader.join()
+    client.close()
+    events = sum(len(stream) for stream in streams)
+    return {
+        "events_per_core_second": round(events / cpu) if cpu else None,
+        "us_per_event": round(cpu / events * 1e6, 2),
+        "writes_per_stream": round(writes / len(streams), 1),
+        "bytes_per_stream": round(size / len(streams)),
+    }
+
+
+def run(streams: int, chunks: int, flush_ms: float) -> dict:
+    data = [make_events(chunks, seed) for seed in range(streams)]
+    return {
+        "variants": {
+            "baseline": measure(baseline, data),
+            "sse_no_coalescing": measure(streamed(0), data),
+            "sse": measure(streamed(flush_ms / 1000), data),
+            "sse_gzip": measure(streamed(flush_ms / 1000, GZIP), data),
+        },
+        "json_backend": "orjson" if sse.orjson is not None else "json",
+        "events_per_stream": len(data[0]),
+    }
+
+
+def print_report(results: dict):
+    print(f"JSON backend: {results['json_backend']}, {results['events_per_stream']} events per stream\n")
+    print(f"{'variant':<20}{'events/s/core':>16}{'µs/event':>12}{'writes/stream':>16}{'bytes/stream':>15}")
+    for name, result in results["variants"].items():
+        print(
+            f"{name:<20}{result['events_per_core_second'] or 0:>16,}{result['us_per_event']:>12}"
+            f"{result['writes_per_stream']:>16}{result['bytes_per_stream']:>15,}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE streaming throughput")
+    parser.add_argument("--streams", type=int, default=200, help="Streams to send")
+    parser.add_argument("--chunks", type=int, default=30, help="Progress events and text chunks per stream")
+    parser.add_argument("--flush-ms", type=float, default=25, help="Coalescing window")
+    parser.add_argument("--json", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.streams, args.chunks, args.flush_ms)
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
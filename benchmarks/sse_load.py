@@ -0,0 +1,370 @@
+"""
+SSE load test for /api/create-content and /api/analyze-text on either API server.
+
+Spawns api_server.py (local agents) or backend/api_server.py (Agent Engine
+proxy) with the fake model and the fake Agent Engine, or targets a server
+that is already running. A ramp profile holds N concurrent SSE streams for
+a while at each step. Each client opens a stream, reads it to the end and
+opens the next. For every step the harness reports:
+
+- streams completed, errored and dropped (ended without a complete message)
+- time to first event and gaps between events
+- per-event delivery delay: how much later each event arrives than the same
+  event at the first step's concurrency
+- server CPU and RSS, and RSS per open stream (spawned servers, or --pid)
+
+analyze-text is then driven open-loop at a fixed QPS. Results are written as
+JSON and as a standalone HTML report.
+
+Usage:
+    python -m benchmarks.sse_load --spawn local --profile 1x10,16x15,64x20,256x20
+    python -m benchmarks.sse_load --spawn backend --latency lognormal:0.05:0.5 --analyze-qps 200
+    python -m benchmarks.sse_load --server http://localhost:8000 --pid 12345 --report-dir reports/
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CONTENT_REQUEST = {
+    "topic": "Productivity hacks using AI for remote workers",
+    "target_audience": "Remote professionals and digital nomads",
+    "tone": "Conversational and helpful",
+    "keywords": "AI productivity, remote work, automation tools",
+}
+ANALYZE_REQUEST = {"text": "Remote work has transformed how we think about productivity. With AI tools, "
+                           "professionals can automate repetitive tasks and focus on creative work."}
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def parse_profile(profile: str) -> List[tuple]:
+    """"1x10,16x15" → [(1 stream, 10 s), (16 streams, 15 s)]."""
+    steps = []
+    for step in profile.split(","):
+        streams, seconds = step.lower().split("x")
+        steps.append((int(streams), float(seconds)))
+    return steps
+
+
+class ProcessSampler:
+    """CPU time and RSS of a server process, read from /proc (Linux)."""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self._ticks = os.sysconf("SC_CLK_TCK") if pid else 1
+
+    def cpu_seconds(self) -> Optional[float]:
+        if not self.pid:
+            return None
+        fields = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self._ticks
+
+    def rss_mb(self) -> Optional[float]:
+        if not self.pid:
+            return None
+        for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+        return None
+
+
+class StepStats:
+    def __init__(self):
+        self.completed = 0
+        self.errored = 0
+        self.dropped = 0
+        self.first_event: List[float] = []
+        self.gaps: List[float] = []
+        self.offsets: List[List[float]] = []
+        self.open_streams = 0
+        self.peak_open_streams = 0
+        self.peak_rss_mb: Optional[float] = None
+
+
+async def one_stream(client: httpx.AsyncClient, url: str, stats: StepStats):
+    start = time.perf_counter()
+    offsets = []
+    outcome = None
+    stats.open_streams += 1
+    stats.peak_open_streams = max(stats.peak_open_streams, stats.open_streams)
+    try:
+        async with client.stream("POST", f"{url}/api/create-content", json=CONTENT_REQUEST) as response:
+            if response.status_code != 200:
+                stats.errored += 1
+                return
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                offsets.append(time.perf_counter() - start)
+                kind = json.loads(line[len("data: "):]).get("type")
+                if kind in ("complete", "error"):
+                    outcome = kind
+    except (httpx.HTTPError, json.JSONDecodeError):
+        stats.errored += 1
+        return
+    finally:
+        stats.open_streams -= 1
+
+    if outcome == "complete":
+        stats.completed += 1
+    elif outcome == "error":
+        stats.errored += 1
+    else:
+        stats.dropped += 1
+    if offsets:
+        stats.first_event.append(offsets[0])
+        stats.gaps.extend(later - earlier for earlier, later in zip(offsets, offsets[1:]))
+        stats.offsets.append(offsets)
+
+
+async def run_step(client, url: str, streams: int, seconds: float, sampler: ProcessSampler) -> StepStats:
+    stats = StepStats()
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop():
+        while time.perf_counter() < deadline:
+            await one_stream(client, url, stats)
+
+    async def sample_rss():
+        while True:
+            rss = sampler.rss_mb()
+            if rss is not None:
+                stats.peak_rss_mb = max(stats.peak_rss_mb or 0.0, rss)
+            await asyncio.sleep(0.25)
+
+    rss_task = asyncio.create_task(sample_rss())
+    await asyncio.gather(*(client_loop() for _ in range(streams)))
+    rss_task.cancel()
+    return stats
+
+
+def _median_offsets(offsets: List[List[float]]) -> List[float]:
+    length = min((len(run) for run in offsets), default=0)
+    return [_percentile([run[i] for run in offsets], 0.5) for i in range(length)]
+
+
+async def run_streams(url: str, profile: List[tuple], sampler: ProcessSampler) -> List[dict]:
+    results = []
+    baseline_offsets: Optional[List[float]] = None
+    idle_rss = sampler.rss_mb()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(600.0), limits=limits) as client:
+        for streams, seconds in profile:
+            cpu_before, wall_before = sampler.cpu_seconds(), time.perf_counter()
+            stats = await run_step(client, url, streams, seconds, sampler)
+            wall = time.perf_counter() - wall_before
+            cpu_after = sampler.cpu_seconds()
+
+            medians = _median_offsets(stats.offsets)
+            if baseline_offsets is None:
+                baseline_offsets = medians
+            delays = [
+                run[i] - baseline_offsets[i]
+                for run in stats.offsets
+                for i in range(min(len(run), len(baseline_offsets)))
+            ]
+            rss_per_stream = None
+            if stats.peak_rss_mb is not None and idle_rss is not None and stats.peak_open_streams:
+                rss_per_stream = round(max(0.0, stats.peak_rss_mb - idle_rss) * 1024 / stats.peak_open_streams, 1)
+            result = {
+                "streams": streams,
+                "seconds": round(wall, 1),
+                "completed": stats.completed,
+                "errored": stats.errored,
+                "dropped": stats.dropped,
+                "streams_per_second": round(stats.completed / wall, 2),
+                "ttfe_p50": round(_percentile(stats.first_event, 0.5), 4),
+                "ttfe_p99": round(_percentile(stats.first_event, 0.99), 4),
+                "event_gap_p50": round(_percentile(stats.gaps, 0.5), 4),
+                "event_gap_p99": round(_percentile(stats.gaps, 0.99), 4),
+                "event_delay_p50": round(_percentile(delays, 0.5), 4),
+                "event_delay_p99": round(_percentile(delays, 0.99), 4),
+                "server_cpu_percent": round((cpu_after - cpu_before) / wall * 100, 1) if cpu_before is not None else None,
+                "server_peak_rss_mb": round(stats.peak_rss_mb, 1) if stats.peak_rss_mb else None,
+                "server_rss_kb_per_stream": rss_per_stream,
+            }
+            results.append(result)
+            print(f"🌊 {streams:>4} streams: {result['completed']} ok, {result['errored']} errored, "
+                  f"{result['dropped']} dropped, TTFE p99 {result['ttfe_p99']}s, "
+                  f"event delay p99 {result['event_delay_p99']}s, CPU {result['server_cpu_percent']}%")
+    return results
+
+
+async def run_analyze(url: str, qps: float, seconds: float) -> dict:
+    """Open-loop load: requests start on schedule whether or not earlier ones finished."""
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(client):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"{url}/api/analyze-text", json=ANALYZE_REQUEST)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        except httpx.HTTPError:
+            errors += 1
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(120.0), limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        total = int(qps * seconds)
+        for i in range(total):
+            delay = start + i / qps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(client)))
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - start
+    result = {
+        "target_qps": qps,
+        "requests": total,
+        "achieved_qps": round(len(latencies) / wall, 1),
+        "errors": errors,
+        "latency_p50": round(_percentile(latencies, 0.5), 4),
+        "latency_p99": round(_percentile(latencies, 0.99), 4),
+    }
+    print(f"🔬 analyze-text at {qps} QPS: {result['achieved_qps']} achieved, p99 {result['latency_p99']}s, {errors} errors")
+    return result
+
+
+def spawn_server(kind: str, port: int, latency: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        MODEL_BACKEND="fake",
+        FAKE_LATENCY=latency,
+        AGENT_ENGINE_BACKEND="fake",
+        WARMUP_PRECONNECT="0",
+        GOOGLE_API_KEY=os.environ.get("GOOGLE_API_KEY", "load-test-placeholder-key"),
+    )
+    app_dir = ROOT / "backend" if kind == "backend" else ROOT
+    command = [sys.executable, "-m", "uvicorn", "api_server:app", "--app-dir", str(app_dir),
+               "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_until_up(url: str, timeout: float = 60.0):
+    async with httpx.AsyncClient() as client:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(f"{url}/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+
+def write_html(report: dict, path: Path):
+    def table(rows: List[dict]) -> str:
+        if not rows:
+            return "<p>No data.</p>"
+        headers = list(rows[0])
+        head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str(row[h]))}</td>" for h in headers) + "</tr>" for row in rows
+        )
+        return f"<table><tr>{head}</tr>{body}</table>"
+
+    peak = max((row["event_delay_p99"] for row in report["streams"]), default=0) or 1
+    bars = "".join(
+        f"<div class='bar'><span>{row['streams']} streams</span>"
+        f"<div style='width:{row['event_delay_p99'] / peak * 100:.0f}%'></div>"
+        f"<em>{row['event_delay_p99']}s</em></div>"
+        for row in report["streams"]
+    )
+    path.write_text(f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>SSE load test</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 2rem; }}
+table {{ border-collapse: collapse; margin-bottom: 2rem; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+.bar {{ display: flex; align-items: center; gap: 8px; margin: 4px 0; }}
+.bar span {{ width: 110px; }}
+.bar div {{ background: #4a7dd4; height: 14px; }}
+</style></head><body>
+<h1>SSE load test</h1>
+<pre>{html.escape(json.dumps(report["meta"], indent=2))}</pre>
+<h2>create-content streams</h2>
+{table(report["streams"])}
+<h2>Per-event delivery delay (p99) by concurrency</h2>
+{bars}
+<h2>analyze-text</h2>
+{table([report["analyze"]] if report["analyze"] else [])}
+</body></html>
+""")
+
+
+async def main_async(args) -> dict:
+    process = None
+    url = args.server.rstrip("/") if args.server else f"http://127.0.0.1:{args.port}"
+    pid = args.pid
+    if args.spawn:
+        process = spawn_server(args.spawn, args.port, args.latency)
+        pid = process.pid
+    try:
+        await wait_until_up(url)
+        sampler = ProcessSampler(pid)
+        streams = await run_streams(url, parse_profile(args.profile), sampler)
+        analyze = await run_analyze(url, args.analyze_qps, args.analyze_seconds) if args.analyze_qps > 0 else None
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+    return {
+        "meta": {
+            "target": args.spawn or url,
+            "profile": args.profile,
+            "fake_latency": args.latency if args.spawn else None,
+            "timestamp": time.time(),
+        },
+        "streams": streams,
+        "analyze": analyze,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE load test for the API servers")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--spawn", choices=["local", "backend"], help="Start this server with fake model and engine")
+    target.add_argument("--server", help="Base URL of a running server")
+    parser.add_argument("--pid", type=int, default=None, help="Server PID for CPU/RSS sampling with --server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", default="1x10,16x15,64x20,256x20", help="Ramp steps as <streams>x<seconds>")
+    parser.add_argument("--latency", default="lognormal:0.05:0.5", help="Fake model latency for spawned servers")
+    parser.add_argument("--analyze-qps", type=float, default=100)
+    parser.add_argument("--analyze-seconds", type=float, default=10)
+    parser.add_argument("--report-dir", default=".", help="Where sse_load.json and sse_load.html are written")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    report_dir = Path(args.report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    (report_dir / "sse_load.json").write_text(json.dumps(report, indent=2))
+    write_html(report, report_dir / "sse_load.html")
+    print(f"📄 Report written to {report_dir / 'sse_load.json'} and {report_dir / 'sse_load.html'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Microbenchmarks for the text functions in content_creation_studio/tools.py.
+
+Each function runs over representative corpora (tweet, 600-word draft,
+5k-word long-form) and pathological inputs (no periods, one huge token,
+only periods), reporting time per call, peak bytes allocated during a call
+and memory blocks still held after it. A scaling pass runs the text functions over
+growing inputs and fits the growth exponent, flagging anything that
+grows faster than linear so a quadratic regression can't slip in quietly.
+
+The functions are timed as the agents call them, including the tool
+instrumentation at the TOOL_INSTRUMENTATION level in effect (run with
+TOOL_INSTRUMENTATION=off for the bare functions).
+
+Usage:
+    python -m benchmarks.tools_micro
+    python -m benchmarks.tools_micro --json tools.json --max-words 200000
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from content_creation_studio.tools import (
+    calculate_content_quality_score,
+    calculate_readability_score,
+    count_syllables,
+    count_words,
+    generate_hashtags,
+)
+
+# Growth exponent above which a function is reported as superlinear
+SUPERLINEAR_EXPONENT = 1.3
+
+_VOCABULARY = (
+    "remote work teams productivity automation tools artificial intelligence "
+    "schedule focus meetings asynchronous communication workflow documentation "
+    "collaboration timezone calendar deep work notifications boundaries habits "
+    "the a of and to in is for with on that by this be are from"
+).split()
+
+
+def make_text(words: int, sentence_length: int = 15, seed: int = 0) -> str:
+    """Deterministic prose-like text of `words` words."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(words):
+        word = rng.choice(_VOCABULARY)
+        out.append(word.capitalize() if i % sentence_length == 0 else word)
+        if i % sentence_length == sentence_length - 1:
+            out[-1] += "."
+    return " ".join(out)
+
+
+def corpora() -> Dict[str, str]:
+    return {
+        "tweet": make_text(35),
+        "draft_600w": make_text(600),
+        "longform_5kw": make_text(5000),
+        "no_periods_5kw": make_text(5000, sentence_length=10 ** 9),
+        "huge_token_1mb": "a" * 1_000_000,
+        "only_periods_100k": "." * 100_000,
+        "empty": "",
+    }
+
+
+TEXT_FUNCTIONS: Dict[str, Callable[[str], object]] = {
+    "count_words": count_words,
+    "calculate_readability_score": calculate_readability_score,
+    "generate_hashtags": lambda text: generate_hashtags(text, 5),
+}
+
+
+def time_per_call(fn: Callable[[], object], min_seconds: float = 0.2) -> float:
+    """Seconds per call, from enough repetitions to run at least `min_seconds`."""
+    fn()
+    repetitions = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or repetitions >= 1_000_000:
+            return elapsed / repetitions
+        repetitions = max(repetitions * 2, int(repetitions * min_seconds / max(elapsed, 1e-9)))
+
+
+def allocations(fn: Callable[[], object]) -> Dict[str, int]:
+    """Peak bytes allocated during one call and blocks it left allocated."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return {"peak_bytes": peak - baseline, "net_blocks": blocks}
+
+
+def measure(fn: Callable[[], object], min_seconds: float) -> dict:
+    seconds = time_per_call(fn, min_seconds)
+    return {"ns_per_op": round(seconds * 1e9), **allocations(fn)}
+
+
+def scaling(fn: Callable[[str], object], sizes: List[int], min_seconds: float) -> dict:
+    """Time per call at each input size and the fitted growth exponent."""
+    timings = {size: time_per_call(lambda text=make_text(size): fn(text), min_seconds) for size in sizes}
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(timings[size]) for size in sizes]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    exponent = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+    return {
+        "ns_per_op": {str(size): round(seconds * 1e9) for size, seconds in timings.items()},
+        "exponent": round(exponent, 2),
+        "superlinear": exponent > SUPERLINEAR_EXPONENT,
+    }
+
+
+def run(min_seconds: float, max_words: int) -> dict:
+    results = {"corpora": {}, "scaling": {}}
+    texts = corpora()
+    sizes = [size for size in (100, 1_000, 10_000, 100_000, 1_000_000) if size <= max_words]
+
+    for name, fn in TEXT_FUNCTIONS.items():
+        results["corpora"][name] = {
+            corpus: measure(lambda fn=fn, text=text: fn(text), min_seconds) for corpus, text in texts.items()
+        }
+        results["scaling"][name] = scaling(fn, sizes, min_seconds)
+
+    words = {"short": "cat", "typical": "productivity", "long": "supercalifragilisticexpialidocious",
+             "huge_token_1mb": texts["huge_token_1mb"]}
+    results["corpora"]["count_syllables"] = {
+        name: measure(lambda word=word: count_syllables(word), min_seconds) for name, word in words.items()
+    }
+    results["corpora"]["calculate_content_quality_score"] = {
+        "typical": measure(lambda: calculate_content_quality_score(850, 62.5, True, True), min_seconds)
+    }
+    return results
+
+
+def print_report(results: dict):
+    print(f"{'function':<34}{'input':<20}{'ns/op':>14}{'peak bytes':>14}{'net blocks':>12}")
+    for name, by_corpus in results["corpora"].items():
+        for corpus, result in by_corpus.items():
+            print(f"{name:<34}{corpus:<20}{result['ns_per_op']:>14,}{result['peak_bytes']:>14,}{result['net_blocks']:>12,}")
+    print()
+    for name, result in results["scaling"].items():
+        flag = "⚠️  superlinear" if result["superlinear"] else "✅ linear"
+        points = ", ".join(f"{size}w {ns / 1e3:,.0f}µs" for size, ns in result["ns_per_op"].items())
+        print(f"{name:<34}exponent {result['exponent']:<5} {flag}   ({points})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for tools.py")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Minimum timing window per measurement")
+    parser.add_argument("--max-words", type=int, default=100_000, help="Largest input in the scaling pass")
+    parser.add_argument("--json", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.min_seconds, args.max_words)
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Timeline, critical path and what-if analysis of recorded traces.
+
+Reads span files written by the tracing plugin (TRACE_FILE=..., JSONL or
+OTLP/JSON) and, for the selected trace, prints the span timeline and the
+critical path through full_content_workflow: the chain of spans that
+determined its end-to-end latency. Across all traces it reports how well
+parallel_content_creation kept its branches busy and estimates the
+workflow latency if a stage were cached (took no time) or had its
+sub-agents run in parallel, as medians over the traces.
+
+Usage:
+    TRACE_FILE=traces/spans-{pid}.jsonl uvicorn api_server:app
+    python -m benchmarks.traces traces/spans-*.jsonl
+    python -m benchmarks.traces traces.jsonl --trace latest --no-timeline
+"""
+
+import argparse
+import statistics
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from serving.tracing import Span, load_spans
+
+# Spans ending this close to a successor's start are treated as sequential
+EPSILON = 0.002
+
+# Stages whose sub-agents can't be reordered: parallel already, or dependent loop iterations
+NOT_PARALLELIZABLE = {"IsolatedParallelAgent", "ParallelAgent", "LoopAgent"}
+
+
+class Trace:
+    def __init__(self, spans: List[Span]):
+        self.spans = spans
+        self.children: Dict[Optional[str], List[Span]] = defaultdict(list)
+        for span in spans:
+            self.children[span.parent_id].append(span)
+        for kids in self.children.values():
+            kids.sort(key=lambda span: span.start)
+        ids = {span.span_id for span in spans}
+        self.roots = [span for span in spans if span.parent_id not in ids]
+        self.start = min(span.start for span in spans)
+
+    def find(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+    def critical_path(self, span: Span) -> List[Span]:
+        """Leaf spans that bounded `span`'s duration, in time order.
+
+        Walks back from the span's end: the child that finished last is on
+        the path, then the child that finished last before it started, and
+        so on, recursing into each.
+        """
+        kids = self.children.get(span.span_id, [])
+        if not kids:
+            return [span]
+        path: List[Span] = []
+        cursor = span.end
+        while True:
+            candidates = [kid for kid in kids if kid.end is not None and kid.end <= cursor + EPSILON]
+            if not candidates:
+                break
+            last = max(candidates, key=lambda kid: kid.end)
+            path = self.critical_path(last) + path
+            cursor = last.start
+            kids = [kid for kid in candidates if kid is not last]
+        return path
+
+
+def group_traces(spans: List[Span]) -> Dict[str, Trace]:
+    by_trace: Dict[str, List[Span]] = defaultdict(list)
+    for span in spans:
+        by_trace[span.trace_id].append(span)
+    return {trace_id: Trace(trace_spans) for trace_id, trace_spans in by_trace.items()}
+
+
+def _label(span: Span) -> str:
+    label = span.name
+    if "loop_iteration" in span.attributes and span.kind == "agent":
+        label += f" #{span.attributes['loop_iteration']}"
+    if span.attributes.get("incomplete"):
+        label += " (incomplete)"
+    if span.attributes.get("error"):
+        label += f" ❌ {span.attributes['error']}"
+    return label
+
+
+def print_timeline(trace: Trace, width: int = 40):
+    total = max(span.end or span.start for span in trace.spans) - trace.start or 1e-9
+
+    def walk(span: Span, depth: int):
+        offset = span.start - trace.start
+        begin = int(offset / total * width)
+        length = max(1, int(span.duration / total * width))
+        bar = " " * begin + "█" * min(length, width - begin)
+        print(f"{offset:>8.3f}s {span.duration:>8.3f}s  {bar:<{width}}  {'  ' * depth}{_label(span)}")
+        for child in trace.children.get(span.span_id, []):
+            walk(child, depth + 1)
+
+    print(f"{'start':>9} {'duration':>9}  {'':<{width}}  span")
+    for root in trace.roots:
+        walk(root, 0)
+
+
+def stage_of(trace: Trace, span: Span, workflow: Span) -> Optional[Span]:
+    """The workflow's direct child that contains `span`."""
+    by_id = {s.span_id: s for s in trace.spans}
+    current = span
+    while current is not None and current.parent_id != workflow.span_id:
+        current = by_id.get(current.parent_id)
+    return current
+
+
+def print_critical_path(trace: Trace, workflow: Span):
+    path = trace.critical_path(workflow)
+    covered = sum(span.duration for span in path)
+    print(f"\n🎯 Critical path through {workflow.name} ({workflow.duration:.3f}s, "
+          f"{covered / max(workflow.duration, 1e-9):.0%} in spans below, rest is orchestration overhead)")
+    per_stage: Dict[str, float] = defaultdict(float)
+    for span in path:
+        stage = stage_of(trace, span, workflow)
+        per_stage[_label(stage) if stage else "?"] += span.duration
+        print(f"   {span.start - workflow.start:>8.3f}s {span.duration:>8.3f}s  {_label(span)}")
+    print("   by stage:")
+    for stage, seconds in per_stage.items():
+        print(f"   {seconds:>18.3f}s  {stage} ({seconds / max(workflow.duration, 1e-9):.0%})")
+
+
+def parallel_utilization(trace: Trace, parallel: Span) -> dict:
+    """Branch busy time against the stage's wall time, per branch and overall."""
+    branches: Dict[str, float] = defaultdict(float)
+    for child in trace.children.get(parallel.span_id, []):
+        branches[child.name] += child.duration
+    wall = max(parallel.duration, 1e-9)
+    return {
+        "wall": parallel.duration,
+        "utilization": sum(branches.values()) / (wall * max(1, len(branches))),
+        "branches": dict(branches),
+        "slowest": max(branches, key=branches.get) if branches else None,
+    }
+
+
+def what_if(trace: Trace, workflow: Span) -> Dict[str, Dict[str, Optional[float]]]:
+    """Estimated workflow latency per stage if it were cached or parallelized.
+
+    The workflow runs its stages in sequence, so caching a stage removes its
+    duration and parallelizing its sub-agents replaces their sum with the
+    slowest one.
+    """
+    estimates = {}
+    for stage in trace.children.get(workflow.span_id, []):
+        sub_agents = [kid for kid in trace.children.get(stage.span_id, []) if kid.kind == "agent"]
+        parallelized = None
+        if sub_agents and stage.attributes.get("agent_type") not in NOT_PARALLELIZABLE:
+            parallelized = workflow.duration - stage.duration + max(kid.duration for kid in sub_agents)
+        estimates[stage.name] = {
+            "stage": stage.duration,
+            "cached": workflow.duration - stage.duration,
+            "parallelized": parallelized,
+        }
+    return estimates
+
+
+def _median(values: List[float]) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def _seconds(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:.3f}s"
+
+
+def report(traces: Dict[str, Trace], workflow_name: str, parallel_name: str):
+    workflows = [(trace, span) for trace in traces.values() for span in trace.find(workflow_name) if span.end]
+    if not workflows:
+        print(f"⚠️  No completed {workflow_name} spans found")
+        return
+    baseline = _median([span.duration for _, span in workflows])
+
+    parallels = [parallel_utilization(trace, span) for trace in traces.values() for span in trace.find(parallel_name)]
+    if parallels:
+        print(f"\n🔀 {parallel_name} over {len(parallels)} run(s): "
+              f"median wall {_median([p['wall'] for p in parallels]):.3f}s, "
+              f"median utilization {_median([p['utilization'] for p in parallels]):.0%}")
+        branch_names = sorted({name for p in parallels for name in p["branches"]})
+        slowest = defaultdict(int)
+        for p in parallels:
+            slowest[p["slowest"]] += 1
+        for name in branch_names:
+            median = _median([p["branches"].get(name) for p in parallels])
+            print(f"   {name:<34} median {median:.3f}s  slowest in {slowest[name]}/{len(parallels)} run(s)")
+
+    estimates: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    for trace, workflow in workflows:
+        for stage, values in what_if(trace, workflow).items():
+            for key, value in values.items():
+                estimates[stage][key].append(value)
+    print(f"\n🔮 What-if over {len(workflows)} run(s), {workflow_name} median {baseline:.3f}s")
+    print(f"   {'stage':<30}{'stage time':>12}{'if cached':>12}{'saves':>8}{'if parallel':>13}{'saves':>8}")
+    for stage, values in estimates.items():
+        cached, parallel = _median(values["cached"]), _median(values["parallelized"])
+        parallel_saves = "—" if parallel is None else f"{1 - parallel / baseline:.0%}"
+        print(f"   {stage:<30}{_seconds(_median(values['stage'])):>12}{_seconds(cached):>12}"
+              f"{1 - cached / baseline:>8.0%}{_seconds(parallel):>13}{parallel_saves:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze traces written by the tracing plugin")
+    parser.add_argument("files", nargs="+", help="Span files (JSONL or OTLP/JSON)")
+    parser.add_argument("--workflow", default="full_content_workflow")
+    parser.add_argument("--parallel", default="parallel_content_creation")
+    parser.add_argument("--trace", default="latest", help="Trace id to show in detail, or 'latest'")
+    parser.add_argument("--no-timeline", action="store_true")
+    args = parser.parse_args()
+
+    spans = [span for path in args.files for span in load_spans(path)]
+    traces = group_traces(spans)
+    print(f"📂 {len(spans)} spans in {len(traces)} trace(s)")
+    if not traces:
+        return
+
+    with_workflow = [trace for trace in traces.values() if trace.find(args.workflow)]
+    if args.trace == "latest":
+        trace = max(with_workflow or traces.values(), key=lambda t: t.start)
+    else:
+        trace = next((t for trace_id, t in traces.items() if trace_id.startswith(args.trace)), None)
+        if trace is None:
+            parser.error(f"No trace matching {args.trace!r}")
+    print(f"🔎 Trace {trace.spans[0].trace_id}\n")
+    if not args.no_timeline:
+        print_timeline(trace)
+    for workflow in trace.find(args.workflow):
+        if workflow.end:
+            print_critical_path(trace, workflow)
+
+    report(traces, args.workflow, args.parallel)
+
+
+if __name__ == "__main__":
+    main()
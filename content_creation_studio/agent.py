@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 # Ensure environment variables are loaded (especially GOOGLE_API_KEY)
 load_dotenv()
 
-from google.adk.agents import SequentialAgent, LoopAgent, ParallelAgent, Agent
+from google.adk.agents import SequentialAgent, LoopAgent, Agent
 from google.adk.tools.agent_tool import AgentTool
 from content_creation_studio.sub_agents.intake_agent.agent import intake_agent
 from content_creation_studio.sub_agents.topic_research_agent.agent import topic_research_agent
@@ -17,6 +17,9 @@ from content_creation_studio.sub_agents.email_newsletter_writer_agent.agent impo
 from content_creation_studio.sub_agents.seo_metadata_agent.agent import seo_metadata_agent
 from content_creation_studio.sub_agents.content_analyzer_agent.agent import content_analyzer_agent
 from content_creation_studio.sub_agents.final_packager_agent.agent import final_packager_agent
+from content_creation_studio.branches import IsolatedParallelAgent
+from content_creation_studio.deadlines import DeadlineSequentialAgent
+from content_creation_studio.models import get_model
 
 # --- Sequential: Research and Draft ---
 research_and_draft_workflow = SequentialAgent(
@@ -32,7 +35,8 @@ quality_improvement_loop = LoopAgent(
 )
 
 # --- Parallel: Multi-Channel Content Creation ---
-parallel_content_creation = ParallelAgent(
+# A failing channel is retried on its own; siblings keep their results
+parallel_content_creation = IsolatedParallelAgent(
     name="parallel_content_creation",
     sub_agents=[
         blog_post_writer_agent,
@@ -43,7 +47,8 @@ parallel_content_creation = ParallelAgent(
 )
 
 # --- Full Content Workflow ---
-full_content_workflow = SequentialAgent(
+# Each stage gets a slice of the request deadline, when the server sets one
+full_content_workflow = DeadlineSequentialAgent(
     name="full_content_workflow",
     sub_agents=[
         intake_agent,
@@ -57,7 +62,7 @@ full_content_workflow = SequentialAgent(
 # Create a content creation coordinator that runs the full workflow
 content_creation_coordinator = Agent(
     name="content_creation_coordinator",
-    model="gemini-2.5-flash",
+    model=get_model("content_creation_coordinator"),
     instruction="""
     You are a content creation coordinator. When user requests full content creation,
     delegate to the full_content_workflow to execute the complete pipeline:
@@ -79,7 +84,7 @@ content_analyzer_tool = AgentTool(agent=content_analyzer_agent)
 
 master_orchestrator_agent = Agent(
     name="master_orchestrator_agent",
-    model="gemini-2.5-flash",
+    model=get_model("master_orchestrator_agent"),
     instruction="""
     You are the Master Content Creation Studio orchestrator. Delegate tasks to specialists.
 
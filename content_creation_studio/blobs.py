@@ -0,0 +1,287 @@
+"""Content-addressed store for large session state values.
+
+Large strings (drafts, channel outputs, the final package) are stored once,
+keyed by their SHA-256, and session state and stored events carry a short
+reference instead. Blobs live in an in-memory tier and, when a directory is
+configured, in an on-disk tier read through mmap so that several workers on
+a node share one page-cached copy. Disk blobs outlive the sessions that
+referenced them until the session store runs `collect` with the references
+it still holds.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set
+
+from google.adk.events import Event
+
+REF_PREFIX = "blob://sha256/"
+_REF_PATTERN = re.compile(re.escape(REF_PREFIX) + "([0-9a-f]{64})")
+_DIGEST_PATTERN = re.compile("[0-9a-f]{64}")
+
+
+def is_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(REF_PREFIX)
+
+
+def digests_in(text: str) -> Set[str]:
+    """Digests of all blob references found in serialized data."""
+    return set(_REF_PATTERN.findall(text))
+
+
+class BlobStore:
+    """Blob store with a memory tier and an optional mmap'd disk tier.
+
+    Memory-only stores reference-count blobs so evicted sessions free them.
+    """
+
+    def __init__(self, min_size: int = 1024, directory: Optional[str] = None, memory_bytes: int = 64 * 1024 * 1024):
+        self.min_size = min_size
+        self.directory = directory
+        # Without a disk tier the memory tier is the only copy, so it can't be trimmed
+        self.memory_bytes = memory_bytes if directory else None
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._refcounts: Dict[str, int] = {}
+        self._memory_used = 0
+        self.stats_counters = {"puts": 0, "dedup_hits": 0, "disk_reads": 0, "collected": 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    # --- Core API ---
+
+    def put(self, text: str) -> str:
+        """Stores `text` (once) and returns its reference."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.stats_counters["puts"] += 1
+        if self.directory:
+            # The disk tier is the source of truth; memory is only an LRU cache
+            if self._write_file(digest, text):
+                self._cache(digest, text)
+            else:
+                self.stats_counters["dedup_hits"] += 1
+        elif digest in self._refcounts:
+            self._refcounts[digest] += 1
+            self.stats_counters["dedup_hits"] += 1
+        else:
+            self._refcounts[digest] = 1
+            self._cache(digest, text)
+        return REF_PREFIX + digest
+
+    def get(self, ref: str) -> str:
+        digest = ref[len(REF_PREFIX):]
+        text = self._memory.get(digest)
+        if text is not None:
+            self._memory.move_to_end(digest)
+            return text
+        if not self.directory:
+            raise KeyError(f"Unknown blob: {ref}")
+        text = self._read_file(digest)
+        self.stats_counters["disk_reads"] += 1
+        self._cache(digest, text)
+        return text
+
+    def release(self, refs: Iterable[str]):
+        """Drops one reference per ref; unreferenced blobs leave the memory tier.
+
+        Disk-backed blobs may be shared with other workers, so they are kept
+        until `collect` finds them unreferenced.
+        """
+        if self.directory:
+            return
+        for ref in refs:
+            digest = ref[len(REF_PREFIX):]
+            count = self._refcounts.get(digest, 0) - 1
+            if count > 0:
+                self._refcounts[digest] = count
+                continue
+            self._refcounts.pop(digest, None)
+            text = self._memory.pop(digest, None)
+            if text is not None:
+                self._memory_used -= len(text)
+
+    def collect(self, referenced: Set[str], min_age_seconds: float = 600) -> int:
+        """Deletes disk blobs whose digest is not in `referenced`; returns how many.
+
+        Blobs written within `min_age_seconds` are kept: their references may
+        not have reached the session store yet. Only touches the disk tier, so
+        it can run on a worker thread; cached copies age out of memory.
+        """
+        if not self.directory:
+            return 0
+        cutoff = time.time() - min_age_seconds
+        deleted = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not _DIGEST_PATTERN.fullmatch(name) or name in referenced:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Collected concurrently by another worker
+                    continue
+                deleted += 1
+        self.stats_counters["collected"] += deleted
+        return deleted
+
+    @property
+    def memory_used(self) -> int:
+        """Bytes held by the memory tier."""
+        return self._memory_used
+
+    def resolve(self, value: Any) -> Any:
+        """Returns the stored text for a reference, or `value` unchanged."""
+        return self.get(value) if is_ref(value) else value
+
+    def intern(self, value: Any) -> Any:
+        """Returns a reference for large strings, or `value` unchanged."""
+        if isinstance(value, str) and len(value) >= self.min_size and not is_ref(value):
+            return self.put(value)
+        return value
+
+    # --- Events ---
+
+    def resolve_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns `state` with any references resolved."""
+        if not any(is_ref(v) for v in state.values()):
+            return state
+        return {key: self.resolve(value) for key, value in state.items()}
+
+    def intern_event(self, event: Event):
+        """Returns a copy of `event` whose large text payloads and state values are references.
+
+        `event` itself is left untouched: callers keep the full values, only
+        the stored copy carries references.
+        """
+        refs = []
+        update = {}
+        delta = event.actions.state_delta if event.actions else None
+        if delta:
+            interned_delta = {}
+            for key, value in delta.items():
+                interned = self.intern(value)
+                if interned is not value:
+                    refs.append(interned)
+                interned_delta[key] = interned
+            if refs:
+                update["actions"] = event.actions.model_copy(update={"state_delta": interned_delta})
+        if event.content and event.content.parts:
+            parts = []
+            content_refs = len(refs)
+            for part in event.content.parts:
+                if part.text and len(part.text) >= self.min_size:
+                    ref = self.put(part.text)
+                    refs.append(ref)
+                    part = part.model_copy(update={"text": ref})
+                elif part.function_response and part.function_response.response:
+                    response = {}
+                    part_refs = len(refs)
+                    for key, value in part.function_response.response.items():
+                        interned = self.intern(value)
+                        if interned is not value:
+                            refs.append(interned)
+                        response[key] = interned
+                    if len(refs) > part_refs:
+                        part = part.model_copy(update={
+                            "function_response": part.function_response.model_copy(update={"response": response})
+                        })
+                parts.append(part)
+            if len(refs) > content_refs:
+                update["content"] = event.content.model_copy(update={"parts": parts})
+        if not update:
+            return event, []
+        return event.model_copy(update=update), refs
+
+    def hydrate_event(self, event: Event) -> Event:
+        """Returns `event` with any references resolved."""
+        update = {}
+        delta = event.actions.state_delta if event.actions else None
+        if delta and any(is_ref(v) for v in delta.values()):
+            update["actions"] = event.actions.model_copy(update={"state_delta": self.resolve_state(delta)})
+        if event.content and event.content.parts:
+            changed = False
+            parts = []
+            for part in event.content.parts:
+                if is_ref(part.text):
+                    part = part.model_copy(update={"text": self.get(part.text)})
+                    changed = True
+                elif part.function_response and part.function_response.response and any(
+                    is_ref(v) for v in part.function_response.response.values()
+                ):
+                    response = {k: self.resolve(v) for k, v in part.function_response.response.items()}
+                    part = part.model_copy(update={
+                        "function_response": part.function_response.model_copy(update={"response": response})
+                    })
+                    changed = True
+                parts.append(part)
+            if changed:
+                update["content"] = event.content.model_copy(update={"parts": parts})
+        return event.model_copy(update=update) if update else event
+
+    def stats(self) -> dict:
+        return {
+            "blobs": len(self._memory),
+            "memory_bytes": self._memory_used,
+            "references": sum(self._refcounts.values()),
+            **self.stats_counters,
+        }
+
+    # --- Tiers ---
+
+    def _cache(self, digest: str, text: str):
+        if digest not in self._memory:
+            self._memory_used += len(text)
+        self._memory[digest] = text
+        self._memory.move_to_end(digest)
+        if self.memory_bytes is None:
+            return
+        while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _write_file(self, digest: str, text: str) -> bool:
+        """Writes the blob unless it already exists; returns True if written."""
+        path = self._path(digest)
+        try:
+            # A fresh mtime keeps `collect` off a blob that is being referenced again
+            os.utime(path)
+            return False
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename keeps concurrent writers of the same blob safe
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(text.encode("utf-8"))
+        os.replace(tmp_path, path)
+        return True
+
+    def _read_file(self, digest: str) -> str:
+        with open(self._path(digest), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[:].decode("utf-8")
+
+
+_default_store: Optional[BlobStore] = None
+
+
+def default_blob_store() -> BlobStore:
+    """Process-wide blob store configured from BLOB_* environment variables."""
+    global _default_store
+    if _default_store is None:
+        _default_store = BlobStore(
+            min_size=int(os.environ.get("BLOB_MIN_BYTES", 1024)),
+            directory=os.environ.get("BLOB_STORE_DIR") or None,
+            memory_bytes=int(os.environ.get("BLOB_MEMORY_BYTES", 64 * 1024 * 1024)),
+        )
+    return _default_store
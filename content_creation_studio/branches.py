@@ -0,0 +1,165 @@
+"""Failure-isolated parallel branches with branch-only retry.
+
+In a plain ParallelAgent one failing branch (quota, safety block, transient
+error) tears down its siblings and fails the whole request. IsolatedParallelAgent
+retries a failed branch on its own with exponential backoff while the others
+keep running; finished siblings keep their `output_key` results, and a branch
+that exhausts its retries leaves a missing marker in its output key instead.
+A failed attempt's events and state writes are rolled back before the retry,
+so partial drafts never sit in the session next to the retry's output.
+"""
+
+import asyncio
+import random
+from typing import Any, AsyncGenerator, Dict, List
+
+from google.adk.agents import BaseAgent, LlmAgent, ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.utils.context_utils import Aclosing
+
+MISSING_PREFIX = "[missing:"
+
+
+def missing_marker(agent_name: str, reason: str) -> str:
+    """State value recorded for an output an agent could not produce."""
+    return f"{MISSING_PREFIX}{agent_name}] {reason}"
+
+
+def is_missing(value) -> bool:
+    return isinstance(value, str) and value.startswith(MISSING_PREFIX)
+
+
+def output_keys(agent: BaseAgent) -> List[str]:
+    """State keys written by an agent and its sub-agents."""
+    keys = []
+    if isinstance(agent, LlmAgent) and agent.output_key:
+        keys.append(agent.output_key)
+    for sub_agent in agent.sub_agents:
+        keys.extend(output_keys(sub_agent))
+    return keys
+
+
+class BranchStats:
+    """Per-branch attempt, retry and outcome counters."""
+
+    def __init__(self):
+        self.branches: Dict[str, Dict[str, int]] = {}
+
+    def record(self, branch: str, key: str):
+        counters = self.branches.setdefault(
+            branch, {"runs": 0, "succeeded": 0, "failed": 0, "retries": 0}
+        )
+        counters[key] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            branch: {
+                **counters,
+                "success_rate": counters["succeeded"] / counters["runs"] if counters["runs"] else None,
+            }
+            for branch, counters in self.branches.items()
+        }
+
+
+branch_stats = BranchStats()
+
+
+class BranchFailed(Exception):
+    """A branch finished without writing its output keys."""
+
+
+class _Branch:
+    """Stands in for a sub-agent in ParallelAgent's run, so the branch runs through `_run_branch`."""
+
+    def __init__(self, parent: "IsolatedParallelAgent", agent: BaseAgent):
+        self.parent = parent
+        self.agent = agent
+        self.name = agent.name
+
+    def run_async(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        return self.parent._run_branch(self.agent, ctx)
+
+
+class IsolatedParallelAgent(ParallelAgent):
+    """ParallelAgent whose branches fail and retry independently."""
+
+    max_attempts: int = 3
+    backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 8.0
+
+    async def _run_branch(self, sub_agent: BaseAgent, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        keys = output_keys(sub_agent)
+        branch_stats.record(sub_agent.name, "runs")
+        for attempt in range(1, self.max_attempts + 1):
+            written = set()
+            attempt_events: List[Event] = []
+            # State values before this attempt first wrote each key, restored if it fails
+            previous: Dict[str, Any] = {}
+            try:
+                async with Aclosing(sub_agent.run_async(ctx)) as agen:
+                    async for event in agen:
+                        for key in event.actions.state_delta:
+                            if key not in previous:
+                                previous[key] = ctx.session.state.get(key)
+                        written.update(event.actions.state_delta)
+                        if not event.partial:
+                            attempt_events.append(event)
+                        yield event
+                if ctx.end_invocation:
+                    return
+                if not written.issuperset(keys):
+                    raise BranchFailed("finished without output")
+                branch_stats.record(sub_agent.name, "succeeded")
+                return
+            except Exception as e:
+                reason = f"{type(e).__name__}: {e}"
+                async with Aclosing(self._roll_back(ctx, attempt_events, previous)) as agen:
+                    async for event in agen:
+                        yield event
+                if attempt == self.max_attempts:
+                    break
+                branch_stats.record(sub_agent.name, "retries")
+                delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempt - 1))
+                print(f"🔁 Branch {sub_agent.name} failed ({reason}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+        branch_stats.record(sub_agent.name, "failed")
+        print(f"❌ Branch {sub_agent.name} gave up after {self.max_attempts} attempts: {reason}")
+        marker = missing_marker(sub_agent.name, f"failed after {self.max_attempts} attempts ({reason})")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={key: marker for key in keys}),
+        )
+
+    async def _roll_back(
+        self, ctx: InvocationContext, attempt_events: List[Event], previous: Dict[str, Any]
+    ) -> AsyncGenerator[Event, None]:
+        """Undoes a failed attempt: restores the state it wrote and drops its events from the session.
+
+        The restoring event goes through the runner like any other, so stored
+        state is restored too; session services with `replace_events` also
+        drop the attempt's stored events.
+        """
+        rollback = Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=previous),
+        )
+        yield rollback
+        if not attempt_events:
+            return
+        removed_ids = {event.id for event in attempt_events}
+        ctx.session.events[:] = [event for event in ctx.session.events if event.id not in removed_ids]
+        if hasattr(ctx.session_service, "replace_events"):
+            await ctx.session_service.replace_events(ctx.session, [*removed_ids, rollback.id], rollback)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        # ParallelAgent's own run (branch contexts, merging, resumability) over stand-ins for the sub-agents
+        shell = self.model_copy(update={"sub_agents": [_Branch(self, sub_agent) for sub_agent in self.sub_agents]})
+        async with Aclosing(ParallelAgent._run_async_impl(shell, ctx)) as agen:
+            async for event in agen:
+                yield event
@@ -0,0 +1,181 @@
+"""Circuit breaker and fallback routing for model calls.
+
+Each (model, agent) pair has a breaker that tracks error rate and slow-call
+rate over a sliding time window. When either crosses its threshold the
+breaker opens: calls skip the primary model and go to the agent's
+deterministic fallback (see fallbacks.py) or the configured fallback model.
+After `open_seconds` the breaker half-opens and lets one probe call through;
+a successful probe closes it again, a failed one re-opens it.
+"""
+
+import os
+import time
+from collections import deque
+from typing import AsyncGenerator, Callable, Dict, Optional, Tuple
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The breaker is open and the agent has no fallback."""
+
+
+class CircuitBreaker:
+    """Sliding-window error/latency breaker for one (model, agent) pair."""
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        slow_call_rate: float = 0.5,
+        open_seconds: float = 30.0,
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self.fallback_calls = 0
+        self._probe_in_flight = False
+        self._calls: "deque[Tuple[float, bool, float]]" = deque()
+
+    def _prune(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def allow(self) -> bool:
+        """Whether the next call may go to the primary model."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record(self, ok: bool, seconds: float):
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if ok and seconds < self.slow_call_seconds:
+                self.state = CLOSED
+                self._calls.clear()
+            else:
+                self._open(now)
+            return
+
+        self._calls.append((now, ok, seconds))
+        self._prune(now)
+        calls = len(self._calls)
+        if self.state != CLOSED or calls < self.min_calls:
+            return
+        errors = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_seconds)
+        if errors / calls >= self.error_rate or slow / calls >= self.slow_call_rate:
+            self._open(now)
+
+    def abandon(self):
+        """A call ended without an outcome (cancelled); frees the half-open probe slot."""
+        self._probe_in_flight = False
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+
+    def snapshot(self) -> dict:
+        self._prune(time.monotonic())
+        calls = len(self._calls)
+        return {
+            "state": self.state,
+            "calls_in_window": calls,
+            "error_rate": sum(1 for _, ok, _ in self._calls if not ok) / calls if calls else 0.0,
+            "trips": self.trips,
+            "fallback_calls": self.fallback_calls,
+        }
+
+
+def _breaker_from_env() -> CircuitBreaker:
+    return CircuitBreaker(
+        window_seconds=float(os.environ.get("BREAKER_WINDOW_SECONDS", "60")),
+        error_rate=float(os.environ.get("BREAKER_ERROR_RATE", "0.5")),
+        slow_call_seconds=float(os.environ.get("BREAKER_SLOW_CALL_SECONDS", "30")),
+        open_seconds=float(os.environ.get("BREAKER_OPEN_SECONDS", "30")),
+    )
+
+
+breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+
+def get_breaker(model: str, agent_name: str) -> CircuitBreaker:
+    key = (model, agent_name)
+    if key not in breakers:
+        breakers[key] = _breaker_from_env()
+    return breakers[key]
+
+
+def breaker_status() -> dict:
+    return {f"{model}/{agent}": breaker.snapshot() for (model, agent), breaker in breakers.items()}
+
+
+class BreakerLlm(BaseLlm):
+    """Routes an agent's calls away from its model while the breaker is open."""
+
+    inner: BaseLlm
+    agent_name: str
+    fallback: Optional[BaseLlm] = None
+    # Builds a response locally, without any model call
+    fallback_response: Optional[Callable[[LlmRequest], LlmResponse]] = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        breaker = get_breaker(self.inner.model, self.agent_name)
+        if breaker.allow():
+            start = time.monotonic()
+            yielded = False
+            recorded = False
+            try:
+                async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                    yielded = True
+                    yield response
+            except Exception as e:
+                recorded = True
+                breaker.record(False, time.monotonic() - start)
+                # A half-delivered response can't be replayed from another model
+                if yielded or not self._has_fallback():
+                    raise
+                print(f"⚡ {self.agent_name}: {self.inner.model} failed ({e}), using fallback")
+            else:
+                recorded = True
+                breaker.record(True, time.monotonic() - start)
+                return
+            finally:
+                if not recorded:
+                    breaker.abandon()
+
+        breaker.fallback_calls += 1
+        if self.fallback_response is not None:
+            yield self.fallback_response(llm_request)
+        elif self.fallback is not None:
+            async for response in self.fallback.generate_content_async(llm_request, stream=stream):
+                yield response
+        else:
+            raise CircuitOpenError(f"Circuit open for {self.inner.model}/{self.agent_name}")
+
+    def _has_fallback(self) -> bool:
+        return self.fallback_response is not None or self.fallback is not None
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
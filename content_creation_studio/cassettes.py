@@ -0,0 +1,222 @@
+"""Record/replay cassettes of pipeline runs.
+
+A cassette holds every model call of one run (agent, request fingerprint,
+response, start offset and duration) plus every tool call with its timing,
+stored as gzipped JSON. Replaying a cassette answers each agent's model calls
+with the recorded responses, in the recorded order per agent, optionally
+waiting the recorded (scaled) duration, so orchestration changes can be
+measured against realistic traffic without a model endpoint.
+
+The active cassette for a run lives in `current_cassette`. The CassettePlugin
+records into it from its model and tool callbacks; replay happens in
+CassetteLlm, which get_model wraps around every agent's model when
+CASSETTE_DIR is set, so replayed calls still run every model callback.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import AsyncGenerator, Dict, List, Optional, Union
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+CASSETTE_VERSION = 1
+CASSETTE_SUFFIX = ".cassette.json.gz"
+
+
+class CassetteExhausted(RuntimeError):
+    """The run made more model calls for an agent than the cassette recorded."""
+
+
+def _without_ids(value):
+    # Function call ids are generated per run and would never match on replay
+    if isinstance(value, dict):
+        return {key: _without_ids(item) for key, item in value.items() if key != "id"}
+    if isinstance(value, list):
+        return [_without_ids(item) for item in value]
+    return value
+
+
+def request_fingerprint(llm_request: LlmRequest) -> str:
+    """Stable hash of what the model was asked, used to spot replay divergence."""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    contents = [_without_ids(content.model_dump(mode="json", exclude_none=True)) for content in llm_request.contents]
+    payload = json.dumps([str(instruction or ""), contents], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _prompt_chars(llm_request: LlmRequest) -> int:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    return len(str(instruction or "")) + sum(
+        len(part.text or "") for content in llm_request.contents for part in content.parts or []
+    )
+
+
+class Cassette:
+    """Recorded model and tool calls of one run."""
+
+    def __init__(self, meta: Optional[dict] = None, calls: Optional[List[dict]] = None, tools: Optional[List[dict]] = None):
+        self.meta = meta or {}
+        self.calls = calls or []
+        self.tools = tools or []
+
+    def save(self, path: Union[str, Path]):
+        data = {"version": CASSETTE_VERSION, "meta": self.meta, "calls": self.calls, "tools": self.tools}
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"), default=str)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version in {path}: {data.get('version')}")
+        return cls(data["meta"], data["calls"], data["tools"])
+
+    def summary(self) -> dict:
+        per_agent: Dict[str, dict] = {}
+        for call in self.calls:
+            agent = per_agent.setdefault(call["agent"], {"calls": 0, "model_seconds": 0.0})
+            agent["calls"] += 1
+            agent["model_seconds"] = round(agent["model_seconds"] + call["duration"], 3)
+        return {
+            "meta": self.meta,
+            "model_calls": len(self.calls),
+            "tool_calls": len(self.tools),
+            "duration_seconds": self.meta.get("duration_seconds"),
+            "agents": per_agent,
+        }
+
+
+class CassetteRecorder:
+    """Collects a run's calls into a Cassette."""
+
+    def __init__(self, meta: Optional[dict] = None):
+        self.cassette = Cassette(meta=dict(meta or {}))
+        self.cassette.meta.setdefault("recorded_at", time.time())
+        self._start = time.monotonic()
+
+    def offset(self) -> float:
+        return time.monotonic() - self._start
+
+    def record_call(self, agent: str, llm_request: LlmRequest, started: float,
+                    response: Optional[LlmResponse] = None, error: Optional[str] = None):
+        self.cassette.calls.append({
+            "agent": agent,
+            "offset": round(started, 4),
+            "duration": round(self.offset() - started, 4),
+            "request": {
+                "fingerprint": request_fingerprint(llm_request),
+                "contents": len(llm_request.contents),
+                "prompt_chars": _prompt_chars(llm_request),
+            },
+            "response": response.model_dump(mode="json", exclude_none=True) if response else None,
+            "error": error,
+        })
+
+    def record_tool(self, agent: str, name: str, args: dict, started: float, result):
+        self.cassette.tools.append({
+            "agent": agent,
+            "name": name,
+            "args": args,
+            "offset": round(started, 4),
+            "duration": round(self.offset() - started, 4),
+            "result": result,
+        })
+
+    def finish(self) -> Cassette:
+        self.cassette.meta["duration_seconds"] = round(self.offset(), 3)
+        return self.cassette
+
+
+class CassettePlayer:
+    """Serves a cassette's recorded responses, per agent in recorded order.
+
+    `time_scale` multiplies the recorded call durations (0 replays instantly).
+    """
+
+    def __init__(self, cassette: Cassette, time_scale: float = 1.0):
+        self.cassette = cassette
+        self.time_scale = time_scale
+        self.mismatches = 0
+        self._queues: Dict[str, List[dict]] = {}
+        for call in cassette.calls:
+            self._queues.setdefault(call["agent"], []).append(call)
+        self._cursors: Dict[str, int] = {}
+
+    def next_call(self, agent: str, llm_request: LlmRequest) -> dict:
+        queue = self._queues.get(agent, [])
+        index = self._cursors.get(agent, 0)
+        if index >= len(queue):
+            raise CassetteExhausted(f"No recorded model call #{index + 1} for {agent}")
+        self._cursors[agent] = index + 1
+        call = queue[index]
+        if call["request"]["fingerprint"] != request_fingerprint(llm_request):
+            self.mismatches += 1
+        return call
+
+    @staticmethod
+    def response(call: dict) -> LlmResponse:
+        if call["error"]:
+            raise RuntimeError(f"Recorded model error: {call['error']}")
+        return LlmResponse.model_validate(call["response"])
+
+    def unused_calls(self) -> int:
+        return sum(len(queue) - self._cursors.get(agent, 0) for agent, queue in self._queues.items())
+
+
+current_cassette: ContextVar[Optional[Union[CassetteRecorder, CassettePlayer]]] = ContextVar(
+    "current_cassette", default=None
+)
+
+
+def cassettes_enabled() -> bool:
+    return bool(os.environ.get("CASSETTE_DIR"))
+
+
+class CassetteLlm(BaseLlm):
+    """Answers from the active CassettePlayer when there is one, otherwise calls the inner model."""
+
+    inner: BaseLlm
+    agent_name: str
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        cassette = current_cassette.get()
+        if not isinstance(cassette, CassettePlayer):
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                yield response
+            return
+        call = cassette.next_call(self.agent_name, llm_request)
+        if cassette.time_scale > 0:
+            await asyncio.sleep(call["duration"] * cassette.time_scale)
+        yield cassette.response(call)
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
+
+
+def cassette_for_request(replay_name: Optional[str], time_scale: float = 1.0, meta: Optional[dict] = None):
+    """Player for the named cassette, a recorder, or None, per CASSETTE_DIR / CASSETTE_RECORD."""
+    cassette_dir = os.environ.get("CASSETTE_DIR")
+    if not cassette_dir:
+        return None
+    if replay_name:
+        # Only file names are accepted, never paths outside the cassette directory
+        return CassettePlayer(Cassette.load(Path(cassette_dir) / Path(replay_name).name), time_scale)
+    if os.environ.get("CASSETTE_RECORD", "0") == "1":
+        return CassetteRecorder(meta)
+    return None
+
+
+def save_recording(recorder: CassetteRecorder, name: str) -> Path:
+    """Writes a finished recording into CASSETTE_DIR."""
+    path = Path(os.environ["CASSETTE_DIR"]) / f"{name}{CASSETTE_SUFFIX}"
+    recorder.finish().save(path)
+    return path
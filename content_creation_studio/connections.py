@@ -0,0 +1,263 @@
+"""One shared, bounded, keep-alive connection pool for every Gemini call in the process.
+
+ADK gives each model instance its own genai client, and each client opens
+connections of its own, so agents running concurrently (and every model
+resolved from a name string) pay for new TCP and TLS handshakes on the
+critical path. PooledGemini hands every model the one httpx client from
+`http_client()` instead:
+
+- at most HTTP_POOL_MAX_CONNECTIONS connections per origin; further calls
+  wait for one, and that wait is measured
+- up to HTTP_POOL_MAX_KEEPALIVE idle connections stay open for
+  HTTP_POOL_KEEPALIVE_SECONDS
+- HTTP/2 when the optional `h2` package is installed (HTTP_POOL_HTTP2=auto),
+  so concurrent calls multiplex over one connection
+
+Connections belong to an event loop. The local server has one, but
+AdkApp's sync methods run each query on a loop of their own, so the
+transport keeps a pool per running loop and the limits apply to each.
+HTTP_POOL=0 goes back to a client (and connections) per model.
+
+Point GOOGLE_GEMINI_BASE_URL at a local stand-in server to exercise the
+pool offline (see benchmarks/connections.py).
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from collections import deque
+from functools import cached_property
+from typing import Deque, Optional
+
+import httpx
+from google.adk.models.google_llm import Gemini
+from google.genai import Client, types
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    h2 = None
+
+# Trace events that mean the pool has given a request a connection: a new one, or an open one it writes to
+_ASSIGNED = {
+    "connection.connect_tcp.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+}
+# Fired when a request's response is closed (or its send fails) and it lets go of the connection
+_RELEASED = {"http11.response_closed.complete", "http2.response_closed.complete"}
+
+RECENT_WAITS = 1000
+
+
+def pool_enabled() -> bool:
+    return os.environ.get("HTTP_POOL", "1") != "0"
+
+
+def http2_enabled() -> bool:
+    setting = os.environ.get("HTTP_POOL_HTTP2", "auto")
+    if setting == "auto":
+        return h2 is not None
+    return setting == "1"
+
+
+class PoolStats:
+    """Connection churn and pool waits of the shared transport."""
+
+    def __init__(self):
+        self.requests = 0
+        self.waiting = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=RECENT_WAITS)
+        # Requests holding a connection: assigned, response not yet closed
+        self.in_use = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.handshake_seconds = 0.0
+        # Monotonic times of the connections opened in the last minute
+        self._opened_at: Deque[float] = deque()
+
+    def assigned(self, wait: float):
+        self.waiting -= 1
+        self.in_use += 1
+        self.wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self.recent_waits.append(wait)
+
+    def opened(self, seconds: float, tls: bool):
+        now = time.monotonic()
+        self.connections_opened += 1
+        self.tls_handshakes += tls
+        self.handshake_seconds += seconds
+        self._opened_at.append(now)
+        self._expire(now)
+
+    def _expire(self, now: float):
+        while self._opened_at and now - self._opened_at[0] > 60:
+            self._opened_at.popleft()
+
+    def handshakes_per_minute(self) -> int:
+        self._expire(time.monotonic())
+        return len(self._opened_at)
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.recent_waits)
+        assigned = self.requests - self.waiting
+        return {
+            "requests": self.requests,
+            "waiting": self.waiting,
+            "mean_wait_ms": round(self.wait_seconds / assigned * 1000, 3) if assigned else 0.0,
+            "p95_wait_ms": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 3) if waits else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "mean_handshake_ms": (
+                round(self.handshake_seconds / self.connections_opened * 1000, 3) if self.connections_opened else 0.0
+            ),
+            "handshakes_per_minute": self.handshakes_per_minute(),
+        }
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """Hands requests to the running loop's connection pool and records how long they wait for a connection."""
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False, stats: Optional[PoolStats] = None):
+        self.limits = limits
+        self.http2 = http2
+        self.stats = stats or PoolStats()
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._transport()
+        stats = self.stats
+        start = time.perf_counter()
+        waiting = True
+        holding = False
+        connect_started = 0.0
+        inner_trace = request.extensions.get("trace")
+
+        async def trace(name: str, info: dict):
+            nonlocal waiting, holding, connect_started
+            if waiting and name in _ASSIGNED:
+                waiting = False
+                holding = True
+                stats.assigned(time.perf_counter() - start)
+            elif holding and name in _RELEASED:
+                holding = False
+                stats.in_use -= 1
+            if name == "connection.connect_tcp.started":
+                connect_started = time.perf_counter()
+            elif name == "connection.connect_tcp.complete" and request.url.scheme == "http":
+                stats.opened(time.perf_counter() - connect_started, tls=False)
+            elif name == "connection.start_tls.complete":
+                stats.opened(time.perf_counter() - connect_started, tls=True)
+            if inner_trace is not None:
+                await inner_trace(name, info)
+
+        request.extensions["trace"] = trace
+        stats.requests += 1
+        stats.waiting += 1
+        try:
+            return await transport.handle_async_request(request)
+        except BaseException:
+            if holding:
+                # Failed before httpcore traced the response as closed
+                holding = False
+                stats.in_use -= 1
+            raise
+        finally:
+            if waiting:
+                # Failed or cancelled before it got a connection
+                stats.waiting -= 1
+
+    def connection_counts(self) -> dict:
+        """Requests holding a connection (from the trace hooks) and idle pooled connections.
+
+        The trace events are httpx's public extension API. Idle connections
+        aren't traced, so they are read from httpx's private `_pool`
+        (requirements.txt pins httpx for it); None if that ever moves.
+        """
+        idle = 0
+        for transport in list(self._transports.values()):
+            connections = getattr(getattr(transport, "_pool", None), "connections", None)
+            if connections is None:
+                idle = None
+                break
+            idle += sum(1 for connection in connections if connection.is_idle())
+        return {"active": self.stats.in_use, "idle": idle}
+
+    def snapshot(self) -> dict:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive": self.limits.max_keepalive_connections,
+            "keepalive_seconds": self.limits.keepalive_expiry,
+            "loops": len(self._transports),
+            **self.connection_counts(),
+            **self.stats.snapshot(),
+        }
+
+    async def aclose(self):
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+_client: Optional[httpx.AsyncClient] = None
+_transport: Optional[PooledTransport] = None
+
+
+def http_client() -> httpx.AsyncClient:
+    """The process-wide httpx client every PooledGemini sends its calls through."""
+    global _client, _transport
+    if _client is None:
+        limits = httpx.Limits(
+            max_connections=int(os.environ.get("HTTP_POOL_MAX_CONNECTIONS", "32")),
+            max_keepalive_connections=int(os.environ.get("HTTP_POOL_MAX_KEEPALIVE", "16")),
+            keepalive_expiry=float(os.environ.get("HTTP_POOL_KEEPALIVE_SECONDS", "60")),
+        )
+        _transport = PooledTransport(limits, http2=http2_enabled())
+        _client = httpx.AsyncClient(transport=_transport)
+    return _client
+
+
+class PooledGemini(Gemini):
+    """Gemini whose API client sends every call through the shared connection pool."""
+
+    @cached_property
+    def api_client(self) -> Client:
+        return Client(
+            http_options=types.HttpOptions(
+                headers=self._tracking_headers,
+                retry_options=self.retry_options,
+                httpx_async_client=http_client(),
+            )
+        )
+
+
+async def preconnect(llm, connections: int = 1, timeout: float = 10.0):
+    """Opens connections for a model ahead of traffic with `connections` concurrent metadata calls."""
+    client = getattr(llm, "api_client", None)
+    if client is None:
+        return
+    calls = (client.aio.models.get(model=llm.model) for _ in range(max(1, connections)))
+    await asyncio.wait_for(asyncio.gather(*calls), timeout)
+
+
+def pool_snapshot() -> dict:
+    if not pool_enabled():
+        return {"enabled": False}
+    if _transport is None:
+        return {"enabled": True, "started": False}
+    return {"enabled": True, "started": True, **_transport.snapshot()}
@@ -0,0 +1,214 @@
+"""Request deadlines split into per-stage budgets, with graceful degradation.
+
+A request's overall budget is set as a Deadline in `current_deadline` by the
+server. DeadlineSequentialAgent gives each workflow stage a slice of the time
+that is left when the stage starts (weighted, so time a stage doesn't use
+flows to later stages). A stage that runs out of time is cancelled and the
+pipeline moves on with what it has:
+
+- quality loop: stops iterating and keeps the latest `current_content`
+- parallel channels: ships the channels that finished, marks the rest
+- packager: assembles the package directly from state
+
+Every skipped or cut-short stage is recorded on the Deadline so the response
+can be flagged as partial.
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional
+
+from google.adk.agents import SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.utils.context_utils import Aclosing
+from google.genai.types import Content, Part
+from pydantic import Field
+
+from content_creation_studio.blobs import default_blob_store
+from content_creation_studio.branches import missing_marker, output_keys
+
+# Relative share of the remaining budget each stage gets when it starts
+DEFAULT_STAGE_WEIGHTS: Dict[str, float] = {
+    "research_and_draft_workflow": 3,
+    "quality_improvement_loop": 3,
+    "parallel_content_creation": 3,
+    "final_packager_agent": 1,
+}
+
+PACKAGE_SECTIONS = [
+    ("📝 Blog Post", "final_blog_post"),
+    ("📱 Social Media Content", "social_media_posts"),
+    ("📧 Email Newsletter", "email_newsletter"),
+    ("🔍 SEO Metadata", "seo_metadata"),
+]
+
+
+class Deadline:
+    """Overall time budget of one request."""
+
+    def __init__(self, budget_seconds: float, reserve_fraction: float = 0.1):
+        now = time.monotonic()
+        self.budget_seconds = budget_seconds
+        self.expires_at = now + budget_seconds
+        # Time kept back for the orchestrator to present the result
+        self.workflow_expires_at = now + budget_seconds * (1 - reserve_fraction)
+        self.skipped: List[str] = []
+        self._stage_deadlines: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        return max(0.0, self.workflow_expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def start_stage(self, name: str, weights: Dict[str, float]) -> float:
+        """Returns the absolute deadline for stage `name`, starting now."""
+        if name not in weights:
+            return self.workflow_expires_at
+        pending = [s for s in weights if s not in self._stage_deadlines]
+        share = weights[name] / sum(weights[s] for s in pending) if name in pending else 1.0
+        stage_deadline = time.monotonic() + self.remaining() * share
+        self._stage_deadlines[name] = stage_deadline
+        return stage_deadline
+
+    def skip(self, stage: str, reason: str):
+        self.skipped.append(f"{stage} ({reason})")
+
+
+# Deadline of the request being served by the current task; inherited by child tasks
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+class TimedRun:
+    """Iterates an agent's events until they end or `deadline_at` passes.
+
+    The agent runs in its own task, so cancelling it on timeout also cancels
+    everything it started (e.g. all ParallelAgent branches). Like ADK's own
+    ParallelAgent, the task waits after each event until the consumer has
+    processed it, so state deltas are applied before the agent continues.
+    """
+
+    def __init__(self, agen_factory: Callable[[], AsyncGenerator[Event, None]], deadline_at: float):
+        self.agen_factory = agen_factory
+        self.deadline_at = deadline_at
+        self.timed_out = False
+
+    async def __aiter__(self) -> AsyncIterator[Event]:
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                async with Aclosing(self.agen_factory()) as agen:
+                    async for event in agen:
+                        resume = asyncio.Event()
+                        queue.put_nowait((event, resume))
+                        await resume.wait()
+            finally:
+                queue.put_nowait((None, None))
+
+        task = asyncio.create_task(produce())
+        try:
+            while True:
+                timeout = self.deadline_at - time.monotonic()
+                try:
+                    event, resume = await asyncio.wait_for(queue.get(), max(timeout, 0))
+                except asyncio.TimeoutError:
+                    self.timed_out = True
+                    return
+                if event is None:
+                    await task  # re-raises the agent's exception, if any
+                    return
+                yield event
+                resume.set()
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+
+def build_partial_package(state, skipped: List[str]) -> str:
+    """Assembles the content package directly from state, without the packager."""
+    store = default_blob_store()
+    lines = [
+        "# Content Package (partial)",
+        "",
+        f"⚠️ Delivered within the request deadline. Skipped or cut short: {', '.join(skipped) or 'none'}.",
+    ]
+    for title, key in PACKAGE_SECTIONS:
+        lines += ["", f"## {title}", "", str(store.resolve(state.get(key, missing_marker(key, "not produced"))))]
+    return "\n".join(lines)
+
+
+class DeadlineSequentialAgent(SequentialAgent):
+    """SequentialAgent that runs each stage within its slice of the request deadline.
+
+    Without a deadline in `current_deadline` it behaves exactly like
+    SequentialAgent.
+    """
+
+    stage_weights: Dict[str, float] = Field(default_factory=lambda: dict(DEFAULT_STAGE_WEIGHTS))
+    draft_stage: str = "research_and_draft_workflow"
+    # Stages after the draft stage can't run without this key
+    required_state_key: str = "current_content"
+    package_agent: str = "final_packager_agent"
+    package_key: str = "final_content_package"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        deadline = current_deadline.get()
+        if deadline is None:
+            async with Aclosing(super()._run_async_impl(ctx)) as agen:
+                async for event in agen:
+                    yield event
+            return
+
+        for sub_agent in self.sub_agents:
+            is_packager = sub_agent.name == self.package_agent
+            is_content_stage = sub_agent.name in self.stage_weights and not is_packager
+            if deadline.expired:
+                deadline.skip(sub_agent.name, "deadline exceeded")
+            elif is_content_stage and sub_agent.name != self.draft_stage and (
+                self.required_state_key not in ctx.session.state
+            ):
+                deadline.skip(sub_agent.name, f"no {self.required_state_key}")
+            else:
+                run = TimedRun(
+                    lambda agent=sub_agent: agent.run_async(ctx),
+                    deadline.start_stage(sub_agent.name, self.stage_weights),
+                )
+                async for event in run:
+                    yield event
+                if ctx.end_invocation:
+                    return
+                if not run.timed_out:
+                    continue
+                deadline.skip(sub_agent.name, "stage deadline exceeded")
+
+            if is_packager:
+                text = build_partial_package(ctx.session.state, deadline.skipped)
+                yield Event(
+                    invocation_id=ctx.invocation_id,
+                    author=self.name,
+                    branch=ctx.branch,
+                    content=Content(role="model", parts=[Part(text=text)]),
+                    actions=EventActions(state_delta={self.package_key: text}),
+                )
+                continue
+
+            missing = {
+                key: missing_marker(sub_agent.name, "exceeded its deadline")
+                for key in output_keys(sub_agent)
+                if key not in ctx.session.state and key != self.required_state_key
+            }
+            if missing:
+                yield Event(
+                    invocation_id=ctx.invocation_id,
+                    author=self.name,
+                    branch=ctx.branch,
+                    actions=EventActions(state_delta=missing),
+                )
@@ -0,0 +1,276 @@
+"""Offline fake model for benchmarking the pipeline without network calls.
+
+Selected with MODEL_BACKEND=fake. Each agent gets a FakeLlm that answers the
+way the real model is asked to in that agent's instruction: intake calls
+`update_session_state`, the quality checker scores the draft and passes it
+only after FAKE_LOOP_ITERATIONS revisions, the improver calls `exit_loop`
+once it has passed, the orchestrator and coordinator delegate, and the
+writers return markdown of realistic length. Latency is drawn from
+FAKE_LATENCY (e.g. "fixed:0.05", "uniform:0.2:1.5", "lognormal:0.8:0.4"),
+seeded by FAKE_SEED, so runs are reproducible.
+"""
+
+import asyncio
+import os
+import random
+import re
+import zlib
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from content_creation_studio.fallbacks import snippet_text
+from content_creation_studio.tools import QUALITY_THRESHOLD_MET
+
+REVISION_PATTERN = re.compile(r"<!-- revision: (\d+) -->")
+
+
+class LatencyDistribution:
+    """Samples call latency in seconds from a "kind:arg[:arg]" spec."""
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, *args = spec.split(":")
+        self.spec = spec
+        self.kind = kind
+        self.args = [float(arg) for arg in args]
+        if kind not in {"fixed", "uniform", "lognormal"}:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.args[0] if self.args else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(self.args[0], self.args[1])
+        # lognormal:median:sigma
+        return self.args[0] * rng.lognormvariate(0, self.args[1])
+
+
+def _text(content: types.Content) -> str:
+    return "".join(part.text for part in content.parts or [] if part.text)
+
+
+def _user_request(llm_request: LlmRequest) -> str:
+    for content in llm_request.contents:
+        if content.role == "user" and _text(content):
+            return _text(content)
+    return ""
+
+
+def _instruction(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    return instruction if isinstance(instruction, str) else ""
+
+
+def _revision(llm_request: LlmRequest) -> int:
+    match = REVISION_PATTERN.search(_instruction(llm_request))
+    return int(match.group(1)) if match else 0
+
+
+def _call(name: str, **args) -> List[types.Part]:
+    return [types.Part(function_call=types.FunctionCall(name=name, args=args))]
+
+
+def _words(count: int, topic: str) -> str:
+    base = f"{topic} helps teams work faster and with more confidence. ".split()
+    return " ".join(base[i % len(base)] for i in range(count))
+
+
+def _document(title: str, topic: str, words: int, revision: Optional[int] = None) -> str:
+    sections = []
+    for heading in ["Introduction", "Key Ideas", "In Practice", "Conclusion"]:
+        sections.append(f"## {heading}\n\n{_words(words // 4, topic)}.")
+    marker = f"\n\n<!-- revision: {revision} -->" if revision is not None else ""
+    return f"# {title}\n\n" + "\n\n".join(sections) + marker
+
+
+class FakeLlm(BaseLlm):
+    """Canned, schema-correct responses for one agent."""
+
+    agent_name: str
+    latency: str = "fixed:0"
+    loop_iterations: int = 1
+    draft_words: int = 600
+    seed: int = 0
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed ^ zlib.crc32(self.agent_name.encode()))
+        self._latency = LatencyDistribution(self.latency)
+
+    def _topic(self, llm_request: LlmRequest) -> str:
+        request = _user_request(llm_request)
+        match = re.search(r"(?:about|on|topic:)\s+([^.,\n]{3,60})", request, re.IGNORECASE)
+        return (match.group(1) if match else "Cloud computing").strip()
+
+    def respond(self, llm_request: LlmRequest) -> List[types.Part]:
+        """Parts the real model would return for this agent at this point."""
+        last = llm_request.contents[-1] if llm_request.contents else None
+        after_tool = bool(last and any(part.function_response for part in last.parts or []))
+        topic = self._topic(llm_request)
+        handler = _HANDLERS.get(self.agent_name, _default)
+        return handler(self, llm_request, topic, after_tool)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        delay = self._latency.sample(self._rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        parts = self.respond(llm_request)
+        prompt_chars = len(_instruction(llm_request)) + sum(
+            len(_text(content)) for content in llm_request.contents
+        )
+        output_chars = sum(len(part.text or "") for part in parts) + 40 * sum(
+            1 for part in parts if part.function_call
+        )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_chars // 4,
+                candidates_token_count=output_chars // 4,
+                total_token_count=(prompt_chars + output_chars) // 4,
+            ),
+        )
+
+
+def _default(llm: FakeLlm, llm_request: LlmRequest, topic: str, after_tool: bool) -> List[types.Part]:
+    return [types.Part(text=f"{llm.agent_name} response about {topic}.")]
+
+
+def _orchestrator(llm, llm_request, topic, after_tool):
+    if after_tool:
+        result = llm_request.contents[-1].parts[0].function_response.response or {}
+        return [types.Part(text=str(result.get("result", result)))]
+    request = _user_request(llm_request)
+    if "analyze" in request.lower():
+        return _call("content_analyzer_agent", request=request)
+    return _call("content_creation_coordinator", request=request)
+
+
+def _coordinator(llm, llm_request, topic, after_tool):
+    if after_tool:
+        return [types.Part(text="The full content workflow has finished.")]
+    return _call("transfer_to_agent", agent_name="full_content_workflow")
+
+
+def _intake(llm, llm_request, topic, after_tool):
+    if after_tool:
+        return [types.Part(text=f"Brief captured for {topic}.")]
+    return _call(
+        "update_session_state",
+        topic=topic,
+        target_audience="technical professionals",
+        tone="informative",
+        keywords=", ".join(topic.lower().split()[:3] + ["guide"]),
+    )
+
+
+def _research(llm, llm_request, topic, after_tool):
+    points = "\n".join(f"- Insight {i}: {_words(25, topic)}" for i in range(1, 6))
+    return [types.Part(text=f"Research notes on {topic}:\n\n{points}")]
+
+
+def _drafter(llm, llm_request, topic, after_tool):
+    return [types.Part(text=_document(topic, topic, llm.draft_words, revision=0))]
+
+
+def _quality_checker(llm, llm_request, topic, after_tool):
+    revision = _revision(llm_request)
+    passed = revision + 1 >= llm.loop_iterations
+    if not after_tool:
+        return _call(
+            "calculate_content_quality_score",
+            word_count=llm.draft_words + 150 * revision,
+            readability_score=62.0 if passed else 38.0,
+            has_headings=True,
+            has_conclusion=passed,
+        )
+    if passed:
+        return [types.Part(text=QUALITY_THRESHOLD_MET)]
+    return [types.Part(text="Quality score: 55. Issues: sentences too long, conclusion is weak.")]
+
+
+def _improver(llm, llm_request, topic, after_tool):
+    if f"Feedback: {QUALITY_THRESHOLD_MET}" in _instruction(llm_request):
+        if after_tool:
+            return [types.Part(text="Quality threshold met! Content approved.")]
+        return _call("exit_loop")
+    revision = _revision(llm_request) + 1
+    return [types.Part(text=_document(topic, topic, llm.draft_words + 150 * revision, revision))]
+
+
+def _blog(llm, llm_request, topic, after_tool):
+    return [types.Part(text=_document(f"The Complete Guide to {topic}", topic, llm.draft_words + 300))]
+
+
+def _social(llm, llm_request, topic, after_tool):
+    tag = "#" + "".join(word.capitalize() for word in topic.split()[:2])
+    return [types.Part(text=(
+        f"**LinkedIn:** {_words(60, topic)} {tag}\n\n"
+        f"**Twitter/X:** {_words(25, topic)} {tag}\n\n"
+        f"**Instagram:** {_words(40, topic)} {tag}"
+    ))]
+
+
+def _email(llm, llm_request, topic, after_tool):
+    return [types.Part(text=f"Subject: What's new in {topic}\n\n{_words(220, topic)}.\n\nRead the full post →")]
+
+
+def _seo(llm, llm_request, topic, after_tool):
+    return [types.Part(text=(
+        f"Title: {topic} - A Practical Guide\n"
+        f"Meta description: {_words(22, topic)}\n"
+        f"Keywords: {', '.join(topic.lower().split())}, guide, best practices\n"
+        f"URL slug: /{'-'.join(topic.lower().split())}"
+    ))]
+
+
+def _packager(llm, llm_request, topic, after_tool):
+    # The templated instruction lists every channel's content between these markers
+    instruction = _instruction(llm_request)
+    start = instruction.find("You have:")
+    end = instruction.find("Create a comprehensive")
+    channels = instruction[start + len("You have:"):end].strip() if 0 <= start < end else ""
+    return [types.Part(text=f"# Content Package: {topic}\n\n## Executive Summary\n\n{_words(50, topic)}.\n\n{channels}")]
+
+
+def _analyzer(llm, llm_request, topic, after_tool):
+    if after_tool:
+        results = [part.function_response for part in llm_request.contents[-1].parts if part.function_response]
+        lines = [f"- {result.name}: {result.response}" for result in results]
+        return [types.Part(text="📊 Content Analysis\n\n" + "\n".join(lines))]
+    text = snippet_text(llm_request)
+    return (
+        _call("count_words", text=text)
+        + _call("calculate_readability_score", text=text)
+        + _call("generate_hashtags", text=text, count=5)
+    )
+
+
+_HANDLERS: Dict[str, Callable] = {
+    "master_orchestrator_agent": _orchestrator,
+    "content_creation_coordinator": _coordinator,
+    "intake_agent": _intake,
+    "topic_research_agent": _research,
+    "content_drafter_agent": _drafter,
+    "quality_checker_agent": _quality_checker,
+    "content_improver_agent": _improver,
+    "blog_post_writer_agent": _blog,
+    "social_media_creator_agent": _social,
+    "email_newsletter_writer_agent": _email,
+    "seo_metadata_agent": _seo,
+    "final_packager_agent": _packager,
+    "content_analyzer_agent": _analyzer,
+}
+
+
+def fake_model(name: str, agent_name: str) -> FakeLlm:
+    """FakeLlm for an agent, configured from FAKE_* environment variables."""
+    return FakeLlm(
+        model=name,
+        agent_name=agent_name,
+        latency=os.environ.get("FAKE_LATENCY", "fixed:0"),
+        loop_iterations=int(os.environ.get("FAKE_LOOP_ITERATIONS", "1")),
+        draft_words=int(os.environ.get("FAKE_DRAFT_WORDS", "600")),
+        seed=int(os.environ.get("FAKE_SEED", "0")),
+    )
@@ -0,0 +1,45 @@
+"""Deterministic stand-ins for agents whose model is unavailable."""
+
+from typing import Callable, Dict
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai.types import Content, Part
+
+from content_creation_studio.tools import calculate_readability_score, count_words, generate_hashtags
+
+
+def _last_user_text(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents):
+        if content.role == "user":
+            text = "".join(part.text for part in content.parts or [] if part.text)
+            if text:
+                return text
+    return ""
+
+
+def snippet_text(llm_request: LlmRequest) -> str:
+    """The text to analyze, without the request line ("Can you analyze this text snippet:")."""
+    text = _last_user_text(llm_request)
+    head, sep, body = text.partition(":\n")
+    if sep and "\n" not in head:
+        text = body.strip()
+    return text
+
+
+def local_analysis(llm_request: LlmRequest) -> LlmResponse:
+    """Runs the analyzer's tools directly and formats their results as the report."""
+    text = snippet_text(llm_request)
+    readability = calculate_readability_score(text)
+    report = "\n".join([
+        "📊 Content Analysis (local)",
+        "",
+        f"- Word count: {count_words(text)}",
+        f"- Readability: {readability['score']} ({readability['grade']})",
+        f"- Hashtags: {' '.join(generate_hashtags(text, 5))}",
+    ])
+    return LlmResponse(content=Content(role="model", parts=[Part(text=report)]))
+
+
+DETERMINISTIC_FALLBACKS: Dict[str, Callable[[LlmRequest], LlmResponse]] = {
+    "content_analyzer_agent": local_analysis,
+}
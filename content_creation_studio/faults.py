@@ -0,0 +1,32 @@
+"""Fault injection for exercising retries, hedging and circuit breakers locally."""
+
+import asyncio
+import random
+from typing import AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+
+class InjectedFault(RuntimeError):
+    """Raised in place of a model call by FaultyLlm."""
+
+
+class FaultyLlm(BaseLlm):
+    """Fails a fraction of calls and adds latency before delegating to the inner model."""
+
+    inner: BaseLlm
+    error_rate: float = 0.0
+    extra_latency_seconds: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.extra_latency_seconds:
+            await asyncio.sleep(random.uniform(0, 2 * self.extra_latency_seconds))
+        if random.random() < self.error_rate:
+            raise InjectedFault(f"injected failure calling {self.model}")
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            yield response
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
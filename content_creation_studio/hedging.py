@@ -0,0 +1,158 @@
+"""Hedged model requests for straggler calls.
+
+If a model call hasn't returned by its agent's observed p95 latency, a
+duplicate request is fired; whichever finishes first wins and the other is
+cancelled. Hedges are paid for from a budget that grows with primary calls,
+which caps extra calls (5% by default) and keeps hedging from multiplying
+load when the endpoint is already rate limited or slow across the board.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+
+class RollingLatency:
+    """Latencies of the most recent calls for one agent."""
+
+    def __init__(self, window: int = 200):
+        self.samples: "deque[float]" = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgeBudget:
+    """Token bucket: each primary call adds `ratio` tokens, each hedge spends one."""
+
+    def __init__(self, ratio: float = 0.05, burst: float = 2.0, max_inflight: int = 4):
+        self.ratio = ratio
+        self.burst = burst
+        self.max_inflight = max_inflight
+        self.tokens = 0.0
+        self.inflight = 0
+
+    def on_primary(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        if self.tokens >= 1 and self.inflight < self.max_inflight:
+            self.tokens -= 1
+            self.inflight += 1
+            return True
+        return False
+
+    def release(self):
+        self.inflight -= 1
+
+
+class HedgingController:
+    """Per-agent latency windows, the shared hedge budget and counters."""
+
+    def __init__(self, percentile: float = 0.95, min_samples: int = 20, budget: Optional[HedgeBudget] = None):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget or HedgeBudget()
+        self.latencies: Dict[str, RollingLatency] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def threshold(self, agent_name: str) -> Optional[float]:
+        window = self.latencies.get(agent_name)
+        if window is None or len(window.samples) < self.min_samples:
+            return None
+        return window.percentile(self.percentile)
+
+    def record(self, agent_name: str, seconds: float):
+        self.latencies.setdefault(agent_name, RollingLatency()).record(seconds)
+
+    def count(self, agent_name: str, key: str):
+        counters = self.counters.setdefault(agent_name, {"calls": 0, "hedges": 0, "hedge_wins": 0})
+        counters[key] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            agent: {
+                **counters,
+                "threshold_seconds": self.threshold(agent),
+            }
+            for agent, counters in self.counters.items()
+        }
+
+
+hedging_controller = HedgingController(
+    percentile=float(os.environ.get("HEDGE_PERCENTILE", "0.95")),
+    budget=HedgeBudget(ratio=float(os.environ.get("HEDGE_BUDGET_RATIO", "0.05"))),
+)
+
+
+class HedgedLlm(BaseLlm):
+    """Wraps a model so that slow calls are hedged with a duplicate request."""
+
+    inner: BaseLlm
+    agent_name: str
+
+    async def _collect(self, llm_request: LlmRequest) -> List[LlmResponse]:
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream=False):
+            responses.append(response)
+        return responses
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        controller = hedging_controller
+        controller.count(self.agent_name, "calls")
+        if stream:
+            async for response in self.inner.generate_content_async(llm_request, stream=True):
+                yield response
+            return
+
+        controller.budget.on_primary()
+        threshold = controller.threshold(self.agent_name)
+        start = time.monotonic()
+        primary = asyncio.create_task(self._collect(llm_request))
+        tasks = {primary}
+        hedged = False
+        try:
+            if threshold is not None:
+                done, _ = await asyncio.wait(tasks, timeout=threshold)
+                if not done and controller.budget.try_acquire():
+                    hedged = True
+                    controller.count(self.agent_name, "hedges")
+                    tasks.add(asyncio.create_task(self._collect(llm_request.model_copy(deep=True))))
+
+            winner = None
+            error = None
+            while tasks and winner is None:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    error = task.exception()
+            if winner is None:
+                raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if hedged:
+                controller.budget.release()
+
+        controller.record(self.agent_name, time.monotonic() - start)
+        if winner is not primary:
+            controller.count(self.agent_name, "hedge_wins")
+        for response in winner.result():
+            yield response
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
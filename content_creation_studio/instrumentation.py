@@ -0,0 +1,159 @@
+"""Sampled, structured instrumentation for the function tools.
+
+`@instrumented` records each call's duration, input size (characters of
+string arguments) and result size (length of the returned string or
+collection). Levels, from TOOL_INSTRUMENTATION at import time:
+
+- "off": the decorator returns the function unchanged, so there is no cost.
+- "sampled" (default): per-tool totals for every call. TOOL_SAMPLE_RATE of
+  calls (and every error) also go to a ring buffer of recent records and
+  are logged as JSON.
+- "debug": every call is recorded and logged as a human-readable line.
+
+Log records go through a queue to a background thread that writes them to
+stdout, so tools never block on the console. Tools may run on worker
+threads (see offload.py), so totals and the log listener are guarded by a lock.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+OFF = "off"
+SAMPLED = "sampled"
+DEBUG = "debug"
+
+logger = logging.getLogger("content_creation_studio.tools")
+
+
+def _size(value) -> int:
+    return len(value) if isinstance(value, (str, bytes, list, tuple, dict, set)) else 0
+
+
+def input_size(args, kwargs) -> int:
+    return sum(len(value) for value in (*args, *kwargs.values()) if isinstance(value, str))
+
+
+class ToolStats:
+    """Per-tool totals and a ring buffer of sampled call records."""
+
+    def __init__(self, level: str = SAMPLED, sample_rate: float = 0.01, buffer_size: int = 1000):
+        if level not in (OFF, SAMPLED, DEBUG):
+            raise ValueError(f"Unknown tool instrumentation level: {level!r} (use '{OFF}', '{SAMPLED}' or '{DEBUG}')")
+        self.level = level
+        self.sample_rate = sample_rate
+        self.recent = deque(maxlen=buffer_size)
+        # name -> [calls, errors, seconds, max seconds, input size, result size]
+        self.totals: Dict[str, list] = {}
+        self._rng = random.Random()
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._lock = threading.Lock()
+
+    def _ship(self, record: dict):
+        if self._listener is None:
+            with self._lock:
+                # Checked again, so two threads shipping their first record start one listener
+                if self._listener is None:
+                    self._start_shipping()
+        if self.level == DEBUG:
+            status = f"❌ {record['error']}" if record["error"] else f"{record['result_size']} result"
+            logger.info(
+                f"🔧 Tool: {record['tool']} ({record['input_size']} input chars) → {status} "
+                f"in {record['seconds'] * 1000:.2f} ms"
+            )
+        else:
+            logger.info(json.dumps(record))
+
+    def _start_shipping(self):
+        records = queue.SimpleQueue()
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    def record(self, tool: str, seconds: float, input_size: int, result_size: int, error: Optional[str] = None):
+        record = None
+        with self._lock:
+            totals = self.totals.get(tool)
+            if totals is None:
+                totals = self.totals[tool] = [0, 0, 0.0, 0.0, 0, 0]
+            totals[0] += 1
+            totals[1] += error is not None
+            totals[2] += seconds
+            totals[3] = max(totals[3], seconds)
+            totals[4] += input_size
+            totals[5] += result_size
+            if self.level == DEBUG or error is not None or self._rng.random() < self.sample_rate:
+                record = {
+                    "tool": tool,
+                    "timestamp": time.time(),
+                    "seconds": round(seconds, 6),
+                    "input_size": input_size,
+                    "result_size": result_size,
+                    "error": error,
+                }
+                self.recent.append(record)
+        if record is not None:
+            self._ship(record)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            totals = {tool: list(values) for tool, values in self.totals.items()}
+            recent = list(self.recent)
+        return {
+            "level": self.level,
+            "sample_rate": self.sample_rate,
+            "tools": {
+                tool: {
+                    "calls": calls,
+                    "errors": errors,
+                    "mean_ms": round(seconds / calls * 1000, 3) if calls else 0.0,
+                    "max_ms": round(max_seconds * 1000, 3),
+                    "mean_input_size": round(input_size / calls) if calls else 0,
+                    "mean_result_size": round(result_size / calls) if calls else 0,
+                }
+                for tool, (calls, errors, seconds, max_seconds, input_size, result_size) in totals.items()
+            },
+            "recent": recent,
+        }
+
+
+tool_stats = ToolStats(
+    level=os.environ.get("TOOL_INSTRUMENTATION", SAMPLED),
+    sample_rate=float(os.environ.get("TOOL_SAMPLE_RATE", "0.01")),
+    buffer_size=int(os.environ.get("TOOL_TRACE_BUFFER", "1000")),
+)
+
+
+def instrumented(fn: Callable) -> Callable:
+    """Records calls of a tool function; keeps its signature for ADK's schema generation."""
+    if tool_stats.level == OFF:
+        return fn
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            tool_stats.record(name, time.perf_counter() - start, input_size(args, kwargs), 0, type(e).__name__)
+            raise
+        tool_stats.record(name, time.perf_counter() - start, input_size(args, kwargs), _size(result))
+        return result
+
+    return wrapper
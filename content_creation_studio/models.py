@@ -0,0 +1,85 @@
+"""Model selection for the studio's agents."""
+
+import os
+from typing import Dict, Union
+
+from google.adk.models import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.registry import LLMRegistry
+
+from content_creation_studio.cassettes import CassetteLlm, cassettes_enabled
+from content_creation_studio.connections import PooledGemini, pool_enabled
+
+# Agents that coordinate others use COORDINATOR_MODEL; everything else WORKER_MODEL
+COORDINATOR_AGENTS = {"content_creation_coordinator", "master_orchestrator_agent"}
+
+_shared_models: Dict[str, BaseLlm] = {}
+
+
+def shared_model(name: str) -> BaseLlm:
+    """One model instance (and API client) per model name for the whole process.
+
+    Gemini models send their calls through the shared connection pool
+    (see connections.py) unless HTTP_POOL=0.
+    """
+    if name not in _shared_models:
+        if pool_enabled() and LLMRegistry.resolve(name) is Gemini:
+            _shared_models[name] = PooledGemini(model=name)
+        else:
+            _shared_models[name] = LLMRegistry.new_llm(name)
+    return _shared_models[name]
+
+
+def get_model(agent_name: str) -> Union[str, BaseLlm]:
+    """Returns the model an agent should use, wrapped according to configuration.
+
+    - By default, the shared model instance for its name (a plain name with HTTP_POOL=0)
+    - MODEL_BACKEND=fake answers offline with canned responses (see fake_llm.py)
+    - MODEL_FAULT_RATE / MODEL_FAULT_LATENCY_SECONDS inject failures and delay (FaultyLlm)
+    - MODEL_HEDGING=1 hedges straggler calls (HedgedLlm)
+    - MODEL_CIRCUIT_BREAKER=1 routes to a fallback while the model is failing (BreakerLlm)
+    - CASSETTE_DIR set: answers from the run's cassette when one is replaying (CassetteLlm)
+    """
+    if agent_name in COORDINATOR_AGENTS:
+        name = os.environ.get("COORDINATOR_MODEL", "gemini-2.5-flash")
+    else:
+        name = os.environ.get("WORKER_MODEL", "gemini-2.5-flash")
+
+    fault_rate = float(os.environ.get("MODEL_FAULT_RATE", "0"))
+    fault_latency = float(os.environ.get("MODEL_FAULT_LATENCY_SECONDS", "0"))
+    hedging = os.environ.get("MODEL_HEDGING", "0") == "1"
+    breaker = os.environ.get("MODEL_CIRCUIT_BREAKER", "0") == "1"
+    fake = os.environ.get("MODEL_BACKEND", "gemini") == "fake"
+    cassettes = cassettes_enabled()
+    if not (fake or fault_rate or fault_latency or hedging or breaker or cassettes):
+        # A name string would be resolved to a new model, and API client, on every call
+        return shared_model(name) if pool_enabled() else name
+
+    if fake:
+        from content_creation_studio.fake_llm import fake_model
+        model = fake_model(name, agent_name)
+    else:
+        model = shared_model(name)
+    if fault_rate or fault_latency:
+        from content_creation_studio.faults import FaultyLlm
+        model = FaultyLlm(
+            model=model.model, inner=model, error_rate=fault_rate, extra_latency_seconds=fault_latency
+        )
+    if hedging:
+        from content_creation_studio.hedging import HedgedLlm
+        model = HedgedLlm(model=model.model, inner=model, agent_name=agent_name)
+    if breaker:
+        from content_creation_studio.breaker import BreakerLlm
+        from content_creation_studio.fallbacks import DETERMINISTIC_FALLBACKS
+        fallback_name = os.environ.get("FALLBACK_MODEL")
+        model = BreakerLlm(
+            model=model.model,
+            inner=model,
+            agent_name=agent_name,
+            fallback=shared_model(fallback_name) if fallback_name else None,
+            fallback_response=DETERMINISTIC_FALLBACKS.get(agent_name),
+        )
+    if cassettes:
+        # Outermost, so a replayed call skips injected faults, hedging and the breaker
+        model = CassetteLlm(model=model.model, inner=model, agent_name=agent_name)
+    return model
@@ -0,0 +1,143 @@
+"""Execution policy for CPU-bound tools: inline for small inputs, a worker pool for large ones.
+
+Tools declared with `@cpu_bound` stay plain functions, so direct callers
+are unaffected. `offloaded(fn)` turns one into an async function with the
+same signature for FunctionTool. Calls whose string arguments total fewer
+than the tool's threshold (TOOL_OFFLOAD_MIN_CHARS by default) run inline.
+Larger calls go to a thread or process pool (TOOL_EXECUTOR, sized by
+TOOL_WORKERS), so one big input no longer stalls every other stream on
+the event loop. TOOL_EXECUTOR=inline turns offloading off.
+
+Threads share the GIL, but the interpreter switches between threads every
+few milliseconds, so the loop keeps serving requests while a tool runs.
+Processes run tools truly in parallel, at the cost of pickling arguments
+and results, and the first calls wait for the workers to start; calls
+made in a worker process don't appear in the server's tool_stats.
+"""
+
+import asyncio
+import functools
+import importlib
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, Optional, Tuple
+
+from content_creation_studio.instrumentation import input_size
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+# name -> (module, function) of every tool declared CPU-bound
+CPU_BOUND_TOOLS: Dict[str, Tuple[str, Callable]] = {}
+
+DEFAULT_MIN_CHARS = int(os.environ.get("TOOL_OFFLOAD_MIN_CHARS", "20000"))
+
+
+def cpu_bound(fn: Optional[Callable] = None, *, min_chars: Optional[int] = None):
+    """Declares a tool CPU-bound; offload calls with at least `min_chars` characters of input."""
+
+    def declare(fn: Callable) -> Callable:
+        fn.offload_min_chars = DEFAULT_MIN_CHARS if min_chars is None else min_chars
+        CPU_BOUND_TOOLS[fn.__name__] = (fn.__module__, fn)
+        return fn
+
+    return declare(fn) if fn is not None else declare
+
+
+def _run_in_worker(name: str, module: str, args: tuple, kwargs: dict):
+    """Runs a registered tool; also the entry point in worker processes, where it imports the tool's module."""
+    if name not in CPU_BOUND_TOOLS:
+        importlib.import_module(module)
+    fn = CPU_BOUND_TOOLS[name][1]
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class OffloadStats:
+    """Loop time spent on inline calls against worker time and dispatch overhead of offloaded ones."""
+
+    def __init__(self):
+        # name -> [inline calls, inline seconds, offloaded calls, worker seconds, wall seconds]
+        self.tools: Dict[str, list] = {}
+
+    def _entry(self, name: str) -> list:
+        entry = self.tools.get(name)
+        if entry is None:
+            entry = self.tools[name] = [0, 0.0, 0, 0.0, 0.0]
+        return entry
+
+    def record_inline(self, name: str, seconds: float):
+        entry = self._entry(name)
+        entry[0] += 1
+        entry[1] += seconds
+
+    def record_offloaded(self, name: str, worker_seconds: float, wall_seconds: float):
+        entry = self._entry(name)
+        entry[2] += 1
+        entry[3] += worker_seconds
+        entry[4] += wall_seconds
+
+    def snapshot(self) -> dict:
+        tools = {}
+        for name, (inline_calls, inline_seconds, offloaded_calls, worker_seconds, wall_seconds) in self.tools.items():
+            overhead = max(0.0, wall_seconds - worker_seconds)
+            tools[name] = {
+                "inline_calls": inline_calls,
+                "inline_loop_seconds": round(inline_seconds, 4),
+                "offloaded_calls": offloaded_calls,
+                # Time the tool ran off the loop, which it would otherwise have blocked
+                "loop_seconds_saved": round(worker_seconds, 4),
+                # Queueing, handoff, waiting for the GIL (threads) or pickling and worker start-up (processes)
+                "dispatch_overhead_seconds": round(overhead, 4),
+                "mean_dispatch_overhead_ms": round(overhead / offloaded_calls * 1000, 3) if offloaded_calls else 0.0,
+            }
+        return {"executor": executor_kind(), "min_chars": DEFAULT_MIN_CHARS, "tools": tools}
+
+
+offload_stats = OffloadStats()
+
+_executor: Optional[Executor] = None
+
+
+def executor_kind() -> str:
+    return os.environ.get("TOOL_EXECUTOR", THREAD)
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        kind = executor_kind()
+        workers = int(os.environ.get("TOOL_WORKERS", min(4, os.cpu_count() or 1)))
+        if kind == PROCESS:
+            # Spawned, not forked: the server process has running threads and open connections
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        elif kind == THREAD:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tool-worker")
+        else:
+            raise ValueError(f"Unknown tool executor: {kind!r} (use '{INLINE}', '{THREAD}' or '{PROCESS}')")
+    return _executor
+
+
+def offloaded(fn: Callable) -> Callable:
+    """An async version of a `@cpu_bound` tool that offloads large calls; other functions are returned as is."""
+    if fn.__name__ not in CPU_BOUND_TOOLS or executor_kind() == INLINE:
+        return fn
+    name, module, min_chars = fn.__name__, fn.__module__, fn.offload_min_chars
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        if input_size(args, kwargs) < min_chars:
+            result = fn(*args, **kwargs)
+            offload_stats.record_inline(name, time.perf_counter() - start)
+            return result
+        loop = asyncio.get_running_loop()
+        result, worker_seconds = await loop.run_in_executor(get_executor(), _run_in_worker, name, module, args, kwargs)
+        offload_stats.record_offloaded(name, worker_seconds, time.perf_counter() - start)
+        return result
+
+    return wrapper
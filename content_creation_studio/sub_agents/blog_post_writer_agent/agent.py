@@ -1,8 +1,9 @@
 from google.adk.agents import Agent
+from content_creation_studio.models import get_model
 
 blog_post_writer_agent = Agent(
     name="blog_post_writer_agent",
-    model="gemini-2.5-flash",
+    model=get_model("blog_post_writer_agent"),
     instruction="""
     You are a professional blog writer. Create the final polished blog post from: {{current_content}}
 
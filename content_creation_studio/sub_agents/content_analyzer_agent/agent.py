@@ -1,10 +1,12 @@
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from content_creation_studio.tools import count_words, calculate_readability_score, generate_hashtags
+from content_creation_studio.models import get_model
+from content_creation_studio.offload import offloaded
 
 content_analyzer_agent = Agent(
     name="content_analyzer_agent",
-    model="gemini-2.5-flash",
+    model=get_model("content_analyzer_agent"),
     instruction="""
     You are a content analysis expert. Analyze the provided text.
 
@@ -16,8 +18,9 @@ content_analyzer_agent = Agent(
     Provide a clear analysis report.
     """,
     tools=[
-        FunctionTool(count_words),
-        FunctionTool(calculate_readability_score),
-        FunctionTool(generate_hashtags)
+        # Large snippets run in the tool worker pool instead of on the event loop
+        FunctionTool(offloaded(count_words)),
+        FunctionTool(offloaded(calculate_readability_score)),
+        FunctionTool(offloaded(generate_hashtags))
     ]
 )
@@ -1,8 +1,9 @@
 from google.adk.agents import Agent
+from content_creation_studio.models import get_model
 
 content_drafter_agent = Agent(
     name="content_drafter_agent",
-    model="gemini-2.5-flash",
+    model=get_model("content_drafter_agent"),
     instruction="""
     You are a content writer. Write a blog post: {{blog_topic}}
 
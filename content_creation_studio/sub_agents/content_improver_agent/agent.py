@@ -1,12 +1,13 @@
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from content_creation_studio.tools import exit_loop, QUALITY_THRESHOLD_MET
+from content_creation_studio.models import get_model
 
 
 
 content_improver_agent = Agent(
       name="content_improver_agent",
-      model="gemini-2.5-flash",
+      model=get_model("content_improver_agent"),
       instruction=f"""
       Current content: {{{{current_content}}}}
       Feedback: {{{{quality_feedback}}}}
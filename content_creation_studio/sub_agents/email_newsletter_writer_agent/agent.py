@@ -1,8 +1,9 @@
 from google.adk.agents import Agent
+from content_creation_studio.models import get_model
 
 email_newsletter_writer_agent = Agent(
     name="email_newsletter_writer_agent",
-    model="gemini-2.5-flash",
+    model=get_model("email_newsletter_writer_agent"),
     instruction="""
     You are an email marketing specialist. Create a newsletter from: {{current_content}}
 
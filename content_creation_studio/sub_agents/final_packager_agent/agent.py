@@ -1,8 +1,9 @@
 from google.adk.agents import Agent
+from content_creation_studio.models import get_model
 
 final_packager_agent = Agent(
     name="final_packager_agent",
-    model="gemini-2.5-flash",
+    model=get_model("final_packager_agent"),
     instruction="""
     You are a content package coordinator. Assemble the final deliverable.
 
@@ -19,6 +20,9 @@ final_packager_agent = Agent(
     4. 📧 Email Newsletter section
     5. 🔍 SEO Metadata section
 
+    A value starting with "[missing:" means that channel could not be produced.
+    Keep its section and state briefly that it is unavailable; do not invent it.
+
     Present everything with proper formatting and clear section headers.
     Add a brief summary at the top.
     """,
@@ -1,10 +1,11 @@
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from content_creation_studio.tools import update_session_state
+from content_creation_studio.models import get_model
 
 intake_agent = Agent(
     name="intake_agent",
-    model="gemini-2.5-flash",
+    model=get_model("intake_agent"),
     instruction="""
     You are a content brief analyzer. From the user's request, identify:
     - Main topic
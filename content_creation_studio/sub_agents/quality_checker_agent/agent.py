@@ -1,10 +1,11 @@
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from content_creation_studio.tools import calculate_content_quality_score, QUALITY_THRESHOLD_MET
+from content_creation_studio.models import get_model
 
 quality_checker_agent = Agent(
     name="quality_checker_agent",
-    model="gemini-2.5-flash",
+    model=get_model("quality_checker_agent"),
     instruction=f"""
     You are a content quality analyst. Analyze: {{{{current_content}}}}
 
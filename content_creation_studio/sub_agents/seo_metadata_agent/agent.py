@@ -1,8 +1,9 @@
 from google.adk.agents import Agent
+from content_creation_studio.models import get_model
 
 seo_metadata_agent = Agent(
     name="seo_metadata_agent",
-    model="gemini-2.5-flash",
+    model=get_model("seo_metadata_agent"),
     instruction="""
     You are an SEO specialist. Generate metadata for: {{topic}}
 
@@ -1,8 +1,9 @@
 from google.adk.agents import Agent
+from content_creation_studio.models import get_model
 
 social_media_creator_agent = Agent(
     name="social_media_creator_agent",
-    model="gemini-2.5-flash",
+    model=get_model("social_media_creator_agent"),
     instruction="""
     You are a social media specialist. Create posts from: {{current_content}}
 
@@ -1,9 +1,10 @@
 from google.adk.agents import Agent
 from google.adk.tools import google_search
+from content_creation_studio.models import get_model
 
 topic_research_agent = Agent(
     name="topic_research_agent",
-    model="gemini-2.5-flash",
+    model=get_model("topic_research_agent"),
     instruction="""
     You are a topic research expert. For topic: {{topic}}
 
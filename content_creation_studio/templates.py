@@ -0,0 +1,11 @@
+"""The content request message shared by the API server and benchmarks."""
+
+
+def content_request_query(topic: str, target_audience: str, tone: str, keywords: str) -> str:
+    """The user message the API server sends for a content package request."""
+    return f"""Create a complete content package for:
+- Topic: {topic}
+- Target Audience: {target_audience}
+- Tone: {tone}
+- Keywords: {keywords}
+"""
@@ -2,19 +2,22 @@ import re
 from typing import List
 from google.adk.tools import ToolContext
 
+from content_creation_studio.instrumentation import instrumented
+from content_creation_studio.offload import cpu_bound
+
 # --- Content Analysis Tools ---
 
+@cpu_bound
+@instrumented
 def count_words(text: str) -> int:
     """Counts the number of words in the provided text."""
-    print(f"🔧 Tool: Counting words...")
     count = len(text.split())
-    print(f"   Result: {count} words")
     return count
 
+@cpu_bound
+@instrumented
 def calculate_readability_score(text: str) -> dict:
     """Calculates a readability score (0-100, higher is easier to read)."""
-    print(f"🔧 Tool: Calculating readability...")
-
     sentences = [s.strip() for s in text.split('.') if s.strip()]
     if not sentences:
         return {"score": 0, "grade": "Unable to calculate"}
@@ -38,7 +41,6 @@ def calculate_readability_score(text: str) -> dict:
         grade = "Complex"
 
     result = {"score": round(score, 2), "grade": grade}
-    print(f"   Result: {result['score']} - {result['grade']}")
     return result
 
 def count_syllables(word: str) -> int:
@@ -59,10 +61,10 @@ def count_syllables(word: str) -> int:
 
     return max(1, syllable_count)
 
+@cpu_bound
+@instrumented
 def generate_hashtags(text: str, count: int) -> List[str]:
     """Generates relevant hashtags from text by extracting key terms."""
-    print(f"🔧 Tool: Generating {count} hashtags...")
-
     stop_words = {
         'the', 'is', 'at', 'which', 'on', 'a', 'an', 'as', 'are', 'was', 'were',
         'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
@@ -81,11 +83,11 @@ def generate_hashtags(text: str, count: int) -> List[str]:
     top_words = [word for word, freq in sorted_words[:count]]
     hashtags = [f"#{word.capitalize()}" for word in top_words]
 
-    print(f"   Result: {', '.join(hashtags)}")
     return hashtags
 
 # --- Quality Check Tool ---
 
+@instrumented
 def calculate_content_quality_score(
     word_count: int,
     readability_score: float,
@@ -93,8 +95,6 @@ def calculate_content_quality_score(
     has_conclusion: bool
 ) -> dict:
     """Calculates overall content quality score based on multiple factors."""
-    print(f"🔧 Tool: Calculating quality score...")
-
     # Word count scoring
     if word_count < 500:
         word_score = 30
@@ -124,11 +124,11 @@ def calculate_content_quality_score(
         "meets_threshold": overall_score >= 70
     }
 
-    print(f"   Result: {result['overall_score']}/100 (Threshold: {'MET' if result['meets_threshold'] else 'NOT MET'})")
     return result
 
 # --- Session State Management ---
 
+@instrumented
 def update_session_state(
     tool_context: ToolContext,
     topic: str,
@@ -137,12 +137,10 @@ def update_session_state(
     keywords: str
 ) -> str:
     """Saves extracted content brief parameters to session state."""
-    print(f"🔧 Tool: Updating session state...")
     tool_context.state['topic'] = topic
     tool_context.state['target_audience'] = target_audience
     tool_context.state['tone'] = tone
     tool_context.state['keywords'] = keywords
-    print(f"   Saved: {topic} | {target_audience} | {tone}")
     # A best practice for tools is to return a status message in a return dict
     return {"status": "success"}
 
@@ -150,8 +148,8 @@ def update_session_state(
 
 QUALITY_THRESHOLD_MET = "QUALITY_THRESHOLD_MET"
 
+@instrumented
 def exit_loop(tool_context: ToolContext):
     """Terminates the improvement loop when quality meets threshold."""
-    print(f"🔧 Tool: Quality approved. Terminating loop...")
     tool_context.actions.escalate = True
     return {"result": "Quality threshold met. Content approved."}
@@ -0,0 +1,75 @@
+"""Token usage of a whole run, nested AgentTool runs included, reported on its final response.
+
+Agent Engine streams only the root agent's own events: the pipeline's
+stages run inside AgentTool, whose nested runner doesn't forward theirs,
+so a client of the deployed app can't see what most of a run cost.
+UsageReportPlugin, registered on the deployed AdkApp, sums the usage of
+every model response per agent (AgentTool hands the app's plugins to its
+nested runners) and attaches the totals to the root run's final response
+event as `custom_metadata["usage_by_agent"]`:
+
+    {agent: {"model", "calls", "prompt_tokens", "output_tokens", "cached_tokens"}}
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+USAGE_KEY = "usage_by_agent"
+
+
+@dataclass
+class _RunUsage:
+    invocation_id: str
+    by_agent: Dict[str, dict] = field(default_factory=dict)
+
+
+# Usage of the root run driven by the current task; nested runs share their parent's
+_run_usage: ContextVar[Optional[_RunUsage]] = ContextVar("run_usage", default=None)
+
+
+class UsageReportPlugin(BasePlugin):
+    """Adds the run's per-agent token totals to its final response event."""
+
+    def __init__(self):
+        super().__init__(name="usage_report")
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext):
+        if _run_usage.get() is None:
+            _run_usage.set(_RunUsage(invocation_context.invocation_id))
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        run = _run_usage.get()
+        usage = llm_response.usage_metadata
+        if run is None or llm_response.partial or usage is None:
+            return None
+        totals = run.by_agent.setdefault(
+            callback_context.agent_name,
+            {"model": llm_response.model_version or "", "calls": 0, "prompt_tokens": 0, "output_tokens": 0,
+             "cached_tokens": 0},
+        )
+        totals["calls"] += 1
+        totals["prompt_tokens"] += usage.prompt_token_count or 0
+        totals["output_tokens"] += usage.candidates_token_count or 0
+        totals["cached_tokens"] += usage.cached_content_token_count or 0
+        return None
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event):
+        run = _run_usage.get()
+        if run is None or event.invocation_id != run.invocation_id or event.partial or not event.is_final_response():
+            return None
+        report = {agent: dict(totals) for agent, totals in run.by_agent.items()}
+        return event.model_copy(update={"custom_metadata": {**(event.custom_metadata or {}), USAGE_KEY: report}})
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext):
+        run = _run_usage.get()
+        if run is not None and run.invocation_id == invocation_context.invocation_id:
+            _run_usage.set(None)
+        return None
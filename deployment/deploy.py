@@ -31,6 +31,8 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from content_creation_studio.agent import root_agent
+from content_creation_studio.usage import UsageReportPlugin
+from serving.remote_events import decode_stream
 
 # Load environment variables from .env file
 load_dotenv()
@@ -94,7 +96,8 @@ def deploy_to_agent_engine():
         agent=root_agent,
         app_name="content_creation",  # CRITICAL: Required for Memory Bank scope
         enable_tracing=True,
-        plugins=[LoggingPlugin()],  # Enable comprehensive observability logging
+        # Logging, plus per-agent token totals on each final response for the backend's budgets
+        plugins=[LoggingPlugin(), UsageReportPlugin()],
     )
 
     print("\n⏳ Step 1/3: Deploying agent (this may take several minutes)...")
@@ -168,17 +171,13 @@ async def test_remote_agent(resource_name: str):
     print(f"USER: {test_query}")
     print(f"{'─' * 40}")
     
-    async for event in remote_app.async_stream_query(
+    async for event in decode_stream(remote_app.async_stream_query(
         user_id="remote_test_user",
         session_id=remote_session["id"],
         message=test_query,
-    ):
-        content = event.get("content", event.get("parts", {}))
-        if isinstance(content, dict):
-            parts = content.get("parts", [])
-            for part in parts:
-                if part.get("text"):
-                    print(f"\nAGENT: {part['text']}")
+    )):
+        if event.text and not event.partial:
+            print(f"\nAGENT: {event.text}")
     
     print("\n✓ Remote testing complete!")
 
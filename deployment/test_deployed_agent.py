@@ -5,10 +5,17 @@ This script connects to your deployed agent and runs test queries.
 """
 
 import os
+import sys
 import asyncio
+from pathlib import Path
 import vertexai
 from vertexai import agent_engines
 
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from serving.remote_events import RemoteEvent, ResponseText, decode_stream
+
 # Configuration
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 REGION = os.environ.get("GOOGLE_CLOUD_REGION", "us-central1")
@@ -17,6 +24,25 @@ if not PROJECT_ID:
     raise ValueError("Please set GOOGLE_CLOUD_PROJECT environment variable")
 
 
+def print_event(event: RemoteEvent):
+    """Prints an agent's tool calls, state updates and text as they stream in."""
+    for call in event.function_calls:
+        print(f"🔧 {event.author} → {call.get('name')}")
+    if event.state_delta:
+        print(f"📝 {event.author} updated state: {', '.join(event.state_delta)}")
+    if event.text and not event.partial:
+        print(f"\n🤖 {event.author}: {event.text}\n")
+
+
+async def run_query(remote_agent, message: str, user_id: str) -> ResponseText:
+    response = ResponseText()
+    async for event in decode_stream(remote_agent.async_stream_query(message=message, user_id=user_id)):
+        print_event(event)
+        response.add(event)
+    print(f"✅ {len(response.text)} characters of response text")
+    return response
+
+
 async def test_deployed_agent():
     """Test the deployed Content Creation Studio agent."""
 
@@ -57,11 +83,7 @@ async def test_deployed_agent():
     print(f"Query: {query1[:100]}...")
     print("\nResponse:")
 
-    async for item in remote_agent.async_stream_query(
-        message=query1,
-        user_id="test_user_001"
-    ):
-        print(item)
+    await run_query(remote_agent, query1, "test_user_001")
 
     print("\n")
 
@@ -80,11 +102,7 @@ async def test_deployed_agent():
     print(f"Query: {query2}")
     print("\nResponse:")
 
-    async for item in remote_agent.async_stream_query(
-        message=query2,
-        user_id="test_user_001"
-    ):
-        print(item)
+    await run_query(remote_agent, query2, "test_user_001")
 
     print()
     print("=" * 70)
@@ -0,0 +1 @@
+"""Shared serving infrastructure for the Content Creation Studio API servers."""
@@ -0,0 +1,307 @@
+"""Token and cost accounting per request, user, stage and agent, with per-user budgets.
+
+Every model response's usage is charged to the run's RequestLedger (set in
+`current_ledger` by the server) and to process-wide aggregates. Prompt
+token counts include cached tokens, so the uncached part is billed at the
+input price and the cached part at the cached price.
+
+Budgets are in USD per user over a fixed window (USER_BUDGET_USD,
+USER_BUDGETS_USD for per-user overrides, USER_BUDGET_WINDOW_SECONDS). A
+request whose estimated cost (moving average of completed requests to the
+same entry) would overrun the user's remaining budget is rejected, or with
+BUDGET_ACTION=downgrade runs on DOWNGRADE_MODEL instead; a user with no
+budget left is always rejected. An admitted request reserves its estimate
+until it finishes, so concurrent requests can't all spend the same
+remaining budget; `finish` releases the reservation once the actual cost
+has been charged.
+"""
+
+import json
+import os
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+ADMIT = "admit"
+DOWNGRADE = "downgrade"
+REJECT = "reject"
+
+# USD per million tokens: (input, output, cached input)
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gemini-2.5-pro": (1.25, 10.00, 0.31),
+    "gemini-2.5-flash-lite": (0.10, 0.40, 0.025),
+    "gemini-2.5-flash": (0.30, 2.50, 0.075),
+    "gemini-2.0-flash-lite": (0.075, 0.30, 0.01875),
+    "gemini-2.0-flash": (0.10, 0.40, 0.025),
+}
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# custom_metadata key of the per-agent usage a deployed app reports (content_creation_studio/usage.py)
+USAGE_REPORT_KEY = "usage_by_agent"
+
+# Ledger of the request driven by the current task; inherited by child tasks
+current_ledger: ContextVar[Optional["RequestLedger"]] = ContextVar("request_ledger", default=None)
+
+
+def price_for(model: str, prices: Dict[str, Tuple[float, float, float]] = MODEL_PRICES) -> Tuple[float, float, float]:
+    """Prices of the longest known model name that `model` starts with (versioned names match)."""
+    name = (model or DEFAULT_MODEL).split("/")[-1]
+    matches = [known for known in prices if name.startswith(known)]
+    return prices[max(matches, key=len)] if matches else prices[DEFAULT_MODEL]
+
+
+@dataclass
+class Usage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def add(self, prompt: int, output: int, cached: int, cost: float, calls: int = 1):
+        self.calls += calls
+        self.prompt_tokens += prompt
+        self.output_tokens += output
+        self.cached_tokens += cached
+        self.cost_usd += cost
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["cost_usd"] = round(self.cost_usd, 6)
+        return data
+
+
+class RequestLedger:
+    """Usage of one request, broken down by workflow stage and agent."""
+
+    def __init__(self, user_id: str, entry: str, decision: str = ADMIT, downgrade_model: Optional[str] = None):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.user_id = user_id
+        self.entry = entry
+        self.decision = decision
+        self.downgrade_model = downgrade_model
+        # USD held against the user's budget until the request finishes
+        self.reserved_usd = 0.0
+        self.finished = False
+        self.total = Usage()
+        self.by_stage: Dict[str, Usage] = {}
+        self.by_agent: Dict[str, Usage] = {}
+
+    def summary(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "user_id": self.user_id,
+            "downgraded_to": self.downgrade_model,
+            **self.total.to_dict(),
+            "by_stage": {name: usage.to_dict() for name, usage in self.by_stage.items()},
+            "by_agent": {name: usage.to_dict() for name, usage in self.by_agent.items()},
+        }
+
+
+class TokenAccounting:
+    def __init__(
+        self,
+        default_budget_usd: float = 0.0,
+        user_budgets_usd: Optional[Dict[str, float]] = None,
+        window_seconds: float = 86400,
+        action: str = REJECT,
+        downgrade_model: str = "gemini-2.5-flash-lite",
+        prices: Optional[Dict[str, Tuple[float, float, float]]] = None,
+        smoothing: float = 0.2,
+        recent: int = 50,
+    ):
+        if action not in (REJECT, DOWNGRADE):
+            raise ValueError(f"Unknown budget action: {action!r} (use '{REJECT}' or '{DOWNGRADE}')")
+        self.default_budget_usd = default_budget_usd
+        self.user_budgets_usd = user_budgets_usd or {}
+        self.window_seconds = window_seconds
+        self.action = action
+        self.downgrade_model = downgrade_model
+        self.prices = {**MODEL_PRICES, **(prices or {})}
+        self.smoothing = smoothing
+        self.total = Usage()
+        self.requests = 0
+        self.rejected = 0
+        self.downgraded = 0
+        self.by_user: Dict[str, Usage] = {}
+        self.by_stage: Dict[str, Usage] = {}
+        self.by_agent: Dict[str, Usage] = {}
+        self.by_model: Dict[str, Usage] = {}
+        self.recent = deque(maxlen=recent)
+        # Moving average cost of a completed request, per entry agent
+        self._estimates: Dict[str, float] = {}
+        # user -> [window start, USD spent in window, USD reserved by running requests]
+        self._windows: Dict[str, list] = {}
+
+    @classmethod
+    def from_env(cls) -> "TokenAccounting":
+        return cls(
+            default_budget_usd=float(os.environ.get("USER_BUDGET_USD", 0)),
+            user_budgets_usd=json.loads(os.environ.get("USER_BUDGETS_USD") or "{}"),
+            window_seconds=float(os.environ.get("USER_BUDGET_WINDOW_SECONDS", 86400)),
+            action=os.environ.get("BUDGET_ACTION", REJECT),
+            downgrade_model=os.environ.get("DOWNGRADE_MODEL", "gemini-2.5-flash-lite"),
+            prices={name: tuple(price) for name, price in json.loads(os.environ.get("MODEL_PRICES") or "{}").items()},
+        )
+
+    def cost(self, model: str, prompt: int, output: int, cached: int) -> float:
+        input_price, output_price, cached_price = price_for(model, self.prices)
+        return ((prompt - cached) * input_price + cached * cached_price + output * output_price) / 1e6
+
+    def budget(self, user_id: str) -> float:
+        """The user's budget in USD per window; 0 means unlimited."""
+        return self.user_budgets_usd.get(user_id, self.default_budget_usd)
+
+    def _window(self, user_id: str) -> list:
+        window = self._windows.get(user_id)
+        now = time.time()
+        if window is None or now - window[0] >= self.window_seconds:
+            # Reservations belong to requests still running, so they carry over
+            window = self._windows[user_id] = [now, 0.0, window[2] if window else 0.0]
+        return window
+
+    def spent(self, user_id: str) -> float:
+        return self._window(user_id)[1]
+
+    def over_budget(self, user_id: str) -> bool:
+        budget = self.budget(user_id)
+        return budget > 0 and self.spent(user_id) >= budget
+
+    def admit(self, user_id: str, entry: str, allow_downgrade: bool = True) -> RequestLedger:
+        """The ledger of a new request from `user_id` to `entry`, its `decision` ADMIT, DOWNGRADE or REJECT.
+
+        Admitted and downgraded requests reserve their estimated cost and
+        must be passed to `finish`; rejected ones reserve nothing.
+        """
+        budget = self.budget(user_id)
+        if budget <= 0:
+            return RequestLedger(user_id, entry)
+        window = self._window(user_id)
+        committed = window[1] + window[2]
+        estimate = self._estimates.get(entry, 0.0)
+        if committed >= budget:
+            decision = REJECT
+        elif committed + estimate <= budget:
+            decision = ADMIT
+        else:
+            decision = self.action if allow_downgrade else REJECT
+        if decision == REJECT:
+            self.rejected += 1
+            return RequestLedger(user_id, entry, REJECT)
+        ledger = RequestLedger(user_id, entry, decision)
+        if decision == DOWNGRADE:
+            self.downgraded += 1
+            ledger.downgrade_model = self.downgrade_model
+        ledger.reserved_usd = min(estimate, budget - committed)
+        window[2] += ledger.reserved_usd
+        return ledger
+
+    def charge(
+        self, ledger: RequestLedger, stage: str, agent: str, model: str, prompt: int, output: int, cached: int,
+        calls: int = 1,
+    ):
+        cost = self.cost(model, prompt, output, cached)
+        for usage in (
+            ledger.total,
+            ledger.by_stage.setdefault(stage, Usage()),
+            ledger.by_agent.setdefault(agent, Usage()),
+            self.total,
+            self.by_user.setdefault(ledger.user_id, Usage()),
+            self.by_stage.setdefault(stage, Usage()),
+            self.by_agent.setdefault(agent, Usage()),
+            self.by_model.setdefault(model or DEFAULT_MODEL, Usage()),
+        ):
+            usage.add(prompt, output, cached, cost, calls)
+        self._window(ledger.user_id)[1] += cost
+
+    def charge_event(self, ledger: RequestLedger, event: dict):
+        """Charges a streamed event dict's usage, for servers that only see a remote agent's events.
+
+        Runs nested in an AgentTool don't stream their events; their usage
+        arrives in the usage report on the final response, when the
+        deployed app has UsageReportPlugin, and is charged from there.
+        """
+        if event.get("partial"):
+            return
+        usage = event.get("usage_metadata")
+        if usage:
+            author = event.get("author") or ""
+            self.charge(
+                ledger,
+                author,
+                author,
+                event.get("model_version") or "",
+                usage.get("prompt_token_count") or 0,
+                usage.get("candidates_token_count") or 0,
+                usage.get("cached_content_token_count") or 0,
+            )
+        report = (event.get("custom_metadata") or {}).get(USAGE_REPORT_KEY)
+        if report:
+            self.charge_report(ledger, report)
+
+    def charge_report(self, ledger: RequestLedger, report: Dict[str, dict]):
+        """Charges a run's per-agent usage report, less what the ledger already holds for each agent."""
+        for agent, totals in report.items():
+            charged = ledger.by_agent.get(agent) or Usage()
+            calls = totals.get("calls", 0) - charged.calls
+            if calls <= 0:
+                continue
+            self.charge(
+                ledger,
+                agent,
+                agent,
+                totals.get("model") or "",
+                totals.get("prompt_tokens", 0) - charged.prompt_tokens,
+                totals.get("output_tokens", 0) - charged.output_tokens,
+                totals.get("cached_tokens", 0) - charged.cached_tokens,
+                calls=calls,
+            )
+
+    def finish(self, ledger: RequestLedger, completed: bool = True):
+        """Records a finished request and releases its reservation; later calls for the same ledger do nothing.
+
+        Only completed, full-price runs update the cost estimate.
+        """
+        if ledger.finished or ledger.decision == REJECT:
+            return
+        ledger.finished = True
+        if ledger.reserved_usd:
+            window = self._window(ledger.user_id)
+            window[2] = max(0.0, window[2] - ledger.reserved_usd)
+            ledger.reserved_usd = 0.0
+        self.requests += 1
+        self.recent.append(ledger.summary())
+        if completed and ledger.downgrade_model is None:
+            previous = self._estimates.get(ledger.entry)
+            cost = ledger.total.cost_usd
+            self._estimates[ledger.entry] = cost if previous is None else previous + self.smoothing * (cost - previous)
+
+    def report(self) -> dict:
+        def table(usages: Dict[str, Usage]) -> dict:
+            ordered = sorted(usages.items(), key=lambda item: item[1].cost_usd, reverse=True)
+            return {name: usage.to_dict() for name, usage in ordered}
+
+        return {
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "downgraded": self.downgraded,
+            "total": self.total.to_dict(),
+            "average_request_cost_usd": {entry: round(cost, 6) for entry, cost in self._estimates.items()},
+            "by_user": table(self.by_user),
+            "by_stage": table(self.by_stage),
+            "by_agent": table(self.by_agent),
+            "by_model": table(self.by_model),
+            "budgets": {
+                user_id: {
+                    "budget_usd": self.budget(user_id),
+                    "spent_usd": round(window[1], 6),
+                    "reserved_usd": round(window[2], 6),
+                }
+                for user_id, window in self._windows.items()
+                if self.budget(user_id) > 0
+            },
+            "recent": list(self.recent),
+        }
@@ -0,0 +1,220 @@
+"""One long-lived gRPC channel for every Agent Engine call the backend makes.
+
+The vertexai SDK builds a new API client, and with it a new gRPC channel,
+for each call on an `agent_engines.get(...)` app, so every stream and
+session call pays for its own TCP and TLS handshake. Its
+`async_stream_query` also reads the stream with the blocking client, which
+holds the event loop while it waits for each chunk.
+
+SharedChannelEngine wraps the app so that session calls and streams all go
+through one grpc.aio channel, multiplexed over HTTP/2:
+- at most AGENT_ENGINE_MAX_CONCURRENCY calls run at once; the rest wait
+  for a slot, and the wait is measured
+- keepalive pings every AGENT_ENGINE_KEEPALIVE_SECONDS keep the connection
+  open between requests
+- `preconnect` opens the connection at startup
+
+Everything else is delegated to the wrapped app. Pass `client` to talk to
+a local stand-in server (see benchmarks/connections.py).
+"""
+
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+import grpc
+from google.cloud.aiplatform import initializer
+from google.cloud.aiplatform_v1.services.reasoning_engine_execution_service import (
+    ReasoningEngineExecutionServiceAsyncClient,
+)
+from google.cloud.aiplatform_v1.services.reasoning_engine_execution_service.transports import (
+    ReasoningEngineExecutionServiceGrpcAsyncIOTransport as Transport,
+)
+from google.cloud.aiplatform_v1.types import StreamQueryReasoningEngineRequest
+from vertexai.agent_engines._utils import yield_parsed_json
+
+from serving.metrics import registry
+
+calls_total = registry.counter("agent_engine_calls_total", "Agent Engine calls on the shared channel", ["kind"])
+slot_wait_seconds = registry.histogram(
+    "agent_engine_slot_wait_seconds", "Time Agent Engine calls waited for a slot on the shared channel"
+)
+connections_total = registry.counter(
+    "agent_engine_connections_total", "Times the shared Agent Engine channel (re)connected"
+)
+
+RECENT_WAITS = 1000
+
+
+def create_execution_client(location: Optional[str] = None, keepalive_seconds: float = 60):
+    """An async execution client on its own channel, configured like the SDK's but with keepalive pings."""
+    def create_channel(host, **kwargs):
+        kwargs["options"] = [
+            *kwargs.get("options", ()),
+            ("grpc.keepalive_time_ms", int(keepalive_seconds * 1000)),
+            ("grpc.keepalive_timeout_ms", 20000),
+            ("grpc.keepalive_permit_without_calls", 1),
+        ]
+        return Transport.create_channel(host, **kwargs)
+
+    return ReasoningEngineExecutionServiceAsyncClient(
+        credentials=initializer.global_config.credentials,
+        client_options=initializer.global_config.get_client_options(location_override=location),
+        transport=functools.partial(Transport, channel=create_channel),
+    )
+
+
+class _BoundedClient:
+    """Stands in for the app's async execution client, so its session calls share the channel and its slots."""
+
+    def __init__(self, owner: "SharedChannelEngine"):
+        self._owner = owner
+
+    async def query_reasoning_engine(self, *args, **kwargs):
+        async with self._owner.slot("query"):
+            return await self._owner.client.query_reasoning_engine(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._owner.client, name)
+
+
+class SharedChannelEngine:
+    """An Agent Engine app whose session calls and streams share one bounded gRPC channel."""
+
+    def __init__(self, engine, client=None, max_concurrency: int = 100, keepalive_seconds: float = 60):
+        self.engine = engine
+        self.max_concurrency = max_concurrency
+        self.keepalive_seconds = keepalive_seconds
+        # grpc.aio channels belong to the loop they're created on, so the client is built on first use
+        self._client = client
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self.active = 0
+        self.waiting = 0
+        self.calls = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=RECENT_WAITS)
+        self.connections_opened = 0
+        self._connected_at: Deque[float] = deque()
+        # The app's session methods call this attribute
+        engine.execution_async_client = _BoundedClient(self)
+
+    @classmethod
+    def from_env(cls, engine) -> "SharedChannelEngine":
+        return cls(
+            engine,
+            max_concurrency=int(os.environ.get("AGENT_ENGINE_MAX_CONCURRENCY", 100)),
+            keepalive_seconds=float(os.environ.get("AGENT_ENGINE_KEEPALIVE_SECONDS", 60)),
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = create_execution_client(getattr(self.engine, "location", None), self.keepalive_seconds)
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(self._client.transport.grpc_channel))
+        return self._client
+
+    @property
+    def channel(self) -> grpc.aio.Channel:
+        return self.client.transport.grpc_channel
+
+    @asynccontextmanager
+    async def slot(self, kind: str):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - start
+        self.calls += 1
+        self.wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self.recent_waits.append(wait)
+        calls_total.inc(kind)
+        slot_wait_seconds.observe(wait)
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    async def async_stream_query(self, **kwargs) -> AsyncIterator:
+        """Streams an `async_stream_query` over the shared channel without blocking the loop."""
+        async with self.slot("stream"):
+            response = await self.client.stream_query_reasoning_engine(
+                request=StreamQueryReasoningEngineRequest(
+                    name=self.engine.resource_name, input=kwargs, class_method="async_stream_query"
+                )
+            )
+            try:
+                async for chunk in response:
+                    for parsed in yield_parsed_json(chunk):
+                        if parsed is not None:
+                            yield parsed
+            finally:
+                # Abandoned streams stop on the server too, rather than run to the end
+                response.cancel()
+
+    async def preconnect(self, timeout: float = 10.0):
+        """Opens the channel's connection ahead of traffic."""
+        channel = self.channel
+        channel.get_state(try_to_connect=True)
+        await asyncio.wait_for(channel.channel_ready(), timeout)
+
+    async def _watch(self, channel: grpc.aio.Channel):
+        state = channel.get_state()
+        while True:
+            await channel.wait_for_state_change(state)
+            state = channel.get_state()
+            if state is grpc.ChannelConnectivity.READY:
+                self.connections_opened += 1
+                self._connected_at.append(time.monotonic())
+                connections_total.inc()
+            elif state is grpc.ChannelConnectivity.SHUTDOWN:
+                return
+
+    def handshakes_per_minute(self) -> int:
+        now = time.monotonic()
+        while self._connected_at and now - self._connected_at[0] > 60:
+            self._connected_at.popleft()
+        return len(self._connected_at)
+
+    async def close(self):
+        if self._watcher:
+            self._watcher.cancel()
+        if self._client is not None:
+            await self._client.transport.close()
+
+    def snapshot(self) -> dict:
+        state = self._client.transport.grpc_channel.get_state() if self._client is not None else None
+        connected = state is grpc.ChannelConnectivity.READY
+        waits = sorted(self.recent_waits)
+        return {
+            "state": state.name if state is not None else "NOT_STARTED",
+            "max_concurrency": self.max_concurrency,
+            "keepalive_seconds": self.keepalive_seconds,
+            # One HTTP/2 connection: busy while any call is in flight, idle otherwise
+            "active": int(connected and self.active > 0),
+            "idle": int(connected and self.active == 0),
+            "active_calls": self.active,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "mean_wait_ms": round(self.wait_seconds / self.calls * 1000, 3) if self.calls else 0.0,
+            "p95_wait_ms": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 3) if waits else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "connections_opened": self.connections_opened,
+            "handshakes_per_minute": self.handshakes_per_minute(),
+        }
@@ -0,0 +1,181 @@
+"""Stops agent runs whose SSE client has gone away.
+
+`stream_until_disconnect` drives an agent event stream in its own task and
+watches the client connection. When the client disconnects, the run's
+CancelScope is cancelled according to its mode:
+
+- "immediate": the producing task is cancelled, which propagates
+  CancelledError through the runner into every running sub-agent, including
+  all branches of a ParallelAgent.
+- "finish_stage": agents and model calls already in flight finish (and their
+  results are checkpointed to the session); nothing new is started.
+"""
+
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Optional
+
+CANCEL_IMMEDIATE = "immediate"
+CANCEL_FINISH_STAGE = "finish_stage"
+
+# Scope of the run driven by the current task; inherited by child tasks
+current_scope: ContextVar[Optional["CancelScope"]] = ContextVar("cancel_scope", default=None)
+
+_background_runs = set()
+
+
+class CancelScope:
+    """Cancellation state and usage of one agent run."""
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = mode or os.environ.get("CANCEL_MODE", CANCEL_IMMEDIATE)
+        self.cancelled = False
+        self.started = time.monotonic()
+        self.cancelled_at: Optional[float] = None
+        self.tokens_used = 0
+        # Root invocation of the run, set by CancellationPlugin when it starts
+        self.invocation_id: Optional[str] = None
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.cancelled_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.cancelled_at or time.monotonic()) - self.started
+
+
+class CancellationStats:
+    """Estimates model time and tokens saved by cancelling abandoned runs.
+
+    Savings are measured against a moving average of completed runs: a run
+    cancelled after t seconds and n tokens saved roughly (avg - t) seconds
+    and (avg - n) tokens.
+    """
+
+    def __init__(self, smoothing: float = 0.1):
+        self.smoothing = smoothing
+        self.completed = 0
+        self.cancelled = 0
+        self.seconds_saved = 0.0
+        self.tokens_saved = 0
+        self.avg_seconds: Optional[float] = None
+        self.avg_tokens: Optional[float] = None
+
+    def _smooth(self, current: Optional[float], value: float) -> float:
+        return value if current is None else current + self.smoothing * (value - current)
+
+    def record_completed(self, scope: CancelScope):
+        self.completed += 1
+        self.avg_seconds = self._smooth(self.avg_seconds, scope.elapsed)
+        self.avg_tokens = self._smooth(self.avg_tokens, scope.tokens_used)
+
+    def record_cancelled(self, scope: CancelScope, seconds_run: float):
+        self.cancelled += 1
+        if self.avg_seconds is not None:
+            self.seconds_saved += max(0.0, self.avg_seconds - seconds_run)
+            self.tokens_saved += max(0, int(self.avg_tokens - scope.tokens_used))
+
+    def snapshot(self) -> dict:
+        return {
+            "completed_runs": self.completed,
+            "cancelled_runs": self.cancelled,
+            "seconds_saved": round(self.seconds_saved, 2),
+            "tokens_saved": self.tokens_saved,
+            "avg_run_seconds": self.avg_seconds,
+            "avg_run_tokens": self.avg_tokens,
+        }
+
+
+_DONE = object()
+
+
+async def stream_until_disconnect(
+    request,
+    source: Callable[[], AsyncIterator],
+    scope: CancelScope,
+    stats: Optional[CancellationStats] = None,
+    poll_interval: float = 0.5,
+    max_buffered: int = 16,
+    abandon: Optional[Callable[[str], None]] = None,
+) -> AsyncIterator:
+    """Yields items from `source()` until it ends or the client disconnects.
+
+    `request` is a Starlette request; `source` is called inside the producing
+    task so the run sees `scope` through `current_scope`. At most
+    `max_buffered` items wait for the client; beyond that the run waits, so
+    a slow client holds back the run instead of filling memory.
+
+    ADK skips after-run callbacks for a run that is cancelled or raises, so
+    `abandon` is called with the run's invocation id when that happens, for
+    plugins to drop what they hold for the run.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+    detached = False
+
+    async def send(item):
+        # Once the client is gone, a run left to finish its stage has no one to wait for
+        if not detached:
+            await queue.put(item)
+
+    async def produce():
+        completed = False
+        try:
+            async for item in source():
+                await send(item)
+            completed = True
+            if not scope.cancelled and stats:
+                stats.record_completed(scope)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await send(e)
+        finally:
+            if not completed and abandon and scope.invocation_id:
+                abandon(scope.invocation_id)
+            if scope.cancelled and stats:
+                stats.record_cancelled(scope, time.monotonic() - scope.started)
+            await send(_DONE)
+
+    token = current_scope.set(scope)
+    try:
+        producer = asyncio.create_task(produce())
+    finally:
+        current_scope.reset(token)
+
+    finished = False
+    last_check = time.monotonic()
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), poll_interval)
+            except asyncio.TimeoutError:
+                item = None
+            if item is _DONE:
+                finished = True
+                return
+            if isinstance(item, Exception):
+                finished = True
+                raise item
+            if time.monotonic() - last_check >= poll_interval:
+                last_check = time.monotonic()
+                if await request.is_disconnected():
+                    return
+            if item is not None:
+                yield item
+    finally:
+        if not finished and not producer.done():
+            # Client went away (detected here, or the server cancelled us on a failed send)
+            detached = True
+            while not queue.empty():
+                # Frees a producer blocked on a full queue
+                queue.get_nowait()
+            scope.cancel()
+            if scope.mode == CANCEL_IMMEDIATE:
+                producer.cancel()
+            else:
+                _background_runs.add(producer)
+                producer.add_done_callback(_background_runs.discard)
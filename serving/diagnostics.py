@@ -0,0 +1,219 @@
+"""Event-loop lag monitor, sampling profiler and memory snapshots for the API servers.
+
+- LoopLagMonitor reschedules a callback every LOOP_LAG_INTERVAL_SECONDS and
+  records how late it fires in the `event_loop_lag_seconds` histogram. A
+  watchdog thread captures the loop thread's stack whenever the loop hasn't
+  ticked for LOOP_STALL_SECONDS, so a stall shows the code that blocked it,
+  not just its length.
+- `sample_stacks` samples every thread's stack from a background thread and
+  returns collapsed stacks (`frame;frame;frame count` lines), which
+  flamegraph.pl, speedscope and similar tools read directly.
+- MemoryTracker reports tracemalloc's top allocators and the difference
+  since its previous snapshot.
+
+`debug_router` serves these under /debug. The routes only exist with
+DEBUG_ENDPOINTS=1 and, when DEBUG_TOKEN is set, need a matching
+X-Debug-Token header.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from serving.metrics import registry
+
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def _format_stack(frame, limit: int = 64) -> list:
+    """Frames from the outermost call to `frame`, as 'function (file:line)'."""
+    stack = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, stall_seconds: float = 0.25, max_stalls: int = 20):
+        self.interval = interval
+        self.stall_seconds = stall_seconds
+        self.histogram = registry.histogram(
+            "event_loop_lag_seconds", "Delay of a periodic event loop callback past its due time", buckets=LAG_BUCKETS
+        )
+        self.max_lag = 0.0
+        self.stalls = deque(maxlen=max_stalls)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle = None
+        self._due = 0.0
+        self._last_tick = time.monotonic()
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._due = self._loop.time() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._tick)
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        self._loop = None
+
+    def _tick(self):
+        now = self._loop.time()
+        lag = max(0.0, now - self._due)
+        self.histogram.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        self._last_tick = time.monotonic()
+        self._due = now + self.interval
+        self._handle = self._loop.call_later(self.interval, self._tick)
+
+    def _watch(self):
+        """Captures the loop thread's stack once per stall."""
+        captured_for = None
+        while not self._stop.wait(self.stall_seconds / 4):
+            last_tick = self._last_tick
+            blocked = time.monotonic() - last_tick - self.interval
+            if blocked < self.stall_seconds or captured_for == last_tick:
+                continue
+            captured_for = last_tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            self.stalls.append({
+                "at": time.time(),
+                "blocked_seconds_when_sampled": round(blocked, 3),
+                "stack": _format_stack(frame) if frame is not None else [],
+            })
+
+    def snapshot(self) -> dict:
+        counts, total = next(iter(self.histogram.values.values()), ([], 0.0))
+        ticks = sum(counts)
+        return {
+            "interval_seconds": self.interval,
+            "ticks": ticks,
+            "mean_lag_ms": round(total / ticks * 1000, 3) if ticks else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "lag_histogram": {
+                **{f"<= {bound * 1000:g}ms": count for bound, count in zip(self.histogram.buckets, counts)},
+                "slower": counts[-1] if counts else 0,
+            },
+            "recent_stalls": list(self.stalls),
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    interval=float(os.environ.get("LOOP_LAG_INTERVAL_SECONDS", 0.05)),
+    stall_seconds=float(os.environ.get("LOOP_STALL_SECONDS", 0.25)),
+)
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter:
+    """Collapsed stacks of every other thread, sampled every `interval` for `seconds`."""
+    samples = Counter()
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            stack = _format_stack(frame)
+            samples[";".join([names.get(thread_id, str(thread_id)), *stack])] += 1
+        time.sleep(interval)
+    return samples
+
+
+class MemoryTracker:
+    def __init__(self):
+        self._last: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int = 1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def report(self, top: int = 25) -> dict:
+        """Top allocation sites now and their change since the previous report."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        result = {
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "top": [
+                {"location": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[:top]
+            ],
+            "since_last": None,
+        }
+        if self._last is not None:
+            result["since_last"] = [
+                {"location": str(stat.traceback), "bytes": stat.size_diff, "blocks": stat.count_diff}
+                for stat in snapshot.compare_to(self._last, "lineno")[:top]
+            ]
+        self._last = snapshot
+        return result
+
+
+memory_tracker = MemoryTracker()
+if os.environ.get("TRACEMALLOC", "0") == "1":
+    memory_tracker.start(int(os.environ.get("TRACEMALLOC_FRAMES", 1)))
+
+_profile_lock = asyncio.Lock()
+
+
+def require_debug_access(request: Request):
+    if os.environ.get("DEBUG_ENDPOINTS", "0") != "1":
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = os.environ.get("DEBUG_TOKEN")
+    if token and request.headers.get("X-Debug-Token") != token:
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+debug_router = APIRouter(prefix="/debug", dependencies=[Depends(require_debug_access)])
+
+
+@debug_router.get("/loop-lag")
+async def loop_lag():
+    """Event loop lag histogram and the stacks captured during recent stalls."""
+    return loop_monitor.snapshot()
+
+
+@debug_router.get("/profile")
+async def profile(seconds: float = 10, interval_ms: float = 5, format: str = "collapsed"):
+    """Samples all threads' stacks for `seconds`; returns collapsed stacks or JSON counts."""
+    if not 0 < seconds <= 60:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 60]")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        samples = await asyncio.to_thread(sample_stacks, seconds, max(interval_ms, 1) / 1000)
+    if format == "json":
+        return {"seconds": seconds, "samples": sum(samples.values()), "stacks": dict(samples.most_common())}
+    body = "\n".join(f"{stack} {count}" for stack, count in samples.most_common()) + "\n"
+    return PlainTextResponse(body, headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'})
+
+
+@debug_router.get("/memory")
+async def memory(top: int = 25):
+    """tracemalloc's top allocators and the diff since the last call; starts tracing on first use."""
+    if not tracemalloc.is_tracing():
+        memory_tracker.start()
+        return {"tracing": "started", "message": "tracemalloc was off; call again to get allocations from now on"}
+    return await asyncio.to_thread(memory_tracker.report, top)
@@ -0,0 +1,107 @@
+"""Local stand-in for a deployed Agent Engine app, for load tests and offline runs.
+
+Implements the parts of the `agent_engines` remote app API that
+backend/api_server.py uses (session calls and `async_stream_query`) by
+running content_creation_studio's root_agent in-process. Events are
+yielded as JSON dicts, the way Agent Engine streams them. Combine with
+MODEL_BACKEND=fake for a fully offline backend. FAKE_ENGINE_SESSION_LATENCY
+adds a remote round-trip's delay (seconds) to every session call.
+
+With CASSETTE_DIR set, `async_stream_query` also takes the name of a
+recorded cassette (the backend forwards X-Cassette) and answers the run's
+model calls from it, as the local API server does.
+"""
+
+import asyncio
+import os
+import uuid
+from typing import AsyncIterator, Optional
+
+
+class FakeAgentEngine:
+    """In-process replacement for `agent_engines.get(resource_name)`."""
+
+    def __init__(self, agent=None, session_latency: Optional[float] = None):
+        # Imported here so the backend only needs the agent package when faking
+        from google.adk.runners import Runner
+        from google.adk.sessions import InMemorySessionService
+
+        from content_creation_studio.usage import UsageReportPlugin
+
+        if agent is None:
+            from content_creation_studio.agent import root_agent as agent
+        self.app_name = agent.name
+        self.session_service = InMemorySessionService()
+        # Like the deployed app (deployment/deploy.py), reports each run's usage on its final response
+        self.runner = Runner(
+            agent=agent, session_service=self.session_service, app_name=self.app_name, plugins=[UsageReportPlugin()]
+        )
+        if session_latency is None:
+            session_latency = float(os.environ.get("FAKE_ENGINE_SESSION_LATENCY", 0))
+        self.session_latency = session_latency
+
+    async def _round_trip(self):
+        if self.session_latency > 0:
+            await asyncio.sleep(self.session_latency)
+
+    @staticmethod
+    def _session_dict(session) -> dict:
+        return {
+            "id": session.id,
+            "user_id": session.user_id,
+            "app_name": session.app_name,
+            "state": dict(session.state),
+            "last_update_time": session.last_update_time,
+        }
+
+    async def async_create_session(self, *, user_id: str, session_id: Optional[str] = None, state: Optional[dict] = None) -> dict:
+        await self._round_trip()
+        session = await self.session_service.create_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id or str(uuid.uuid4()), state=state
+        )
+        return self._session_dict(session)
+
+    async def async_get_session(self, *, user_id: str, session_id: str) -> dict:
+        await self._round_trip()
+        session = await self.session_service.get_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            raise RuntimeError(f"Session not found: {session_id}")
+        return self._session_dict(session)
+
+    async def async_list_sessions(self, *, user_id: str) -> dict:
+        await self._round_trip()
+        response = await self.session_service.list_sessions(app_name=self.app_name, user_id=user_id)
+        return {"sessions": [self._session_dict(session) for session in response.sessions]}
+
+    async def async_delete_session(self, *, user_id: str, session_id: str):
+        await self._round_trip()
+        await self.session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+
+    async def async_stream_query(
+        self,
+        *,
+        user_id: str,
+        session_id: str,
+        message: str,
+        cassette: Optional[str] = None,
+        cassette_time_scale: float = 1.0,
+    ) -> AsyncIterator[dict]:
+        from google.genai.types import Content, Part
+
+        from content_creation_studio.cassettes import CassettePlayer, cassette_for_request, current_cassette
+
+        player = None
+        if cassette:
+            player = cassette_for_request(cassette, cassette_time_scale)
+            if not isinstance(player, CassettePlayer):
+                raise ValueError("Cassette replay needs CASSETTE_DIR")
+            # The run is driven by the task iterating this stream, so its models see the player
+            current_cassette.set(player)
+        async for event in self.runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=Content(role="user", parts=[Part(text=message)]),
+        ):
+            yield event.model_dump(mode="json", exclude_none=True)
+        if player is not None:
+            print(f"📼 Replayed run: {player.mismatches} request mismatch(es), {player.unused_calls()} unused call(s)")
@@ -0,0 +1,194 @@
+"""Minimal Prometheus metrics: counters and histograms rendered in text format.
+
+Updates happen on the event loop thread, so the counters are plain dict
+increments with no locks. Each metric keeps one value (or bucket list) per
+label-value tuple, and rendering only reads them. Don't update metrics from
+worker threads.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; covers tool calls (sub-ms) up to whole content packages (minutes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for values, value in list(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label tuple: [count per bucket (non-cumulative) + overflow, sum]
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total) in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, values, INF_LABEL)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LOOP_BUCKETS = (1, 2, 3, 4, 5, 10)
+
+
+class AgentMetrics:
+    """The per-agent/per-tool metric families, shared by both servers."""
+
+    def __init__(self, registry: MetricsRegistry = registry):
+        self.agent_runs = registry.counter("adk_agent_runs_total", "Agent runs started", ["agent"])
+        self.agent_seconds = registry.histogram("adk_agent_duration_seconds", "Agent run wall time", ["agent"])
+        self.model_calls = registry.counter("adk_model_calls_total", "Model calls", ["agent", "model"])
+        self.model_seconds = registry.histogram("adk_model_call_duration_seconds", "Model call latency", ["agent"])
+        self.model_errors = registry.counter("adk_model_errors_total", "Failed model calls", ["agent", "error"])
+        self.tokens = registry.counter("adk_model_tokens_total", "Tokens used by model calls", ["agent", "kind"])
+        self.cache_hits = registry.counter(
+            "adk_model_cache_hits_total", "Model responses served partly from cached context", ["agent"]
+        )
+        self.tool_calls = registry.counter("adk_tool_calls_total", "Tool calls", ["agent", "tool"])
+        self.tool_seconds = registry.histogram("adk_tool_call_duration_seconds", "Tool call latency", ["tool"])
+        self.tool_errors = registry.counter("adk_tool_errors_total", "Failed tool calls", ["tool", "error"])
+        self.loop_iterations = registry.histogram(
+            "adk_loop_iterations", "Iterations per loop agent run", ["loop"], buckets=LOOP_BUCKETS
+        )
+        self.runs_abandoned = registry.counter(
+            "adk_runs_abandoned_total", "Top-level runs cancelled or failed before finishing", ["agent"]
+        )
+
+    def record_usage(self, agent_name: str, prompt: int, output: int, cached: int):
+        self.tokens.inc(agent_name, "input", amount=prompt)
+        self.tokens.inc(agent_name, "output", amount=output)
+        if cached:
+            self.tokens.inc(agent_name, "cached", amount=cached)
+            self.cache_hits.inc(agent_name)
+
+
+class EventStreamMetrics:
+    """Derives AgentMetrics from one run's streamed event dicts.
+
+    For servers that only see a remote agent's events (no callbacks). Each
+    event that carries usage metadata counts as one model call, timed from
+    the previous event; tool latency runs from the function call event to
+    its response. `loop_starts` maps a loop's first sub-agent to the loop
+    name; each time that agent takes over from another one counts as a new
+    iteration, and any change of author counts as an agent run (interleaved
+    parallel branches overcount). Agent run durations aren't visible from
+    events, nor are agents run inside an AgentTool: those show up as the
+    calling agent's tool call.
+    """
+
+    def __init__(self, loop_starts: Dict[str, str], metrics: AgentMetrics = None):
+        self.metrics = metrics or AgentMetrics()
+        self.loop_starts = loop_starts
+        self.iterations: Dict[str, int] = {}
+        self._last_event = time.perf_counter()
+        self._last_author = None
+        self._tool_starts: Dict[str, float] = {}
+
+    def observe(self, event: dict):
+        now = time.perf_counter()
+        metrics = self.metrics
+        author = event.get("author") or ""
+        if author != self._last_author and author in self.loop_starts:
+            loop = self.loop_starts[author]
+            self.iterations[loop] = self.iterations.get(loop, 0) + 1
+        if author != self._last_author and author and author != "user":
+            metrics.agent_runs.inc(author)
+
+        usage = event.get("usage_metadata")
+        if usage:
+            metrics.model_calls.inc(author, "")
+            metrics.model_seconds.observe(now - self._last_event, author)
+            metrics.record_usage(
+                author,
+                usage.get("prompt_token_count") or 0,
+                usage.get("candidates_token_count") or 0,
+                usage.get("cached_content_token_count") or 0,
+            )
+        if event.get("error_code"):
+            metrics.model_errors.inc(author, str(event["error_code"]))
+
+        for part in (event.get("content") or {}).get("parts") or []:
+            call = part.get("function_call")
+            if call:
+                metrics.tool_calls.inc(author, call.get("name", ""))
+                self._tool_starts[call.get("id") or call.get("name", "")] = now
+            response = part.get("function_response")
+            if response:
+                start = self._tool_starts.pop(response.get("id") or response.get("name", ""), None)
+                if start is not None:
+                    metrics.tool_seconds.observe(now - start, response.get("name", ""))
+
+        self._last_author = author
+        self._last_event = now
+
+    def finish(self):
+        for loop, iterations in self.iterations.items():
+            self.metrics.loop_iterations.observe(iterations, loop)
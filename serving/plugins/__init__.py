@@ -0,0 +1 @@
+"""ADK plugins used by the local API server and run_agent.py."""
@@ -0,0 +1,72 @@
+"""Charges each model response's token usage to the run's ledger."""
+
+from typing import Dict
+
+from google.adk.agents import BaseAgent, SequentialAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+from serving.accounting import DOWNGRADE, TokenAccounting, current_ledger
+
+
+def stage_of(agent: BaseAgent) -> str:
+    """The outermost sequential workflow's stage that contains `agent`, or the agent itself."""
+    stage = agent.name
+    current = agent
+    while current.parent_agent is not None:
+        if isinstance(current.parent_agent, SequentialAgent):
+            stage = current.name
+        current = current.parent_agent
+    return stage
+
+
+class AccountingPlugin(BasePlugin):
+    """Does nothing for runs without a ledger in `current_ledger`.
+
+    Downgraded runs have their remaining model calls sent to the downgrade
+    model; with BUDGET_ACTION=downgrade a run is also downgraded as soon as
+    its user's budget runs out mid-run. A response is charged to the model
+    that reports producing it, else to the downgrade model or the agent's.
+    Nothing is held per model call, so a cancelled run leaves nothing behind.
+    """
+
+    def __init__(self, accounting: TokenAccounting):
+        super().__init__(name="accounting")
+        self.accounting = accounting
+        self._stages: Dict[str, str] = {}
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        ledger = current_ledger.get()
+        if ledger is None:
+            return None
+        if (
+            ledger.downgrade_model is None
+            and self.accounting.action == DOWNGRADE
+            and self.accounting.over_budget(ledger.user_id)
+        ):
+            ledger.downgrade_model = self.accounting.downgrade_model
+            self.accounting.downgraded += 1
+        if ledger.downgrade_model:
+            llm_request.model = ledger.downgrade_model
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        ledger = current_ledger.get()
+        usage = llm_response.usage_metadata
+        if ledger is None or llm_response.partial or usage is None:
+            return None
+        agent = callback_context._invocation_context.agent
+        if agent.name not in self._stages:
+            self._stages[agent.name] = stage_of(agent)
+        model = llm_response.model_version or ledger.downgrade_model or agent.canonical_model.model
+        self.accounting.charge(
+            ledger,
+            self._stages[agent.name],
+            agent.name,
+            model,
+            usage.prompt_token_count or 0,
+            usage.candidates_token_count or 0,
+            usage.cached_content_token_count or 0,
+        )
+        return None
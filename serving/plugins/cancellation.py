@@ -0,0 +1,52 @@
+"""Honors client-disconnect cancellation inside the agent tree."""
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai.types import Content, Part
+
+from serving.cancellation import CANCEL_FINISH_STAGE, current_scope
+
+CANCELLED_TEXT = "[run cancelled: client disconnected]"
+
+
+class CancellationPlugin(BasePlugin):
+    """Stops starting new work once the run's CancelScope is cancelled.
+
+    Immediate cancellation is delivered as CancelledError by the serving
+    layer; this plugin handles the "finish_stage" mode, where in-flight
+    agents finish and checkpoint their output but no further agent or model
+    call starts. It also counts tokens used by each run for savings metrics
+    and records the run's root invocation on its scope.
+    """
+
+    def __init__(self):
+        super().__init__(name="cancellation")
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext):
+        scope = current_scope.get()
+        # Nested AgentTool runs share their parent's scope
+        if scope is not None and scope.invocation_id is None:
+            scope.invocation_id = invocation_context.invocation_id
+        return None
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        scope = current_scope.get()
+        if scope is not None and scope.cancelled and scope.mode == CANCEL_FINISH_STAGE:
+            callback_context._invocation_context.end_invocation = True
+        return None
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        scope = current_scope.get()
+        if scope is not None and scope.cancelled and scope.mode == CANCEL_FINISH_STAGE:
+            callback_context._invocation_context.end_invocation = True
+            return LlmResponse(content=Content(role="model", parts=[Part(text=CANCELLED_TEXT)]))
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        scope = current_scope.get()
+        if scope is not None and llm_response.usage_metadata:
+            scope.tokens_used += llm_response.usage_metadata.total_token_count or 0
+        return None
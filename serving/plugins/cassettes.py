@@ -0,0 +1,68 @@
+"""Records model and tool calls into the run's cassette."""
+
+from typing import Any, Dict, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from content_creation_studio.cassettes import CassetteRecorder, current_cassette
+
+
+def _call_key(callback_context: CallbackContext) -> Tuple[str, str, str]:
+    ctx = callback_context._invocation_context
+    return (ctx.invocation_id, ctx.branch or "", callback_context.agent_name)
+
+
+class CassettePlugin(BasePlugin):
+    """Does nothing unless `current_cassette` holds a recorder.
+
+    Replay is done by CassetteLlm in place of the model, not here, so the
+    other plugins' model callbacks see replayed calls like real ones.
+    """
+
+    def __init__(self):
+        super().__init__(name="cassettes")
+        self._pending: Dict[Tuple[str, str, str], Tuple[LlmRequest, float]] = {}
+        self._tool_starts: Dict[str, float] = {}
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        cassette = current_cassette.get()
+        if isinstance(cassette, CassetteRecorder):
+            self._pending[_call_key(callback_context)] = (llm_request, cassette.offset())
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        cassette = current_cassette.get()
+        if isinstance(cassette, CassetteRecorder) and not llm_response.partial:
+            pending = self._pending.pop(_call_key(callback_context), None)
+            if pending:
+                cassette.record_call(callback_context.agent_name, pending[0], pending[1], response=llm_response)
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ):
+        cassette = current_cassette.get()
+        if isinstance(cassette, CassetteRecorder):
+            pending = self._pending.pop(_call_key(callback_context), None)
+            if pending:
+                cassette.record_call(callback_context.agent_name, pending[0], pending[1], error=str(error))
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext):
+        cassette = current_cassette.get()
+        if isinstance(cassette, CassetteRecorder):
+            self._tool_starts[tool_context.function_call_id] = cassette.offset()
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, result: dict
+    ):
+        cassette = current_cassette.get()
+        if isinstance(cassette, CassetteRecorder):
+            started = self._tool_starts.pop(tool_context.function_call_id, cassette.offset())
+            cassette.record_tool(tool_context.agent_name, tool.name, tool_args, started, result)
+        return None
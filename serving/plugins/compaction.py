@@ -0,0 +1,184 @@
+"""Replaces a finished workflow stage's raw events with one summary event."""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models import LlmRequest
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai.types import Content, Part
+
+from content_creation_studio.blobs import is_ref
+
+# Rough chars-per-token ratio for Gemini models on English prose
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class StageCompaction:
+    """Which state keys a compacted stage keeps visible to downstream agents."""
+    keep_state_keys: List[str] = field(default_factory=list)
+    # State values up to this many characters are inlined into the summary
+    inline_limit: int = 200
+
+
+DEFAULT_STAGES: Dict[str, StageCompaction] = {
+    "intake_agent": StageCompaction(["topic", "target_audience", "tone", "keywords"]),
+    "research_and_draft_workflow": StageCompaction(["blog_topic", "current_content"]),
+    "quality_improvement_loop": StageCompaction(["current_content", "quality_feedback"]),
+    "parallel_content_creation": StageCompaction(
+        ["final_blog_post", "social_media_posts", "email_newsletter", "seo_metadata"]
+    ),
+}
+
+
+@dataclass
+class CompactionReport:
+    """What compaction removed during one invocation."""
+    invocation_id: str
+    stages: int = 0
+    events_removed: int = 0
+    bytes_saved: int = 0
+    # Events also removed from the session service's stored copy
+    stored_events_removed: int = 0
+    # Tokens no longer sent to later model calls in the same invocation
+    prompt_tokens_saved: int = 0
+    # (branch, estimated prompt tokens) of each removed event, and negated for each summary
+    _removed: List[Tuple[Optional[str], int]] = field(default_factory=list)
+
+
+def _prompt_tokens(event: Event) -> int:
+    """Rough token count of what an event adds to a prompt: its content parts only."""
+    if not event.content or not event.content.parts:
+        return 0
+    chars = 0
+    for part in event.content.parts:
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call:
+            chars += len(part.function_call.model_dump_json(exclude_none=True))
+        elif part.function_response:
+            chars += len(part.function_response.model_dump_json(exclude_none=True))
+    return chars // CHARS_PER_TOKEN
+
+
+def _in_branch(invocation_branch: Optional[str], event_branch: Optional[str]) -> bool:
+    # Same rule ADK uses to pick which events an agent sees
+    if not invocation_branch or not event_branch:
+        return True
+    return invocation_branch == event_branch or invocation_branch.startswith(f"{event_branch}.")
+
+
+class SessionCompactionPlugin(BasePlugin):
+    """Compacts each configured stage's events once the stage completes.
+
+    Downstream agents read stage results through state templates such as
+    {{current_content}}, so the raw events (every draft, every quality-loop
+    rewrite) only inflate session memory and the history sent as prompt
+    context. When the session service supports `replace_events`, the stored
+    copy is compacted as well.
+
+    Pipeline stages run inside AgentTool, which gives each run its own
+    in-memory session, so on the API server compaction shrinks those nested
+    sessions and the prompts built from them, not the persisted session;
+    `stored_events_removed` counts only what was removed from a store.
+    """
+
+    def __init__(self, stages: Optional[Dict[str, StageCompaction]] = None, history: int = 100):
+        super().__init__(name="session_compaction")
+        self.stages = DEFAULT_STAGES if stages is None else stages
+        self.reports: "deque[CompactionReport]" = deque(maxlen=history)
+        self._starts: Dict[tuple, int] = {}
+        self._active: Dict[str, CompactionReport] = {}
+
+    def _report(self, invocation_id: str) -> CompactionReport:
+        report = self._active.get(invocation_id)
+        if report is None:
+            report = self._active[invocation_id] = CompactionReport(invocation_id)
+        return report
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        if agent.name in self.stages:
+            ctx = callback_context._invocation_context
+            self._starts[(ctx.invocation_id, agent.name)] = len(ctx.session.events)
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        config = self.stages.get(agent.name)
+        if config is None:
+            return None
+        ctx = callback_context._invocation_context
+        start = self._starts.pop((ctx.invocation_id, agent.name), None)
+        if start is None:
+            return None
+        removed = ctx.session.events[start:]
+        if not removed:
+            return None
+
+        summary = Event(
+            invocation_id=ctx.invocation_id,
+            author=agent.name,
+            branch=ctx.branch,
+            content=Content(role="model", parts=[Part(text=self._summarize(agent.name, config, ctx, len(removed)))]),
+        )
+        ctx.session.events[start:] = [summary]
+        report = self._report(ctx.invocation_id)
+        if hasattr(ctx.session_service, "replace_events"):
+            await ctx.session_service.replace_events(ctx.session, [e.id for e in removed], summary)
+            report.stored_events_removed += len(removed) - 1
+
+        removed_bytes = sum(len(e.model_dump_json(exclude_none=True)) for e in removed)
+        report.stages += 1
+        report.events_removed += len(removed) - 1
+        report.bytes_saved += removed_bytes - len(summary.model_dump_json(exclude_none=True))
+        report._removed.extend((e.branch, _prompt_tokens(e)) for e in removed)
+        report._removed.append((summary.branch, -_prompt_tokens(summary)))
+        return None
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        report = self._active.get(callback_context.invocation_id)
+        if report is None or not report._removed:
+            return None
+        ctx = callback_context._invocation_context
+        # Agents with include_contents='none' never see earlier stages' events anyway
+        if getattr(ctx.agent, "include_contents", "default") != "default":
+            return None
+        saved = sum(tokens for branch, tokens in report._removed if _in_branch(ctx.branch, branch))
+        report.prompt_tokens_saved += max(0, saved)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext):
+        report = self._active.pop(invocation_context.invocation_id, None)
+        if report is not None and report.stages:
+            self.reports.append(report)
+            print(
+                f"🗜️  Compacted {report.stages} stage(s): {report.events_removed} events, "
+                f"{report.bytes_saved} bytes, ~{report.prompt_tokens_saved} prompt tokens saved"
+            )
+
+    @staticmethod
+    def _summarize(stage: str, config: StageCompaction, ctx: InvocationContext, count: int) -> str:
+        lines = [f"[{stage} completed; {count} events compacted]"]
+        for key in config.keep_state_keys:
+            value = ctx.session.state.get(key)
+            if value is None:
+                continue
+            text = str(value)
+            if not is_ref(value) and len(text) <= config.inline_limit:
+                lines.append(f"- {key}: {text}")
+            else:
+                lines.append(f"- {key}: available in state")
+        return "\n".join(lines)
+
+    def totals(self) -> dict:
+        return {
+            "runs": len(self.reports),
+            "events_removed": sum(r.events_removed for r in self.reports),
+            "bytes_saved": sum(r.bytes_saved for r in self.reports),
+            "stored_events_removed": sum(r.stored_events_removed for r in self.reports),
+            "prompt_tokens_saved": sum(r.prompt_tokens_saved for r in self.reports),
+        }
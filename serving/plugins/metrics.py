@@ -0,0 +1,149 @@
+"""Records per-agent, per-model-call and per-tool metrics into the metrics registry."""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Set, Tuple
+
+from google.adk.agents import BaseAgent, LoopAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from serving.metrics import AgentMetrics, MetricsRegistry, registry as default_registry
+
+# Top-level run driven by the current task; nested AgentTool runs belong to it
+_root_run: ContextVar[Optional[str]] = ContextVar("metrics_root_run", default=None)
+
+
+def _key(callback_context: CallbackContext) -> Tuple[str, str, str]:
+    ctx = callback_context._invocation_context
+    return (ctx.invocation_id, ctx.branch or "", callback_context.agent_name)
+
+
+class MetricsPlugin(BasePlugin):
+    """Counts calls, latencies, tokens, cache hits, errors and loop iterations.
+
+    Calls that never reach their after-callback (short-circuited by a
+    before-callback, or cut short by a stage deadline) count as calls
+    without a latency; their start times are dropped when the top-level run
+    ends. A cancelled or failed run gets no after_run_callback, so the
+    serving layer calls `abandon`, which drops them and counts the run.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        super().__init__(name="metrics")
+        self.metrics = AgentMetrics(registry or default_registry)
+        self._agent_starts: Dict[Tuple[str, str, str], float] = {}
+        self._model_starts: Dict[Tuple[str, str, str], float] = {}
+        self._tool_starts: Dict[Tuple[str, str], float] = {}
+        self._loop_counts: Dict[Tuple[str, str], int] = {}
+        # Top-level invocation -> (agent, its own and its nested runs' invocations)
+        self._runs: Dict[str, Tuple[str, Set[str]]] = {}
+
+    def _drop(self, invocation_ids: Set[str]):
+        for starts in (self._agent_starts, self._model_starts, self._tool_starts, self._loop_counts):
+            for key in [key for key in starts if key[0] in invocation_ids]:
+                del starts[key]
+
+    def abandon(self, invocation_id: str):
+        """Forgets a top-level run that was cancelled or raised, and counts it."""
+        run = self._runs.pop(invocation_id, None)
+        if run is not None:
+            agent_name, invocation_ids = run
+            self.metrics.runs_abandoned.inc(agent_name)
+            self._drop(invocation_ids)
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext):
+        invocation_id = invocation_context.invocation_id
+        root = _root_run.get()
+        if root not in self._runs:
+            # Also replaces a root left in this task's context by an earlier, abandoned run
+            root = invocation_id
+            _root_run.set(root)
+            self._runs[root] = (invocation_context.agent.name, set())
+        self._runs[root][1].add(invocation_id)
+        return None
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        self.metrics.agent_runs.inc(agent.name)
+        self._agent_starts[_key(callback_context)] = time.perf_counter()
+        # A loop iteration starts each time its first sub-agent runs
+        parent = agent.parent_agent
+        if isinstance(parent, LoopAgent) and parent.sub_agents and parent.sub_agents[0] is agent:
+            loop_key = (callback_context.invocation_id, parent.name)
+            self._loop_counts[loop_key] = self._loop_counts.get(loop_key, 0) + 1
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        start = self._agent_starts.pop(_key(callback_context), None)
+        if start is not None:
+            self.metrics.agent_seconds.observe(time.perf_counter() - start, agent.name)
+        if isinstance(agent, LoopAgent):
+            iterations = self._loop_counts.pop((callback_context.invocation_id, agent.name), 0)
+            self.metrics.loop_iterations.observe(iterations, agent.name)
+        return None
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        self.metrics.model_calls.inc(callback_context.agent_name, llm_request.model or "")
+        self._model_starts[_key(callback_context)] = time.perf_counter()
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        if llm_response.partial:
+            return None
+        agent_name = callback_context.agent_name
+        start = self._model_starts.pop(_key(callback_context), None)
+        if start is not None:
+            self.metrics.model_seconds.observe(time.perf_counter() - start, agent_name)
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            self.metrics.record_usage(
+                agent_name,
+                usage.prompt_token_count or 0,
+                usage.candidates_token_count or 0,
+                usage.cached_content_token_count or 0,
+            )
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ):
+        start = self._model_starts.pop(_key(callback_context), None)
+        if start is not None:
+            self.metrics.model_seconds.observe(time.perf_counter() - start, callback_context.agent_name)
+        self.metrics.model_errors.inc(callback_context.agent_name, type(error).__name__)
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext):
+        self.metrics.tool_calls.inc(tool_context.agent_name, tool.name)
+        self._tool_starts[(tool_context.invocation_id, tool_context.function_call_id)] = time.perf_counter()
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, result: dict
+    ):
+        start = self._tool_starts.pop((tool_context.invocation_id, tool_context.function_call_id), None)
+        if start is not None:
+            self.metrics.tool_seconds.observe(time.perf_counter() - start, tool.name)
+        return None
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, error: Exception
+    ):
+        self._tool_starts.pop((tool_context.invocation_id, tool_context.function_call_id), None)
+        self.metrics.tool_errors.inc(tool.name, type(error).__name__)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext):
+        # Drop start times of calls that never completed, in nested runs too when the top-level run ends
+        invocation_id = invocation_context.invocation_id
+        run = self._runs.pop(invocation_id, None)
+        if run is None:
+            self._drop({invocation_id})
+        else:
+            self._drop(run[1])
+            _root_run.set(None)
+        return None
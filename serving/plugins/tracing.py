@@ -0,0 +1,180 @@
+"""Emits nested spans (request → agent → model call / tool call) to a file exporter."""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.agents import BaseAgent, LoopAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from serving.tracing import FileSpanExporter, Span, new_id
+
+# Span of the tool call running in this task; an AgentTool's nested run becomes its child
+_tool_span: ContextVar[Optional[Span]] = ContextVar("tool_span", default=None)
+
+
+class TracingPlugin(BasePlugin):
+    """One trace per top-level run, flushed to the exporter when that run ends.
+
+    Agent names are unique within the tree, so open agent spans are keyed by
+    (invocation, agent); loop iterations reuse the key sequentially. Workflow
+    agents' spans nest their stages, and each agent span records its class
+    and, for loop sub-agents, the loop iteration.
+    """
+
+    def __init__(self, exporter: FileSpanExporter):
+        super().__init__(name="tracing")
+        self.exporter = exporter
+        self._runs: Dict[str, Span] = {}
+        self._agents: Dict[Tuple[str, str], Span] = {}
+        self._models: Dict[Tuple[str, str, str], Span] = {}
+        self._tools: Dict[Tuple[str, str], Span] = {}
+        self._iterations: Dict[Tuple[str, str], int] = {}
+
+    def _start(self, parent: Optional[Span], name: str, kind: str, **attributes) -> Span:
+        return Span(
+            trace_id=parent.trace_id if parent else new_id(32),
+            span_id=new_id(),
+            parent_id=parent.span_id if parent else None,
+            name=name,
+            kind=kind,
+            attributes=attributes,
+        )
+
+    def _finish(self, span: Optional[Span], **attributes):
+        if span is None:
+            return
+        span.end = time.time()
+        span.attributes.update(attributes)
+        self.exporter.export(span)
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext):
+        parent = _tool_span.get()
+        kind = "request" if parent is None else "invocation"
+        self._runs[invocation_context.invocation_id] = self._start(
+            parent,
+            f"{kind} {invocation_context.agent.name}",
+            kind,
+            user_id=invocation_context.user_id,
+            session_id=invocation_context.session.id,
+            invocation_id=invocation_context.invocation_id,
+        )
+        return None
+
+    def _end_run(self, invocation_id: str, **attributes):
+        """Finishes a run's span, and marks whatever it left open incomplete."""
+        for spans in (self._agents, self._models, self._tools):
+            for key in [key for key in spans if key[0] == invocation_id]:
+                self._finish(spans.pop(key), incomplete=True, **attributes)
+        for key in [key for key in self._iterations if key[0] == invocation_id]:
+            del self._iterations[key]
+        self._finish(self._runs.pop(invocation_id, None), **attributes)
+
+    def _end_trace(self, root: Span, **attributes):
+        """Ends a top-level run and the nested runs still open in its trace, then flushes it."""
+        for invocation_id, span in list(self._runs.items()):
+            # Nested runs cut short (e.g. a stage past its deadline) never reach after_run
+            if span is not root and span.trace_id == root.trace_id:
+                span.attributes["incomplete"] = True
+                self._end_run(invocation_id, **attributes)
+        self._end_run(root.attributes["invocation_id"], **attributes)
+        self.exporter.flush()
+
+    def abandon(self, invocation_id: str):
+        """Closes the trace of a run that was cancelled or raised; ADK skips after_run then."""
+        span = self._runs.get(invocation_id)
+        if span is not None:
+            self._end_trace(span, abandoned=True)
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext):
+        span = self._runs.get(invocation_context.invocation_id)
+        if span is None:
+            return None
+        if span.parent_id is None:
+            self._end_trace(span)
+        else:
+            self._end_run(invocation_context.invocation_id)
+        return None
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        invocation_id = callback_context.invocation_id
+        parent_agent = agent.parent_agent
+        parent = (parent_agent and self._agents.get((invocation_id, parent_agent.name))) or self._runs.get(invocation_id)
+        attributes = {"agent": agent.name, "agent_type": type(agent).__name__}
+        if parent_agent is not None:
+            attributes["parent_agent"] = parent_agent.name
+            if isinstance(parent_agent, LoopAgent) and parent_agent.sub_agents[0] is agent:
+                key = (invocation_id, parent_agent.name)
+                self._iterations[key] = self._iterations.get(key, 0) + 1
+            if (invocation_id, parent_agent.name) in self._iterations:
+                attributes["loop_iteration"] = self._iterations[(invocation_id, parent_agent.name)]
+        branch = callback_context._invocation_context.branch
+        if branch:
+            attributes["branch"] = branch
+        # A retried branch whose previous attempt raised never reached after_agent
+        self._finish(self._agents.get((invocation_id, agent.name)), incomplete=True)
+        self._agents[(invocation_id, agent.name)] = self._start(parent, agent.name, "agent", **attributes)
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext):
+        # A model call answered by a before_model callback never reaches after_model
+        self._finish(self._models.pop(self._model_key(callback_context), None), incomplete=True)
+        self._finish(self._agents.pop((callback_context.invocation_id, agent.name), None))
+        return None
+
+    def _model_key(self, callback_context: CallbackContext) -> Tuple[str, str, str]:
+        return (callback_context.invocation_id, callback_context.agent_name, "model")
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest):
+        parent = self._agents.get((callback_context.invocation_id, callback_context.agent_name))
+        self._models[self._model_key(callback_context)] = self._start(
+            parent, f"call_llm {callback_context.agent_name}", "model", model=llm_request.model or ""
+        )
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse):
+        if llm_response.partial:
+            return None
+        usage = llm_response.usage_metadata
+        attributes = {}
+        if usage is not None:
+            attributes = {
+                "input_tokens": usage.prompt_token_count or 0,
+                "output_tokens": usage.candidates_token_count or 0,
+                "cached_tokens": usage.cached_content_token_count or 0,
+            }
+        self._finish(self._models.pop(self._model_key(callback_context), None), **attributes)
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ):
+        self._finish(self._models.pop(self._model_key(callback_context), None), error=type(error).__name__)
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext):
+        parent = self._agents.get((tool_context.invocation_id, tool_context.agent_name))
+        span = self._start(parent, f"execute_tool {tool.name}", "tool", tool=tool.name)
+        self._tools[(tool_context.invocation_id, tool_context.function_call_id)] = span
+        _tool_span.set(span)
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, result: dict
+    ):
+        self._finish(self._tools.pop((tool_context.invocation_id, tool_context.function_call_id), None))
+        _tool_span.set(None)
+        return None
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, error: Exception
+    ):
+        span = self._tools.pop((tool_context.invocation_id, tool_context.function_call_id), None)
+        self._finish(span, error=type(error).__name__)
+        _tool_span.set(None)
+        return None
@@ -0,0 +1,114 @@
+"""Decoder for the event dicts a deployed Agent Engine app streams.
+
+`async_stream_query` yields each ADK event as a JSON dict. `decode_event`
+normalizes one into a RemoteEvent: author, text, function calls and
+responses, state delta, usage, and whether it is a final response (as
+ADK's `Event.is_final_response` defines it). `decode_stream` does the same
+for a whole stream, and ResponseText accumulates the response text in a
+list that is joined once, so collecting a long package stays linear.
+
+Text semantics, shared by every consumer:
+- Text parts are concatenated in order; thought parts are skipped.
+- A top-level `text` field counts only when the event has no text parts.
+- Partial (streamed) text is replaced by the full event that follows it.
+  `ResponseText.add` returns only text not yet returned, so a full event
+  that repeats its partials contributes just what they didn't cover.
+"""
+
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+
+
+@dataclass
+class RemoteEvent:
+    author: str
+    text: str
+    function_calls: List[dict] = field(default_factory=list)
+    function_responses: List[dict] = field(default_factory=list)
+    state_delta: dict = field(default_factory=dict)
+    usage: dict = field(default_factory=dict)
+    partial: bool = False
+    final: bool = False
+    raw: dict = field(default_factory=dict)
+
+
+def decode_event(raw) -> Optional[RemoteEvent]:
+    """The RemoteEvent for one streamed event, or None if it isn't an event dict."""
+    if not isinstance(raw, dict):
+        return None
+    content = raw.get("content")
+    parts = content.get("parts") if isinstance(content, dict) else raw.get("parts")
+    texts = []
+    calls = []
+    responses = []
+    for part in parts or ():
+        if not isinstance(part, dict):
+            continue
+        text = part.get("text")
+        if text and not part.get("thought"):
+            texts.append(text)
+        elif part.get("function_call"):
+            calls.append(part["function_call"])
+        elif part.get("function_response"):
+            responses.append(part["function_response"])
+    if not texts and isinstance(raw.get("text"), str):
+        texts.append(raw["text"])
+
+    actions = raw.get("actions") or {}
+    partial = bool(raw.get("partial"))
+    return RemoteEvent(
+        author=raw.get("author") or "",
+        text=texts[0] if len(texts) == 1 else "".join(texts),
+        function_calls=calls,
+        function_responses=responses,
+        state_delta=actions.get("state_delta") or {},
+        usage=raw.get("usage_metadata") or {},
+        partial=partial,
+        final=bool(actions.get("skip_summarization")) or not (calls or responses or partial),
+        raw=raw,
+    )
+
+
+async def decode_stream(events: AsyncIterator) -> AsyncIterator[RemoteEvent]:
+    """Decoded events of an `async_stream_query` stream, skipping anything that isn't an event."""
+    async for raw in events:
+        event = decode_event(raw)
+        if event is not None:
+            yield event
+
+
+class ResponseText:
+    """Text of a streamed response, accumulated in linear time."""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        # Partial text since the last full event; dropped when that event arrives
+        self._partial: List[str] = []
+        self.final_text = ""
+
+    def add(self, event: RemoteEvent) -> str:
+        """Adds an event's text; returns the part of it not already returned for earlier partials."""
+        if event.partial:
+            if event.text:
+                self._partial.append(event.text)
+            return event.text
+        streamed = "".join(self._partial)
+        self._partial.clear()
+        if event.text:
+            self._parts.append(event.text)
+            if event.final:
+                self.final_text = event.text
+        if streamed and event.text.startswith(streamed):
+            return event.text[len(streamed):]
+        return event.text
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            # Compacted, so reading the text repeatedly stays linear too
+            self._parts[:] = ["".join(self._parts)]
+        full = self._parts[0] if self._parts else ""
+        return full + "".join(self._partial) if self._partial else full
+
+    def __bool__(self) -> bool:
+        return bool(self._parts or self._partial)
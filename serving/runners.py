@@ -0,0 +1,128 @@
+"""Runner registry with startup warm-up for the local API server."""
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService
+from google.adk.tools.agent_tool import AgentTool
+
+from content_creation_studio.connections import preconnect as open_connections
+from content_creation_studio.models import shared_model
+
+
+def iter_agents(agent: BaseAgent):
+    """Yields every agent in the tree, including agents wrapped as AgentTools."""
+    seen = set()
+    stack = [agent]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        stack.extend(current.sub_agents)
+        if isinstance(current, LlmAgent):
+            for tool in current.tools:
+                if isinstance(tool, AgentTool):
+                    stack.append(tool.agent)
+
+
+def pin_shared_models(agent: BaseAgent, shared: Dict[str, BaseLlm]) -> Dict[str, BaseLlm]:
+    """Replaces model name strings with one shared model instance per name.
+
+    ADK resolves a string model through the LLM registry on every call, which
+    builds a fresh model object (and a fresh API client) each time. Pinning a
+    shared instance lets all agents reuse one client and its connections.
+    """
+    for current in iter_agents(agent):
+        if isinstance(current, LlmAgent) and isinstance(current.model, str) and current.model:
+            if current.model not in shared:
+                shared[current.model] = shared_model(current.model)
+            current.model = shared[current.model]
+        elif isinstance(current, LlmAgent) and isinstance(current.model, BaseLlm):
+            # Wrapped models (e.g. hedging) already share an inner instance; track it for warm-up
+            inner = current.model
+            while isinstance(getattr(inner, "inner", None), BaseLlm):
+                inner = inner.inner
+            shared.setdefault(inner.model, inner)
+    return shared
+
+
+class RunnerRegistry:
+    """Holds one long-lived Runner per entry agent, built once at startup."""
+
+    def __init__(
+        self,
+        session_service: BaseSessionService,
+        plugins_factory: Optional[Callable[[], List[BasePlugin]]] = None,
+    ):
+        self.session_service = session_service
+        self.plugins = plugins_factory() if plugins_factory else []
+        self.models: Dict[str, BaseLlm] = {}
+        self.warmup_seconds: Optional[float] = None
+        self.warmup_errors: Dict[str, str] = {}
+        self._runners: Dict[str, Runner] = {}
+        self._ready = asyncio.Event()
+
+    def register(self, name: str, agent: BaseAgent) -> Runner:
+        """Builds and stores the runner for an entry agent."""
+        pin_shared_models(agent, self.models)
+        runner = Runner(
+            agent=agent,
+            session_service=self.session_service,
+            app_name=agent.name,
+            plugins=self.plugins,
+        )
+        self._runners[name] = runner
+        return runner
+
+    def get(self, name: str) -> Runner:
+        """Returns the runner registered under `name`."""
+        return self._runners[name]
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def abandon(self, invocation_id: str):
+        """Lets plugins drop the state of a run that was cancelled or raised (ADK skips after_run then)."""
+        for plugin in self.plugins:
+            abandon = getattr(plugin, "abandon", None)
+            if abandon is not None:
+                abandon(invocation_id)
+
+    async def wait_ready(self):
+        await self._ready.wait()
+
+    async def warm_up(self, preconnect: bool = True, timeout: float = 10.0, connections: int = 1):
+        """Creates model API clients and opens `connections` connections per model ahead of traffic."""
+        start = time.perf_counter()
+        for name, llm in self.models.items():
+            try:
+                getattr(llm, "api_client", None)  # builds and caches the API client
+                if preconnect:
+                    await open_connections(llm, connections, timeout)
+            except Exception as e:
+                self.warmup_errors[name] = str(e)
+                print(f"⚠️  Warm-up for model {name} failed: {e}")
+        self.warmup_seconds = time.perf_counter() - start
+        self._ready.set()
+        print(f"🔥 Warm-up finished in {self.warmup_seconds:.2f}s ({len(self.models)} model client(s))")
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "runners": sorted(self._runners),
+            "models": sorted(self.models),
+            "warmup_seconds": self.warmup_seconds,
+            "warmup_errors": self.warmup_errors,
+        }
+
+    async def close(self):
+        for runner in self._runners.values():
+            await runner.close()
@@ -0,0 +1,162 @@
+"""Pre-created Agent Engine sessions, so a request doesn't wait for `async_create_session`.
+
+RemoteSessionPool keeps up to SESSION_POOL_SIZE fresh sessions per user
+(remote sessions belong to a user, so each user is its own pool). Taking
+one starts a background refill. An empty pool falls back to creating a
+session on demand. With a size of 0, every acquire creates on demand.
+
+Sessions are never handed out twice:
+- Pooled sessions older than SESSION_POOL_TTL_SECONDS are deleted rather
+  than used, so a session the service may have expired is never handed out.
+- One-shot sessions are handed back with `release`, which deletes them in
+  the background.
+- `close` deletes whatever is still pooled.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from serving.metrics import registry
+
+acquires_total = registry.counter(
+    "remote_session_acquires_total", "Remote sessions handed out, from the pool (hit) or created on demand (miss)", ["outcome"]
+)
+acquire_seconds = registry.histogram(
+    "remote_session_acquire_seconds", "Time to get a remote session for a request", ["outcome"]
+)
+
+
+class RemoteSessionPool:
+    def __init__(self, engine, size: int = 4, ttl_seconds: float = 1800, refill_concurrency: int = 4):
+        self.engine = engine
+        self.size = size
+        self.ttl_seconds = ttl_seconds
+        self.refill_concurrency = refill_concurrency
+        # user -> (session id, created at), oldest first
+        self._pools: Dict[str, Deque[Tuple[str, float]]] = {}
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._background = set()
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.expired = 0
+        self.deleted = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, engine) -> "RemoteSessionPool":
+        return cls(
+            engine,
+            size=int(os.environ.get("SESSION_POOL_SIZE", 4)),
+            ttl_seconds=float(os.environ.get("SESSION_POOL_TTL_SECONDS", 1800)),
+        )
+
+    async def acquire(self, user_id: str) -> str:
+        """A fresh session id for `user_id`: pooled if one is ready, otherwise created now."""
+        start = time.perf_counter()
+        pool = self._pools.setdefault(user_id, deque())
+        now = time.monotonic()
+        while pool:
+            session_id, created = pool.popleft()
+            if now - created < self.ttl_seconds:
+                self.hits += 1
+                self._refill(user_id)
+                acquires_total.inc("hit")
+                acquire_seconds.observe(time.perf_counter() - start, "hit")
+                return session_id
+            self.expired += 1
+            self._delete(user_id, session_id)
+
+        self.misses += 1
+        self._refill(user_id)
+        session = await self.engine.async_create_session(user_id=user_id)
+        self.created += 1
+        acquires_total.inc("miss")
+        acquire_seconds.observe(time.perf_counter() - start, "miss")
+        return session["id"]
+
+    def release(self, user_id: str, session_id: str):
+        """Hands back a one-shot session; it is deleted in the background, never reused."""
+        self._delete(user_id, session_id)
+
+    def warm(self, user_ids: Iterable[str]):
+        """Starts filling the pools of `user_ids` without waiting for them."""
+        for user_id in user_ids:
+            self._pools.setdefault(user_id, deque())
+            self._refill(user_id)
+
+    def _refill(self, user_id: str):
+        if self.size <= 0:
+            return
+        task = self._refills.get(user_id)
+        if task is None or task.done():
+            self._refills[user_id] = asyncio.create_task(self._fill(user_id))
+
+    async def _fill(self, user_id: str):
+        pool = self._pools[user_id]
+        while len(pool) < self.size:
+            now = time.monotonic()
+            while pool and now - pool[0][1] >= self.ttl_seconds:
+                self.expired += 1
+                self._delete(user_id, pool.popleft()[0])
+            missing = min(self.size - len(pool), self.refill_concurrency)
+            results = await asyncio.gather(
+                *(self.engine.async_create_session(user_id=user_id) for _ in range(missing)), return_exceptions=True
+            )
+            created = time.monotonic()
+            failed = False
+            for result in results:
+                if isinstance(result, BaseException):
+                    failed = True
+                    self.errors += 1
+                    self.last_error = f"{type(result).__name__}: {result}"
+                else:
+                    self.created += 1
+                    pool.append((result["id"], created))
+            if failed:
+                # Stop until the next acquire rather than hammer a failing service
+                print(f"⚠️  Session pool refill for {user_id} failed: {self.last_error}")
+                return
+
+    def _delete(self, user_id: str, session_id: str):
+        task = asyncio.create_task(self._delete_now(user_id, session_id))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _delete_now(self, user_id: str, session_id: str):
+        try:
+            await self.engine.async_delete_session(user_id=user_id, session_id=session_id)
+            self.deleted += 1
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+
+    async def close(self, timeout: float = 10):
+        """Stops refilling and deletes the pooled sessions."""
+        for task in self._refills.values():
+            task.cancel()
+        for user_id, pool in self._pools.items():
+            while pool:
+                self._delete(user_id, pool.popleft()[0])
+        if self._background:
+            await asyncio.wait(set(self._background), timeout=timeout)
+
+    def snapshot(self) -> dict:
+        acquires = self.hits + self.misses
+        return {
+            "size": self.size,
+            "ttl_seconds": self.ttl_seconds,
+            "ready": {user_id: len(pool) for user_id, pool in self._pools.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / acquires, 3) if acquires else None,
+            "created": self.created,
+            "expired": self.expired,
+            "deleted": self.deleted,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,353 @@
+"""Session services for the API servers."""
+
+import copy
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from content_creation_studio.blobs import REF_PREFIX, BlobStore, default_blob_store
+
+
+def _value_size(value: Any) -> int:
+    """Approximate in-memory footprint of a JSON-like state value."""
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def _event_size(event: Event) -> int:
+    return len(event.model_dump_json(exclude_none=True))
+
+
+def _split_state_delta(delta: Dict[str, Any]):
+    """Splits a state delta into app, user and session scoped parts."""
+    app_delta, user_delta, session_delta = {}, {}, {}
+    for key, value in delta.items():
+        if key.startswith(State.APP_PREFIX):
+            app_delta[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_delta[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_delta[key] = value
+    return app_delta, user_delta, session_delta
+
+
+class _Entry:
+    """A stored session plus its accounting data."""
+
+    __slots__ = ("session", "state_sizes", "event_bytes", "last_access", "blob_refs")
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.state_sizes = {k: _value_size(v) for k, v in session.state.items()}
+        self.event_bytes = 0
+        self.last_access = time.monotonic()
+        self.blob_refs = []
+
+    @property
+    def nbytes(self) -> int:
+        return self.event_bytes + sum(self.state_sizes.values())
+
+
+class BoundedSessionService(BaseSessionService):
+    """In-memory session service sharded per user, bounded by idle TTL and a byte budget.
+
+    Sessions are kept in one shard per user, so lookups never scan other users'
+    sessions. A global LRU order across all shards drives eviction: sessions idle
+    longer than `ttl_seconds` are dropped first, then the least recently used
+    sessions until the total footprint fits in `max_bytes`.
+
+    With a `blob_store`, large state values and event payloads are stored once
+    in the blob store and the stored session keeps references; the references
+    are released when the session is evicted or deleted. A store without a
+    disk tier has no memory bound of its own, so its memory counts against
+    `max_bytes` too. Sessions and events handed to callers always carry the
+    full values.
+
+    Agents run through an AgentTool (the content pipeline under the
+    orchestrator) use AgentTool's own in-memory session for the run, so their
+    events never reach this store; only the state changes AgentTool forwards
+    on its function response event do.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        blob_store: Optional[BlobStore] = None,
+    ):
+        self.blob_store = blob_store
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get("SESSION_TTL_SECONDS", 3600)
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.environ.get("SESSION_MAX_BYTES", 256 * 1024 * 1024)
+        )
+        self._shards: Dict[str, Dict[Tuple[str, str], _Entry]] = {}
+        self._lru: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
+        self._app_state: Dict[str, Dict[str, Any]] = {}
+        self._user_state: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._total_bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evicted_ttl": 0, "evicted_budget": 0}
+
+    # --- BaseSessionService interface ---
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        shard = self._shards.setdefault(user_id, {})
+        if (app_name, session_id) in shard:
+            raise ValueError(f"Session {session_id} already exists.")
+
+        app_delta, user_delta, session_state = _split_state_delta(state or {})
+        self._app_state.setdefault(app_name, {}).update(app_delta)
+        self._user_state.setdefault((app_name, user_id), {}).update(user_delta)
+        blob_refs = []
+        if self.blob_store:
+            for key, value in session_state.items():
+                session_state[key] = self.blob_store.intern(value)
+                if session_state[key] is not value:
+                    blob_refs.append(session_state[key])
+
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=session_state,
+            last_update_time=time.time(),
+        )
+        entry = _Entry(session)
+        entry.blob_refs.extend(blob_refs)
+        shard[(app_name, session_id)] = entry
+        self._lru[(user_id, app_name, session_id)] = None
+        self._total_bytes += entry.nbytes
+        self._evict()
+        return self._view(entry)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        self._evict()
+        entry = self._shards.get(user_id, {}).get((app_name, session_id))
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        self._counters["hits"] += 1
+        self._touch(user_id, app_name, session_id, entry)
+
+        view = self._view(entry)
+        if config:
+            if config.num_recent_events:
+                view.events = view.events[-config.num_recent_events:]
+            if config.after_timestamp:
+                view.events = [e for e in view.events if e.timestamp >= config.after_timestamp]
+        return view
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        user_ids = [user_id] if user_id is not None else list(self._shards)
+        sessions = []
+        for uid in user_ids:
+            for (entry_app, _), entry in self._shards.get(uid, {}).items():
+                if entry_app == app_name:
+                    view = self._view(entry)
+                    view.events = []
+                    sessions.append(view)
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._drop(user_id, app_name, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        # Only the stored copy carries blob references; the caller's event and session keep full values
+        stored_event, blob_refs = self.blob_store.intern_event(event) if self.blob_store else (event, [])
+
+        entry = self._shards.get(session.user_id, {}).get((session.app_name, session.id))
+        if entry is None:
+            # Evicted mid-run: the caller still holds its copy, nothing to store.
+            if self.blob_store:
+                self.blob_store.release(blob_refs)
+            return event
+
+        stored = entry.session
+        before = entry.nbytes
+        if stored_event.actions and stored_event.actions.state_delta:
+            # App and user state outlive this session and its blob references, so they keep full values
+            app_delta, user_delta, _ = _split_state_delta(event.actions.state_delta)
+            self._app_state.setdefault(session.app_name, {}).update(app_delta)
+            self._user_state.setdefault((session.app_name, session.user_id), {}).update(user_delta)
+            _, _, session_delta = _split_state_delta(stored_event.actions.state_delta)
+            for key, value in session_delta.items():
+                stored.state[key] = value
+                entry.state_sizes[key] = _value_size(value)
+        stored.events.append(stored_event)
+        stored.last_update_time = event.timestamp
+        entry.event_bytes += _event_size(stored_event)
+        entry.blob_refs.extend(blob_refs)
+        self._total_bytes += entry.nbytes - before
+        self._touch(session.user_id, session.app_name, session.id, entry)
+        self._evict()
+        return event
+
+    async def replace_events(self, session: Session, event_ids, replacement: Event) -> None:
+        """Swaps the given stored events for a single replacement event."""
+        entry = self._shards.get(session.user_id, {}).get((session.app_name, session.id))
+        if entry is None:
+            return
+        removed_ids = set(event_ids)
+        stored = entry.session
+        before = entry.nbytes
+        kept, insert_at = [], None
+        for event in stored.events:
+            if event.id in removed_ids:
+                if insert_at is None:
+                    insert_at = len(kept)
+                entry.event_bytes -= _event_size(event)
+            else:
+                kept.append(event)
+        if self.blob_store:
+            replacement, blob_refs = self.blob_store.intern_event(replacement)
+            entry.blob_refs.extend(blob_refs)
+        kept.insert(len(kept) if insert_at is None else insert_at, replacement)
+        entry.event_bytes += _event_size(replacement)
+        stored.events = kept
+        self._total_bytes += entry.nbytes - before
+
+    # --- Ephemeral sessions and accounting ---
+
+    @asynccontextmanager
+    async def ephemeral_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None):
+        """Creates a session that is deleted as soon as the block exits."""
+        session = await self.create_session(app_name=app_name, user_id=user_id, state=state)
+        try:
+            yield session
+        finally:
+            self._drop(user_id, app_name, session.id)
+
+    async def collect_blobs(self, min_age_seconds: float = 600) -> int:
+        """Deletes disk blobs that no stored session references any more."""
+        if not (self.blob_store and self.blob_store.directory):
+            return 0
+        referenced = {
+            ref[len(REF_PREFIX):] for shard in self._shards.values() for entry in shard.values() for ref in entry.blob_refs
+        }
+        return self.blob_store.collect(referenced, min_age_seconds)
+
+    async def stats(self) -> dict:
+        """Reports entry counts and the approximate memory footprint."""
+        sessions = sum(len(shard) for shard in self._shards.values())
+        events = sum(len(e.session.events) for shard in self._shards.values() for e in shard.values())
+        stats = {
+            "users": len(self._shards),
+            "sessions": sessions,
+            "events": events,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            **self._counters,
+        }
+        if self.blob_store:
+            stats["blobs"] = self.blob_store.stats()
+        return stats
+
+    # --- Internals ---
+
+    def _view(self, entry: _Entry) -> Session:
+        """Returns a caller-owned copy without deep-copying the event history."""
+        stored = entry.session
+        state = self.blob_store.resolve_state(stored.state) if self.blob_store else stored.state
+        state = dict(state)
+        for key, value in self._app_state.get(stored.app_name, {}).items():
+            state[State.APP_PREFIX + key] = copy.copy(value)
+        for key, value in self._user_state.get((stored.app_name, stored.user_id), {}).items():
+            state[State.USER_PREFIX + key] = copy.copy(value)
+        if self.blob_store:
+            events = [self.blob_store.hydrate_event(e) for e in stored.events]
+        else:
+            events = list(stored.events)
+        return Session(
+            id=stored.id,
+            app_name=stored.app_name,
+            user_id=stored.user_id,
+            state=state,
+            events=events,
+            last_update_time=stored.last_update_time,
+        )
+
+    def _touch(self, user_id: str, app_name: str, session_id: str, entry: _Entry):
+        entry.last_access = time.monotonic()
+        self._lru.move_to_end((user_id, app_name, session_id))
+
+    def _drop(self, user_id: str, app_name: str, session_id: str) -> bool:
+        shard = self._shards.get(user_id)
+        entry = shard.pop((app_name, session_id), None) if shard is not None else None
+        if entry is None:
+            return False
+        self._lru.pop((user_id, app_name, session_id), None)
+        self._total_bytes -= entry.nbytes
+        if self.blob_store:
+            self.blob_store.release(entry.blob_refs)
+        if not shard:
+            del self._shards[user_id]
+        return True
+
+    def _footprint(self) -> int:
+        """Bytes counted against `max_bytes`: sessions, plus blobs held only in memory."""
+        if self.blob_store and self.blob_store.memory_bytes is None:
+            return self._total_bytes + self.blob_store.memory_used
+        return self._total_bytes
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._lru:
+            user_id, app_name, session_id = next(iter(self._lru))
+            entry = self._shards[user_id][(app_name, session_id)]
+            if now - entry.last_access > self.ttl_seconds:
+                self._counters["evicted_ttl"] += 1
+            elif self._footprint() > self.max_bytes:
+                self._counters["evicted_budget"] += 1
+            else:
+                break
+            self._drop(user_id, app_name, session_id)
+
+
+def create_session_service() -> BaseSessionService:
+    """Builds the session service selected by SESSION_BACKEND (memory or sqlite).
+
+    BLOB_STORE=1 moves large state values into the content-addressed blob store.
+    """
+    backend = os.environ.get("SESSION_BACKEND", "memory")
+    blob_store = default_blob_store() if os.environ.get("BLOB_STORE", "0") == "1" else None
+    if backend == "sqlite":
+        from serving.sqlite_sessions import SqliteSessionService
+        if blob_store and not blob_store.directory:
+            raise ValueError("BLOB_STORE with SESSION_BACKEND=sqlite needs BLOB_STORE_DIR shared by all workers")
+        return SqliteSessionService(blob_store=blob_store)
+    if backend == "memory":
+        return BoundedSessionService(blob_store=blob_store)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -0,0 +1,484 @@
+"""Durable SQLite-backed session service shared by all workers on a node."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from content_creation_studio.blobs import BlobStore, digests_in
+from serving.sessions import _split_state_delta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS session_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS app_state (
+    app_name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session
+    ON events (app_name, user_id, session_id, seq);
+CREATE INDEX IF NOT EXISTS idx_sessions_update_time
+    ON sessions (update_time);
+"""
+
+
+class SqliteSessionService(BaseSessionService):
+    """ADK session service persisted in SQLite (WAL mode).
+
+    All blocking SQLite work runs on worker threads so the event loop never
+    waits on disk. Event appends are group-committed: appends arriving within
+    `batch_window` seconds are written in a single transaction, and each
+    caller resumes once its batch is durable. State lives in per-key rows, so
+    a state delta is an indexed upsert rather than a rewrite of the session.
+
+    WAL mode plus `BEGIN IMMEDIATE` and a busy timeout let several uvicorn
+    workers on the same node share one database file safely.
+
+    With a `blob_store` (which must have a directory shared by the workers),
+    large state values and event payloads are written as references, and
+    resolved again when sessions are read.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        batch_window: float = 0.002,
+        max_batch: int = 256,
+        read_threads: int = 4,
+        blob_store: Optional[BlobStore] = None,
+    ):
+        self.blob_store = blob_store
+        self.db_path = db_path or os.environ.get("SESSION_DB_PATH", "sessions.db")
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="sqlite-reader")
+        self._pending: List[Tuple[Session, Event, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self._counters = {"appends": 0, "batches": 0, "compacted_events": 0}
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    # --- Connection handling ---
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    async def _read(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, fn, *args)
+
+    async def _write(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, fn, *args)
+
+    def _transaction(self, fn, *args):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # --- BaseSessionService interface ---
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        now = time.time()
+
+        def _create(conn):
+            try:
+                conn.execute(
+                    "INSERT INTO sessions (app_name, user_id, id, update_time) VALUES (?, ?, ?, ?)",
+                    (app_name, user_id, session_id, now),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Session {session_id} already exists.")
+            initial = state or {}
+            if self.blob_store:
+                initial = {k: self.blob_store.intern(v) for k, v in initial.items()}
+            _apply_state_delta(conn, app_name, user_id, session_id, initial)
+
+        await self._write(self._transaction, _create)
+        return await self.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        def _get():
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT update_time FROM sessions WHERE app_name=? AND user_id=? AND id=?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+            state = self._resolve(_load_state(conn, app_name, user_id, session_id))
+
+            where = "app_name=? AND user_id=? AND session_id=?"
+            params: list = [app_name, user_id, session_id]
+            if config and config.after_timestamp:
+                where += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            if config and config.num_recent_events:
+                query = (
+                    f"SELECT data FROM (SELECT seq, data FROM events WHERE {where} "
+                    "ORDER BY seq DESC LIMIT ?) ORDER BY seq"
+                )
+                params.append(config.num_recent_events)
+            else:
+                query = f"SELECT data FROM events WHERE {where} ORDER BY seq"
+            events = [Event.model_validate_json(data) for (data,) in conn.execute(query, params)]
+            if self.blob_store:
+                events = [self.blob_store.hydrate_event(e) for e in events]
+            return Session(
+                id=session_id,
+                app_name=app_name,
+                user_id=user_id,
+                state=state,
+                events=events,
+                last_update_time=row[0],
+            )
+
+        return await self._read(_get)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        def _list():
+            conn = self._conn()
+            if user_id is None:
+                rows = conn.execute(
+                    "SELECT user_id, id, update_time FROM sessions WHERE app_name=?", (app_name,)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT user_id, id, update_time FROM sessions WHERE app_name=? AND user_id=?",
+                    (app_name, user_id),
+                ).fetchall()
+            return ListSessionsResponse(sessions=[
+                Session(
+                    id=sid,
+                    app_name=app_name,
+                    user_id=uid,
+                    state=self._resolve(_load_state(conn, app_name, uid, sid)),
+                    last_update_time=update_time,
+                )
+                for uid, sid, update_time in rows
+            ])
+
+        return await self._read(_list)
+
+    def _resolve(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self.blob_store.resolve_state(state) if self.blob_store else state
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        def _delete(conn):
+            key = (app_name, user_id, session_id)
+            conn.execute("DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=?", key)
+            conn.execute("DELETE FROM session_state WHERE app_name=? AND user_id=? AND session_id=?", key)
+            conn.execute("DELETE FROM sessions WHERE app_name=? AND user_id=? AND id=?", key)
+
+        await self._write(self._transaction, _delete)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        stored_event = self.blob_store.intern_event(event)[0] if self.blob_store else event
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((session, stored_event, future))
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush(loop, 0)
+        elif self._flush_handle is None:
+            self._schedule_flush(loop, self.batch_window)
+        await future
+        return event
+
+    async def replace_events(self, session: Session, event_ids, replacement: Event) -> None:
+        """Swaps the given stored events for a single replacement event."""
+        event_ids = list(event_ids)
+        key = (session.app_name, session.user_id, session.id)
+        if self.blob_store:
+            replacement = self.blob_store.intern_event(replacement)[0]
+
+        def _replace(conn):
+            placeholders = ",".join("?" * len(event_ids))
+            conn.execute(
+                "DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=? "
+                f"AND json_extract(data, '$.id') IN ({placeholders})",
+                (*key, *event_ids),
+            )
+            conn.execute(
+                "INSERT INTO events (app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                (*key, replacement.timestamp, replacement.model_dump_json(exclude_none=True)),
+            )
+
+        await self._write(self._transaction, _replace)
+
+    # --- Group commit ---
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, delay: float):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = loop.call_later(delay, self._start_flush, loop)
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop):
+        # Held until done, so the task isn't collected mid-flush and its errors are reported
+        task = loop.create_task(self._flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._flush_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️  Session event flush failed: {task.exception()!r}")
+
+    async def _flush(self):
+        self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            rows = [
+                (
+                    s.app_name, s.user_id, s.id, e.timestamp,
+                    e.model_dump_json(exclude_none=True),
+                    dict(e.actions.state_delta) if e.actions and e.actions.state_delta else {},
+                )
+                for s, e, _ in batch
+            ]
+            await self._write(self._transaction, _write_events, rows)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._counters["appends"] += len(batch)
+        self._counters["batches"] += 1
+        for _, _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+    # --- Maintenance ---
+
+    async def compact(self, keep_recent_events: int = 200, older_than_seconds: float = 86400) -> int:
+        """Drops events beyond the most recent `keep_recent_events` per session
+        when they are older than `older_than_seconds`. State is unaffected."""
+        cutoff = time.time() - older_than_seconds
+
+        def _compact(conn):
+            cursor = conn.execute(
+                """
+                DELETE FROM events WHERE seq IN (
+                    SELECT seq FROM (
+                        SELECT seq, timestamp, ROW_NUMBER() OVER (
+                            PARTITION BY app_name, user_id, session_id ORDER BY seq DESC
+                        ) AS recency
+                        FROM events
+                    ) WHERE recency > ? AND timestamp < ?
+                )
+                """,
+                (keep_recent_events, cutoff),
+            )
+            return cursor.rowcount
+
+        deleted = await self._write(self._transaction, _compact)
+        await self._write(lambda: self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)"))
+        self._counters["compacted_events"] += deleted
+        return deleted
+
+    async def expire_sessions(self, idle_seconds: float) -> int:
+        """Deletes sessions not updated within `idle_seconds`."""
+        cutoff = time.time() - idle_seconds
+
+        def _expire(conn):
+            rows = conn.execute("SELECT app_name, user_id, id FROM sessions WHERE update_time < ?", (cutoff,)).fetchall()
+            for key in rows:
+                conn.execute("DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=?", key)
+                conn.execute("DELETE FROM session_state WHERE app_name=? AND user_id=? AND session_id=?", key)
+                conn.execute("DELETE FROM sessions WHERE app_name=? AND user_id=? AND id=?", key)
+            return len(rows)
+
+        return await self._write(self._transaction, _expire)
+
+    async def collect_blobs(self, min_age_seconds: float = 600) -> int:
+        """Deletes disk blobs that no stored session, user or app state references any more."""
+        if not self.blob_store:
+            return 0
+
+        def _referenced():
+            conn = self._conn()
+            referenced = set()
+            for query in (
+                "SELECT value FROM session_state",
+                "SELECT value FROM user_state",
+                "SELECT value FROM app_state",
+                "SELECT data FROM events",
+            ):
+                for text, in conn.execute(query):
+                    referenced |= digests_in(text)
+            return referenced
+
+        referenced = await self._read(_referenced)
+        return await asyncio.to_thread(self.blob_store.collect, referenced, min_age_seconds)
+
+    @asynccontextmanager
+    async def ephemeral_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None):
+        """Creates a session that is deleted as soon as the block exits."""
+        session = await self.create_session(app_name=app_name, user_id=user_id, state=state)
+        try:
+            yield session
+        finally:
+            await self.delete_session(app_name=app_name, user_id=user_id, session_id=session.id)
+
+    async def stats(self) -> dict:
+        def _counts():
+            conn = self._conn()
+            sessions, = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            events, = conn.execute("SELECT COUNT(*) FROM events").fetchone()
+            page_count, = conn.execute("PRAGMA page_count").fetchone()
+            page_size, = conn.execute("PRAGMA page_size").fetchone()
+            return sessions, events, page_count * page_size
+
+        sessions, events, nbytes = await self._read(_counts)
+        return {
+            "backend": "sqlite",
+            "db_path": self.db_path,
+            "sessions": sessions,
+            "events": events,
+            "bytes": nbytes,
+            "pending_appends": len(self._pending),
+            **self._counters,
+            **({"blobs": self.blob_store.stats()} if self.blob_store else {}),
+        }
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+
+def _apply_state_delta(conn: sqlite3.Connection, app_name: str, user_id: str, session_id: str, delta: Dict[str, Any]):
+    app_delta, user_delta, session_delta = _split_state_delta(delta)
+    if app_delta:
+        conn.executemany(
+            "INSERT OR REPLACE INTO app_state (app_name, key, value) VALUES (?, ?, ?)",
+            [(app_name, k, json.dumps(v, default=str)) for k, v in app_delta.items()],
+        )
+    if user_delta:
+        conn.executemany(
+            "INSERT OR REPLACE INTO user_state (app_name, user_id, key, value) VALUES (?, ?, ?, ?)",
+            [(app_name, user_id, k, json.dumps(v, default=str)) for k, v in user_delta.items()],
+        )
+    if session_delta:
+        conn.executemany(
+            "INSERT OR REPLACE INTO session_state (app_name, user_id, session_id, key, value) VALUES (?, ?, ?, ?, ?)",
+            [(app_name, user_id, session_id, k, json.dumps(v, default=str)) for k, v in session_delta.items()],
+        )
+
+
+def _write_events(conn: sqlite3.Connection, rows):
+    conn.executemany(
+        "INSERT INTO events (app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+        [row[:5] for row in rows],
+    )
+    latest: Dict[Tuple[str, str, str], float] = {}
+    for app_name, user_id, session_id, timestamp, _, delta in rows:
+        if delta:
+            _apply_state_delta(conn, app_name, user_id, session_id, delta)
+        key = (app_name, user_id, session_id)
+        latest[key] = max(latest.get(key, 0), timestamp)
+    conn.executemany(
+        "UPDATE sessions SET update_time=? WHERE app_name=? AND user_id=? AND id=?",
+        [(ts, *key) for key, ts in latest.items()],
+    )
+
+
+def _load_state(conn: sqlite3.Connection, app_name: str, user_id: str, session_id: str) -> Dict[str, Any]:
+    state = {
+        State.APP_PREFIX + key: json.loads(value)
+        for key, value in conn.execute("SELECT key, value FROM app_state WHERE app_name=?", (app_name,))
+    }
+    state.update({
+        State.USER_PREFIX + key: json.loads(value)
+        for key, value in conn.execute(
+            "SELECT key, value FROM user_state WHERE app_name=? AND user_id=?", (app_name, user_id)
+        )
+    })
+    state.update({
+        key: json.loads(value)
+        for key, value in conn.execute(
+            "SELECT key, value FROM session_state WHERE app_name=? AND user_id=? AND session_id=?",
+            (app_name, user_id, session_id),
+        )
+    })
+    return state
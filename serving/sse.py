@@ -0,0 +1,262 @@
+"""Server-sent event encoding shared by the API servers.
+
+Endpoints yield plain payload dicts; `sse_response` turns them into a
+`text/event-stream` response:
+
+- Payloads are encoded straight to `data: ...` frames with a compact JSON
+  encoder (orjson when installed), and the frames of one flush go out as a
+  single write.
+- Payloads arriving within SSE_FLUSH_MS of the first unsent one are
+  coalesced into that write, and consecutive `chunk` payloads are merged
+  into one frame. The first payload of a stream and `complete`/`error`
+  payloads are sent right away.
+- A `status` payload equal to the one before it is dropped. Chunks carry
+  content and `event` payloads a unique `event_id`, so they are always kept.
+- When nothing has been written for SSE_HEARTBEAT_SECONDS, a `: keepalive`
+  comment keeps proxies from closing the idle stream during long stages.
+- With SSE_COMPRESSION=gzip, streams to clients that accept gzip are
+  compressed, sync-flushed at every write so frames aren't held back.
+  SSE can't switch encodings mid-stream, so the whole stream is compressed;
+  the gain is mostly the large `complete` payload and repeated keys.
+"""
+
+import asyncio
+import json
+import os
+import zlib
+from typing import AsyncIterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from serving.metrics import registry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ENCODER = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+IDENTITY = "identity"
+GZIP = "gzip"
+
+# Payload types sent as soon as they arrive
+URGENT_TYPES = frozenset(("complete", "error"))
+# Payload types without content of their own, so a repeat says nothing new
+DEDUP_TYPES = frozenset(("status",))
+
+FLUSH_SECONDS = float(os.environ.get("SSE_FLUSH_MS", 25)) / 1000
+HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", 15))
+COMPRESSION = os.environ.get("SSE_COMPRESSION", "off")
+COMPRESSION_LEVEL = int(os.environ.get("SSE_COMPRESSION_LEVEL", 6))
+
+HEARTBEAT = b": keepalive\n\n"
+
+payloads_total = registry.counter(
+    "sse_payloads_total", "SSE payloads by outcome: sent, merged into a chunk, or dropped as duplicate", ["outcome"]
+)
+writes_total = registry.counter("sse_writes_total", "SSE writes, including heartbeats", ["encoding"])
+bytes_total = registry.counter("sse_bytes_total", "SSE bytes written", ["encoding"])
+heartbeats_total = registry.counter("sse_heartbeats_total", "SSE keepalive comments sent")
+
+
+def dumps(payload: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return _ENCODER.encode(payload).encode()
+
+
+class SSEEncoder:
+    """Frames, merges, deduplicates and optionally compresses the payloads of one stream."""
+
+    def __init__(self, encoding: str = IDENTITY, level: int = COMPRESSION_LEVEL):
+        self.encoding = encoding
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31) if encoding == GZIP else None
+        self._pending: List[dict] = []
+        # Contents of the chunk run at the end of _pending, joined at flush
+        self._chunk_texts: List[str] = []
+        self._last: Optional[dict] = None
+        # Counted per stream and added to the metrics once, in record_metrics
+        self.sent = 0
+        self.merged = 0
+        self.duplicates = 0
+        self.heartbeats = 0
+        self.writes = 0
+        self.bytes = 0
+
+    def add(self, payload: dict) -> bool:
+        """Queues a payload; True when it should be sent without waiting for the flush window."""
+        kind = payload.get("type")
+        if kind == "chunk" and self._chunk_texts and payload.get("session_id") == self._pending[-1].get("session_id"):
+            self._last = payload
+            self._chunk_texts.append(payload.get("content") or "")
+            self.merged += 1
+            return False
+        if kind in DEDUP_TYPES and payload == self._last:
+            self.duplicates += 1
+            return False
+        self._last = payload
+        self._close_chunk_run()
+        if kind == "chunk":
+            self._chunk_texts.append(payload.get("content") or "")
+        self._pending.append(payload)
+        return kind in URGENT_TYPES or self.writes == 0
+
+    def _close_chunk_run(self):
+        if len(self._chunk_texts) > 1:
+            self._pending[-1] = {**self._pending[-1], "content": "".join(self._chunk_texts)}
+        self._chunk_texts.clear()
+
+    def flush(self) -> bytes:
+        """The pending frames as one write; empty when there is nothing to send."""
+        self._close_chunk_run()
+        if not self._pending:
+            return b""
+        parts = []
+        for payload in self._pending:
+            parts += (b"data: ", dumps(payload), b"\n\n")
+        self.sent += len(self._pending)
+        self._pending.clear()
+        return self._write(b"".join(parts))
+
+    def heartbeat(self) -> bytes:
+        self.heartbeats += 1
+        return self._write(HEARTBEAT)
+
+    def close(self) -> bytes:
+        """Remaining frames and, for gzip, the end of the compressed stream."""
+        data = self.flush()
+        if self._compressor is not None:
+            data += self._compressor.flush(zlib.Z_FINISH)
+            self._compressor = None
+        return data
+
+    def _write(self, data: bytes) -> bytes:
+        if self._compressor is not None:
+            data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.writes += 1
+        self.bytes += len(data)
+        return data
+
+    def record_metrics(self):
+        payloads_total.inc("sent", amount=self.sent)
+        payloads_total.inc("merged", amount=self.merged)
+        payloads_total.inc("duplicate", amount=self.duplicates)
+        heartbeats_total.inc(amount=self.heartbeats)
+        writes_total.inc(self.encoding, amount=self.writes)
+        bytes_total.inc(self.encoding, amount=self.bytes)
+
+
+async def sse_stream(
+    payloads: AsyncIterator[dict],
+    encoder: SSEEncoder,
+    flush_seconds: float = FLUSH_SECONDS,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+) -> AsyncIterator[bytes]:
+    """Writes from `payloads`, coalesced within `flush_seconds`, with heartbeats while idle.
+
+    `payloads` is driven by its own task, which adds to the encoder and
+    wakes this generator when a write is due: at once for urgent payloads,
+    otherwise when the flush timer started by the first unsent one fires.
+    A slow stage therefore doesn't hold back heartbeats, and closing this
+    stream cancels the producer.
+    """
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+    flush_timer: Optional[asyncio.TimerHandle] = None
+    heartbeat_timer: Optional[asyncio.TimerHandle] = None
+    last_write = loop.time()
+    beat = False
+    done = False
+    error: Optional[Exception] = None
+
+    def wake():
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def check_heartbeat():
+        # One timer per interval rather than one per write; re-armed for the rest of the interval
+        nonlocal beat, heartbeat_timer
+        idle = loop.time() - last_write
+        if idle >= heartbeat_seconds:
+            beat = True
+            wake()
+            idle = 0.0
+        heartbeat_timer = loop.call_later(heartbeat_seconds - idle, check_heartbeat)
+
+    async def pump():
+        nonlocal flush_timer, done, error
+        try:
+            async for payload in payloads:
+                if encoder.add(payload) or flush_seconds <= 0:
+                    wake()
+                elif flush_timer is None:
+                    flush_timer = loop.call_later(flush_seconds, wake)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            done = True
+            wake()
+
+    producer = asyncio.create_task(pump())
+    if heartbeat_seconds > 0:
+        heartbeat_timer = loop.call_later(heartbeat_seconds, check_heartbeat)
+    try:
+        while True:
+            await waiter
+            waiter = loop.create_future()
+            if flush_timer is not None:
+                flush_timer.cancel()
+                flush_timer = None
+            if done:
+                data = encoder.close()
+                if data:
+                    yield data
+                if error is not None:
+                    raise error
+                return
+            data = encoder.flush()
+            if not data and beat:
+                data = encoder.heartbeat()
+            beat = False
+            if data:
+                last_write = loop.time()
+                yield data
+    finally:
+        if heartbeat_timer is not None:
+            heartbeat_timer.cancel()
+        if flush_timer is not None:
+            flush_timer.cancel()
+        if not producer.done():
+            producer.cancel()
+        encoder.record_metrics()
+
+
+def negotiate_encoding(accept_encoding: Optional[str], compression: str = COMPRESSION) -> str:
+    if compression == GZIP and GZIP in (accept_encoding or "").lower():
+        return GZIP
+    return IDENTITY
+
+
+def sse_response(
+    payloads: AsyncIterator[dict],
+    request,
+    compression: str = COMPRESSION,
+    flush_seconds: float = FLUSH_SECONDS,
+    background: Optional[BackgroundTask] = None,
+) -> StreamingResponse:
+    """An event-stream response for `payloads`, compressed if enabled and the client accepts gzip.
+
+    `background` runs once the response ends, even if the client left before `payloads` started.
+    """
+    encoder = SSEEncoder(negotiate_encoding(request.headers.get("accept-encoding"), compression))
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if encoder.encoding == GZIP:
+        headers["Content-Encoding"] = GZIP
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(
+        sse_stream(payloads, encoder, flush_seconds), media_type="text/event-stream", headers=headers, background=background
+    )
@@ -0,0 +1,151 @@
+"""Span records and a local file exporter for agent run timelines.
+
+Spans are written one JSON object per line, either in the plain format
+below or as OTLP/JSON `resourceSpans` (TRACE_FORMAT=otlp, the shape the
+OpenTelemetry file exporter writes), and `load_spans` reads both back.
+TRACE_FILE may contain `{pid}` so each worker process writes its own file.
+
+Plain format: {"trace_id", "span_id", "parent_id", "name", "kind",
+"start", "end", "attributes"}, times in epoch seconds.
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+SERVICE_NAME = "content_creation_studio"
+
+
+def new_id(length: int = 16) -> str:
+    return os.urandom(length // 2).hex()
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    kind: str
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    attributes: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or self.start) - self.start
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _from_otlp_value(value: dict):
+    if "intValue" in value:
+        return int(value["intValue"])
+    return next(iter(value.values()), None)
+
+
+def to_otlp(spans: List[Span]) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "serving.tracing"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(int(span.start * 1e9)),
+                        "endTimeUnixNano": str(int((span.end or span.start) * 1e9)),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in {"span.kind": span.kind, **span.attributes}.items()
+                        ],
+                    }
+                    for span in spans
+                ],
+            }],
+        }]
+    }
+
+
+def from_otlp(document: dict) -> List[Span]:
+    spans = []
+    for resource_spans in document.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for raw in scope_spans.get("spans", []):
+                attributes = {item["key"]: _from_otlp_value(item["value"]) for item in raw.get("attributes", [])}
+                spans.append(Span(
+                    trace_id=raw["traceId"],
+                    span_id=raw["spanId"],
+                    parent_id=raw.get("parentSpanId") or None,
+                    name=raw["name"],
+                    kind=attributes.pop("span.kind", "internal"),
+                    start=int(raw["startTimeUnixNano"]) / 1e9,
+                    end=int(raw["endTimeUnixNano"]) / 1e9,
+                    attributes=attributes,
+                ))
+    return spans
+
+
+class FileSpanExporter:
+    """Buffers finished spans and appends them to a file on `flush`."""
+
+    def __init__(self, path: str, fmt: str = "jsonl"):
+        if fmt not in ("jsonl", "otlp"):
+            raise ValueError(f"Unknown trace format: {fmt!r} (use 'jsonl' or 'otlp')")
+        self.path = path.format(pid=os.getpid())
+        self.fmt = fmt
+        self._pending: List[Span] = []
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        self._pending.append(span)
+
+    def flush(self):
+        if not self._pending:
+            return
+        spans, self._pending = self._pending, []
+        if self.fmt == "otlp":
+            lines = [json.dumps(to_otlp(spans))]
+        else:
+            lines = [json.dumps(asdict(span)) for span in spans]
+        with open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def exporter_from_env() -> Optional[FileSpanExporter]:
+    """The exporter configured by TRACE_FILE/TRACE_FORMAT, or None when tracing is off."""
+    path = os.environ.get("TRACE_FILE")
+    if not path:
+        return None
+    return FileSpanExporter(path, os.environ.get("TRACE_FORMAT", "jsonl"))
+
+
+def load_spans(path: str) -> List[Span]:
+    """Reads spans written in either format."""
+    spans = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "resourceSpans" in record:
+                spans.extend(from_otlp(record))
+            else:
+                spans.append(Span(**record))
+    return spans